@@ -8,11 +8,18 @@ from src.features.fornecedores import fornecedores_bp
 from src.features.produtos import produtos_bp
 from src.features.venda import venda_bp
 from src.features.dashboard import dashboard_bp
+from src.features.estoque import estoque_bp, init_estoque
+from src.features.analise import analise_bp, init_analise
+from src.features.compras import compras_bp
+from src.features.profiler import profiler_bp
 from config import Config
-from src.core import init_supabase
-from src.common.interface import get_interface_context
+from src.core import (
+    init_supabase, init_profiler, configure_resilience, init_templates, init_static_assets,
+    init_compression, init_conditional_get, init_idempotency
+)
+from src.common.interface import get_lazy_interface_context
 from src.common.template_utils import (
-    format_currency, format_number, format_date, format_quantity,
+    format_currency, format_number, format_date, format_datetime, format_quantity,
     calcular_total_itens, get_produto_by_id
 )
 import os
@@ -26,11 +33,35 @@ app = Flask(
 app.config.from_mapping(Config)
 
 # Inicializa sessão
-Session(app)
+# DECISÃO: SESSION_TYPE 'null' usa a sessão em cookie padrão do Flask
+# O flask-session >= 0.7 não aceita mais 'null' e falharia na inicialização
+if app.config.get('SESSION_TYPE') != 'null':
+    Session(app)
 
 # Inicializar Supabase
 init_supabase(app)
 
+# Configura retry e circuit breaker das chamadas ao Supabase
+configure_resilience(app)
+
+# Inicializa profiler (não registra nada se PROFILER_ENABLED for falso)
+init_profiler(app)
+
+# Compressão gzip/brotli das respostas (primeiro after_request = o último a rodar)
+init_compression(app)
+
+# ETag/304 nas listas e no detalhe da venda (versões de dados compartilhadas)
+init_conditional_get(app)
+
+# Chaves de idempotência da sincronização de vendas offline
+init_idempotency(app)
+
+# Valor do estoque e lista de vencimentos mantidos fora do banco
+init_estoque(app)
+
+# Totais diários de vendas por produto (relatórios de semanas/meses)
+init_analise(app)
+
 # Registra as rotas do app
 app.register_blueprint(auth_bp)
 app.register_blueprint(profile_bp)
@@ -39,6 +70,10 @@ app.register_blueprint(fornecedores_bp)
 app.register_blueprint(produtos_bp)
 app.register_blueprint(venda_bp)
 app.register_blueprint(dashboard_bp)
+app.register_blueprint(estoque_bp)
+app.register_blueprint(analise_bp)
+app.register_blueprint(compras_bp)
+app.register_blueprint(profiler_bp)
 
 # ============================================
 # REGISTRO DE FILTROS CUSTOMIZADOS
@@ -47,24 +82,28 @@ app.register_blueprint(dashboard_bp)
 app.jinja_env.filters['format_currency'] = format_currency
 app.jinja_env.filters['format_number'] = format_number
 app.jinja_env.filters['format_date'] = format_date
+app.jinja_env.filters['format_datetime'] = format_datetime
 app.jinja_env.filters['format_quantity'] = format_quantity
 
 # ============================================
-# CONTEXT PROCESSOR - Injeta contexto em todos os templates
+# CONTEXTO GLOBAL DOS TEMPLATES
 # ============================================
-@app.context_processor
-def inject_interface_context():
-    """Injeta variáveis de contexto da interface em todos os templates"""
-    context = get_interface_context()
-    
-    # Adiciona funções auxiliares ao contexto
-    # Essas funções podem ser chamadas diretamente nos templates
-    context.update({
-        'calcular_total_itens': calcular_total_itens,
-        'get_produto_by_id': get_produto_by_id,
-    })
-    
-    return context
+# DECISÃO: Registrar como globals do Jinja, uma vez, em vez de um context processor
+# O context processor montava menu e usuário em todo render, até na tela de login
+# Os valores da interface são proxies preguiçosos: só são calculados se lidos
+app.jinja_env.globals.update(get_lazy_interface_context())
+
+# Essas funções podem ser chamadas diretamente nos templates
+app.jinja_env.globals.update(
+    calcular_total_itens=calcular_total_itens,
+    get_produto_by_id=get_produto_by_id,
+)
+
+# Cache de bytecode e pré-compilação dos templates (após filtros e globals)
+init_templates(app)
+
+# URLs de estáticos com hash + cache immutable + variantes gzip/brotli
+init_static_assets(app)
 
 @app.route('/')
 def index():
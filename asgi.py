@@ -0,0 +1,17 @@
+"""
+Entrada ASGI da aplicação
+
+Permite servir o Mercadim com um servidor ASGI (uvicorn, hypercorn):
+
+    ASYNC_SERVICES=true uvicorn asgi:asgi_app --workers 2
+
+DECISÃO: Envolver o app WSGI com WsgiToAsgi em vez de reescrever as views
+Cada requisição roda em uma thread do adaptador; as consultas ao Supabase
+dos services async são feitas no event loop do worker (src/core/async_database.py),
+que mantém um único pool de conexões para centenas de chamadas em paralelo.
+"""
+from asgiref.wsgi import WsgiToAsgi
+
+from app import app
+
+asgi_app = WsgiToAsgi(app)
@@ -0,0 +1,86 @@
+"""
+Benchmark: dashboard sync x async contra um PostgREST falso com latência
+
+Sobe um servidor HTTP local que imita o PostgREST (responde [] após LATENCIA
+segundos) e mede quantos dashboards por segundo um worker consegue montar:
+
+- sync: get_dashboard_data() — as consultas dos cards uma após a outra
+- async: run_async(get_dashboard_data_async()) — todas em paralelo
+
+O ganho do async aparece enquanto o worker está esperando rede. Quando a CPU
+satura (o servidor falso roda na mesma máquina), os dois modos convergem;
+rode em uma máquina com mais de um núcleo para números representativos.
+
+Uso:
+    python benchmarks/async_vs_sync.py [--latencia 0.05] [--threads 8] [--duracao 5]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_postgrest import start_fake_postgrest  # noqa: E402
+
+
+def _medir(nome, func, threads, duracao):
+    """Executa func em várias threads durante 'duracao' segundos"""
+    total = [0]
+    lock = threading.Lock()
+    fim = time.perf_counter() + duracao
+
+    def worker():
+        while time.perf_counter() < fim:
+            func()
+            with lock:
+                total[0] += 1
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    inicio = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - inicio
+    latencia_media = elapsed * threads / total[0] * 1000 if total[0] else 0
+    print(f"{nome:>6}: {total[0]:>5} dashboards em {elapsed:.1f}s -> {total[0] / elapsed:.1f}/s "
+          f"(latência média {latencia_media:.0f}ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latencia', type=float, default=0.05, help='Latência de cada consulta (s)')
+    parser.add_argument('--threads', type=int, default=8, help='Threads do worker (requisições simultâneas)')
+    parser.add_argument('--duracao', type=float, default=5.0, help='Duração de cada rodada (s)')
+    args = parser.parse_args()
+
+    # O app lê a configuração no import, então o ambiente vem antes
+    os.environ['SUPABASE_URL'] = start_fake_postgrest(args.latencia)
+    os.environ.setdefault('SUPABASE_KEY', 'benchmark')
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+    os.environ['SUPABASE_HTTP2'] = 'false'
+
+    import app  # noqa: F401  (inicializa o cliente Supabase)
+    from src.core.async_database import run_async
+    from src.features.dashboard.dashboard_service import (
+        clear_dashboard_cache, get_dashboard_data, get_dashboard_data_async
+    )
+
+    # DECISÃO: Limpar o cache a cada dashboard para medir só as consultas
+    def sync_dashboard():
+        clear_dashboard_cache()
+        get_dashboard_data()
+
+    def async_dashboard():
+        clear_dashboard_cache()
+        run_async(get_dashboard_data_async())
+
+    print(f"latência={args.latencia}s threads={args.threads} duração={args.duracao}s")
+    _medir('sync', sync_dashboard, args.threads, args.duracao)
+    _medir('async', async_dashboard, args.threads, args.duracao)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Microbenchmark: consultas ao cubo de vendas (analise_service)
+
+Monta um cubo sintético (dias × horas × formas de pagamento × produtos) e
+mede consultar_vendas em recortes típicos do painel e os totais por dia das
+janelas do dashboard (7 e 365 dias), sem acesso ao banco.
+
+Uso:
+    python benchmarks/cubo_vendas.py [--dias 365] [--produtos 2000] [--itens 2000000]
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import date, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.features.analise import analise_service  # noqa: E402
+
+
+def _cubo_sintetico(dias, produtos, itens):
+    """Cubo com 'itens' vendas de item distribuídas em 'dias' dias até hoje"""
+    rng = np.random.default_rng(42)
+    hoje = analise_service.dia_numero(date.today())
+    dia = (hoje - rng.integers(0, dias, itens)).astype(np.int32)
+    hora = rng.integers(8, 21, itens).astype(np.int8)
+    metodo = rng.integers(0, 4, itens).astype(np.int16)
+    # Poucos produtos vendem muito (distribuição de cauda longa)
+    produto = np.minimum(rng.zipf(1.3, itens) - 1, produtos - 1).astype(np.int32)
+    quantidade = rng.integers(1, 5, itens).astype(np.float64)
+    receita = quantidade * rng.uniform(2, 50, itens).round(2)
+
+    dados = analise_service._vazio()
+    dados.update(analise_service._somar_diario(dados, dia, receita, dia))
+    dia, hora, metodo, produto, medidas = analise_service._agregar(
+        dia, hora, metodo, produto, {'quantidade': quantidade, 'receita': receita}
+    )
+    vendas_dia, vendas_hora, vendas_metodo, _p, vendas = analise_service._agregar(
+        dia, hora, metodo, np.zeros(len(dia), dtype=np.int32), {'num': np.ones(len(dia), dtype=np.int64)}
+    )
+    dados.update(
+        dia=dia, hora=hora, metodo=metodo, produto=produto, **medidas,
+        vendas_dia=vendas_dia, vendas_hora=vendas_hora, vendas_metodo=vendas_metodo, vendas_num=vendas['num'],
+        produtos=np.arange(1, produtos + 1, dtype=np.int64),
+        produto_fornecedor=rng.integers(0, 50, produtos).astype(np.int64),
+        metodos=np.array(['credito', 'debito', 'dinheiro', 'pix']),
+    )
+    return dados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dias', type=int, default=365, help='Dias de vendas no cubo')
+    parser.add_argument('--produtos', type=int, default=2000, help='Produtos no catálogo')
+    parser.add_argument('--itens', type=int, default=2000000, help='Itens vendidos')
+    args = parser.parse_args()
+
+    dados = _cubo_sintetico(args.dias, args.produtos, args.itens)
+    analise_service._carregar = lambda: dados
+    print(f"{args.itens} itens -> {len(dados['dia'])} linhas no cubo ({args.dias} dias, {args.produtos} produtos)")
+
+    hoje = date.today()
+    ano = hoje - timedelta(days=args.dias - 1)
+    mes = hoje - timedelta(days=29)
+    casos = {
+        'janela 7 dias': lambda: analise_service.totais_por_dia(7),
+        'janela 365 dias': lambda: analise_service.totais_por_dia(365),
+        'total do ano': lambda: analise_service.consultar_vendas(ano),
+        'ano por dia': lambda: analise_service.consultar_vendas(ano, por=['dia']),
+        'mês dia_semana×hora': lambda: analise_service.consultar_vendas(mes, por=['dia_semana', 'hora']),
+        'mês por metodo (pix)': lambda: analise_service.consultar_vendas(mes, por=['metodo'], metodo=['pix']),
+        'ano por fornecedor': lambda: analise_service.consultar_vendas(ano, por=['fornecedor']),
+        'mês por produto': lambda: analise_service.consultar_vendas(mes, por=['produto']),
+    }
+    for nome, func in casos.items():
+        resultado = func()
+        assert 'receita' in resultado or resultado['success'], nome
+        tempo = min(timeit.repeat(func, number=5, repeat=3)) / 5
+        print(f"{nome:>22}: {tempo * 1000:7.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Microbenchmark: parse e formatação de datas nas listagens
+
+Compara, para uma página de listagem:
+- vendas: data_venda (timestamp ISO único por linha) -> dd/mm/aaaa hh:mm
+- produtos: validade_lote (poucas datas distintas, muito repetidas) -> dd/mm/aaaa
+- filtro: format_date do template com datas ISO
+
+Em cada caso, "legado" é a implementação anterior (fromisoformat/strptime por
+valor, com import local) e "novo" é src/common/dates.py.
+
+Uso:
+    python benchmarks/dates.py [--linhas 1000]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+from datetime import date, datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.common.dates import format_date_column  # noqa: E402
+from src.common.template_utils import format_date  # noqa: E402
+
+
+def _format_data_venda_legado(data_venda):
+    """Implementação anterior de venda_service, mantida aqui apenas para comparação"""
+    if data_venda:
+        try:
+            if isinstance(data_venda, str):
+                dt = datetime.fromisoformat(data_venda.replace('Z', '+00:00'))
+                data_venda = dt.strftime('%d/%m/%Y %H:%M')
+        except:  # noqa: E722
+            pass
+    return data_venda
+
+
+def _format_validade_legado(validade):
+    """Implementação anterior de produtos_service, mantida aqui apenas para comparação"""
+    validade = validade or ''
+    if validade:
+        try:
+            from datetime import datetime
+            if isinstance(validade, str):
+                validade = datetime.strptime(validade, '%Y-%m-%d').strftime('%d/%m/%Y')
+        except:  # noqa: E722
+            pass
+    return validade
+
+
+def _format_date_legado(value, format_str='%d/%m/%Y'):
+    """Implementação anterior do filtro format_date"""
+    try:
+        if value is None:
+            return ''
+        if isinstance(value, str):
+            for fmt in ['%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%d/%m/%Y', '%d-%m-%Y']:
+                try:
+                    return datetime.strptime(value, fmt).strftime(format_str)
+                except ValueError:
+                    continue
+            return value
+        if isinstance(value, datetime):
+            return value.strftime(format_str)
+        return str(value)
+    except Exception:
+        return ''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=1000, help='Linhas por listagem')
+    args = parser.parse_args()
+
+    random.seed(42)
+    inicio = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    vendas = [
+        (inicio + timedelta(seconds=random.randint(0, 90 * 86400), microseconds=random.randint(0, 999999))).isoformat()
+        for _ in range(args.linhas)
+    ]
+    validades = [
+        (date(2024, 1, 1) + timedelta(days=random.randint(0, 60))).isoformat()
+        for _ in range(args.linhas)
+    ]
+    validades[::40] = [None] * len(validades[::40])
+
+    # Datas puras não mudam; timestamps mudam só pelo fuso (UTC -> loja)
+    assert format_date_column(validades) == [_format_validade_legado(v) for v in validades]
+    assert [format_date(v) for v in validades[1:]] == [_format_date_legado(v) for v in validades[1:]]
+
+    casos = [
+        ('vendas', 'legado', lambda: [_format_data_venda_legado(v) for v in vendas]),
+        ('vendas', 'novo', lambda: format_date_column(vendas, with_time=True)),
+        ('produtos', 'legado', lambda: [_format_validade_legado(v) for v in validades]),
+        ('produtos', 'novo', lambda: format_date_column(validades)),
+        ('filtro', 'legado', lambda: [_format_date_legado(v) for v in validades]),
+        ('filtro', 'novo', lambda: [format_date(v) for v in validades]),
+    ]
+    print(f"{args.linhas} linhas por listagem")
+    base = {}
+    for listagem, nome, func in casos:
+        tempo = min(timeit.repeat(func, number=20, repeat=5)) / 20
+        base.setdefault(listagem, tempo)
+        print(f"{listagem:>9} {nome:>6}: {tempo * 1000:7.3f} ms ({base[listagem] / tempo:4.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+"""
+Teste de concorrência: muitos caixas vendendo o mesmo produto ao mesmo tempo
+
+Sobe um PostgREST em memória (tabelas de verdade, filtros eq/in/is e escritas
+atômicas por requisição, como uma linha no Postgres) e dispara salvar_venda
+de várias threads contra um único produto. No fim confere, exatamente:
+
+- estoque final = estoque inicial - (vendas registradas x quantidade)
+- vendas registradas = min(vendas tentadas, estoque inicial // quantidade)
+- uma linha em vendas e uma em itens_vendas por venda registrada
+
+Com a baixa antiga (lê, subtrai em Python, sobrescreve) vendas simultâneas
+perdiam atualizações e o estoque final ficava acima do esperado.
+
+Uso:
+    python benchmarks/estoque_concorrente.py [--threads 16] [--estoque 200] [--vendas 300] [--quantidade 1]
+
+Sai com código 1 se alguma conferência falhar.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _igual(valor, esperado: str) -> bool:
+    """Compara como o Postgres compararia um número ou texto vindo da URL"""
+    if valor is None:
+        return False
+    try:
+        return float(valor) == float(esperado)
+    except (TypeError, ValueError):
+        return str(valor) == esperado
+
+
+def _condicao(coluna: str, expressao: str):
+    operador, _, valor = expressao.partition('.')
+    if operador == 'eq':
+        return lambda linha: _igual(linha.get(coluna), valor)
+    if operador == 'in':
+        valores = valor.strip('()').split(',')
+        return lambda linha: any(_igual(linha.get(coluna), v) for v in valores)
+    if operador == 'is':
+        return lambda linha: linha.get(coluna) is None
+    if operador in ('gt', 'gte', 'lt', 'lte'):
+        comparar = {
+            'gt': float.__gt__, 'gte': float.__ge__, 'lt': float.__lt__, 'lte': float.__le__,
+        }[operador]
+        return lambda linha: linha.get(coluna) is not None and comparar(float(linha[coluna]), float(valor))
+    raise ValueError(f"operador não suportado: {operador}")
+
+
+class BancoEmMemoria:
+    """Tabelas do PostgREST em memória; cada requisição roda sob um lock (atômica)"""
+
+    def __init__(self, tabelas):
+        self.tabelas = tabelas
+        self.lock = threading.Lock()
+        self.proximo_id = 1000
+
+    def executar(self, metodo, caminho, corpo):
+        partes = urlsplit(caminho)
+        tabela = partes.path.rsplit('/', 1)[-1]
+        condicoes = [
+            _condicao(coluna, expressao) for coluna, expressao in parse_qsl(partes.query)
+            if coluna not in ('select', 'order', 'limit', 'offset', 'on_conflict', 'columns')
+        ]
+        with self.lock:
+            linhas = self.tabelas.setdefault(tabela, [])
+            filtradas = [linha for linha in linhas if all(c(linha) for c in condicoes)]
+            if metodo == 'GET':
+                return 200, [dict(linha) for linha in filtradas]
+            if metodo == 'POST':
+                novas = corpo if isinstance(corpo, list) else [corpo]
+                criadas = []
+                for linha in novas:
+                    self.proximo_id += 1
+                    criada = dict(linha, id=self.proximo_id)
+                    linhas.append(criada)
+                    criadas.append(dict(criada))
+                return 201, criadas
+            if metodo == 'PATCH':
+                for linha in filtradas:
+                    linha.update(corpo)
+                return 200, [dict(linha) for linha in filtradas]
+            if metodo == 'DELETE':
+                for linha in filtradas:
+                    linhas.remove(linha)
+                return 200, filtradas
+        return 405, {'message': 'método não suportado'}
+
+
+def iniciar_servidor(banco: BancoEmMemoria) -> str:
+    """Sobe o PostgREST em memória numa porta livre; retorna a URL base"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _responder(self):
+            tamanho = int(self.headers.get('Content-Length') or 0)
+            corpo = json.loads(self.rfile.read(tamanho)) if tamanho else None
+            status, dados = banco.executar(self.command, self.path, corpo)
+            resposta = json.dumps(dados).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Range', f'0-{max(len(dados) - 1, 0)}/*')
+            self.send_header('Content-Length', str(len(resposta)))
+            self.end_headers()
+            self.wfile.write(resposta)
+
+        do_GET = do_POST = do_PATCH = do_DELETE = _responder
+
+        def log_message(self, *args):
+            pass
+
+    class Servidor(ThreadingHTTPServer):
+        daemon_threads = True
+        # Fila de conexões maior que o padrão (5): dezenas de caixas conectam juntos
+        request_queue_size = 256
+
+    servidor = Servidor(('127.0.0.1', 0), Handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{servidor.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=16, help='Caixas vendendo ao mesmo tempo')
+    parser.add_argument('--estoque', type=float, default=200, help='Estoque inicial do produto')
+    parser.add_argument('--vendas', type=int, default=300, help='Vendas tentadas no total')
+    parser.add_argument('--quantidade', type=float, default=1, help='Quantidade por venda')
+    args = parser.parse_args()
+
+    banco = BancoEmMemoria({'produtos': [{
+        'id': 1, 'nome': 'Produto disputado', 'quantidade': args.estoque,
+        'preco_venda': 10.0, 'preco_custo': 6.0, 'uni_medida': 'un',
+    }]})
+
+    # O app lê a configuração no import, então o ambiente vem antes
+    os.environ['SUPABASE_URL'] = iniciar_servidor(banco)
+    os.environ.setdefault('SUPABASE_KEY', 'benchmark')
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+    os.environ['SUPABASE_HTTP2'] = 'false'
+    os.environ['IDEMPOTENCY_DIR'] = tempfile.mkdtemp(prefix='mercadim_stress_')
+    for variavel, nome in (('ESTOQUE_VALOR_ARQUIVO', 'valor_estoque.json'),
+                           ('ESTOQUE_VENCIMENTO_ARQUIVO', 'vencimentos.json'),
+                           ('ESTOQUE_BAIXO_ARQUIVO', 'estoque_baixo.json')):
+        os.environ[variavel] = os.path.join(os.environ['IDEMPOTENCY_DIR'], nome)
+
+    import app  # noqa: F401  (inicializa o cliente Supabase)
+    from src.features.venda.venda_service import salvar_venda
+
+    restantes = [args.vendas]
+    contagem = {'registradas': 0, 'sem_estoque': 0, 'erros': 0}
+    erros = []
+    lock = threading.Lock()
+
+    def caixa():
+        while True:
+            with lock:
+                if restantes[0] == 0:
+                    return
+                restantes[0] -= 1
+            carrinho = [{'id': 1, 'nome': 'Produto disputado', 'preco_venda': 10.0,
+                         'quantidade': args.quantidade, 'uni_medida': 'un'}]
+            resultado = salvar_venda(carrinho, 'dinheiro', 'stress')
+            with lock:
+                if resultado.get('success'):
+                    contagem['registradas'] += 1
+                elif 'Estoque insuficiente' in resultado.get('error', ''):
+                    contagem['sem_estoque'] += 1
+                else:
+                    contagem['erros'] += 1
+                    erros.append(resultado.get('error'))
+
+    pool = [threading.Thread(target=caixa) for _ in range(args.threads)]
+    inicio = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - inicio
+
+    estoque_final = banco.tabelas['produtos'][0]['quantidade']
+    registradas = contagem['registradas']
+    esperadas = min(args.vendas, int(args.estoque // args.quantidade))
+    conferencias = [
+        ("estoque final", round(estoque_final, 6), round(args.estoque - registradas * args.quantidade, 6)),
+        ("vendas registradas", registradas, esperadas),
+        ("linhas em vendas", len(banco.tabelas.get('vendas', [])), registradas),
+        ("linhas em itens_vendas", len(banco.tabelas.get('itens_vendas', [])), registradas),
+        ("erros", contagem['erros'], 0),
+    ]
+
+    print(f"threads={args.threads} estoque={args.estoque} vendas={args.vendas} quantidade={args.quantidade}")
+    print(f"{registradas} registradas, {contagem['sem_estoque']} sem estoque, "
+          f"{contagem['erros']} erros em {elapsed:.1f}s")
+    for erro in erros[:5]:
+        print(f"  erro: {erro}")
+    falhou = False
+    for nome, obtido, esperado in conferencias:
+        ok = obtido == esperado
+        falhou |= not ok
+        print(f"{'OK ' if ok else 'ERRO'} {nome}: {obtido} (esperado {esperado})")
+    sys.exit(1 if falhou else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+PostgREST falso para benchmarks
+
+Responde a qualquer consulta com uma lista vazia após uma latência fixa,
+imitando o tempo de ida e volta até o Supabase. A rota de auth
+(/auth/v1/user) devolve um usuário válido para que views protegidas por
+@login_required possam ser medidas.
+
+DECISÃO: Servidor asyncio mínimo em vez de http.server
+Com uma thread por conexão o próprio servidor vira o gargalo
+quando o cliente abre dezenas de conexões de uma vez
+DECISÃO: Servidor em outro processo para não disputar o GIL com o código medido
+"""
+import asyncio
+import json
+import multiprocessing
+
+FAKE_USER = {
+    'id': '00000000-0000-0000-0000-000000000000',
+    'aud': 'authenticated',
+    'role': 'authenticated',
+    'email': 'benchmark@mercadim.local',
+    'app_metadata': {},
+    'user_metadata': {'is_admin': True, 'display_name': 'Benchmark'},
+    'created_at': '2024-01-01T00:00:00Z',
+}
+
+
+def _http_response(body: bytes) -> bytes:
+    return (
+        b'HTTP/1.1 200 OK\r\n'
+        b'Content-Type: application/json\r\n'
+        b'Content-Range: */0\r\n'
+        b'Content-Length: ' + str(len(body)).encode() + b'\r\n\r\n' + body
+    )
+
+
+def _serve(latencia, porta):
+    """Loop do servidor (roda no processo filho)"""
+    resposta_vazia = _http_response(b'[]')
+    resposta_user = _http_response(json.dumps(FAKE_USER).encode())
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                # Lê o cabeçalho da requisição (GETs do PostgREST não têm corpo)
+                cabecalho = await reader.readuntil(b'\r\n\r\n')
+                await asyncio.sleep(latencia)
+                caminho = cabecalho.split(b' ', 2)[1]
+                writer.write(resposta_user if caminho.startswith(b'/auth/v1/user') else resposta_vazia)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def main():
+        server = await asyncio.start_server(handle, '127.0.0.1', 0, backlog=1024)
+        porta.put(server.sockets[0].getsockname()[1])
+        await server.serve_forever()
+
+    asyncio.run(main())
+
+
+def start_fake_postgrest(latencia: float) -> str:
+    """
+    Sobe o PostgREST falso em uma porta livre
+
+    Args:
+        latencia: Tempo de resposta de cada requisição em segundos
+
+    Returns:
+        URL base para usar como SUPABASE_URL
+    """
+    porta = multiprocessing.Queue()
+    multiprocessing.Process(target=_serve, args=(latencia, porta), daemon=True).start()
+    return f"http://127.0.0.1:{porta.get()}"
@@ -0,0 +1,68 @@
+"""
+Microbenchmark: formatação de números no padrão brasileiro
+
+Compara, para uma coluna de preços:
+- legado: laço de concatenação caractere a caractere (antigo format_currency)
+- escalar: format_currency de src/common/formatting.py, célula a célula
+- lote: format_currency_column (um único translate para a coluna)
+
+Uso:
+    python benchmarks/formatting.py [--linhas 1000]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.common.formatting import format_currency, format_currency_column  # noqa: E402
+
+
+def _format_currency_legado(value, symbol='R$'):
+    """Implementação anterior, mantida aqui apenas para comparação"""
+    try:
+        if value is None:
+            return f"{symbol} 0,00"
+        valor_str = f"{float(value):.2f}".replace('.', ',')
+        partes = valor_str.split(',')
+        parte_inteira_formatada = ''
+        for i, digito in enumerate(reversed(partes[0])):
+            if i > 0 and i % 3 == 0:
+                parte_inteira_formatada = '.' + parte_inteira_formatada
+            parte_inteira_formatada = digito + parte_inteira_formatada
+        return f"{symbol} {parte_inteira_formatada},{partes[1]}"
+    except (ValueError, TypeError, IndexError):
+        return f"{symbol} 0,00"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=1000, help='Tamanho da coluna')
+    args = parser.parse_args()
+
+    random.seed(42)
+    coluna = [round(random.uniform(0, 100000), 2) for _ in range(args.linhas)]
+    coluna[::50] = [None] * len(coluna[::50])
+
+    assert format_currency_column(coluna) == [format_currency(v) for v in coluna]
+    assert all(
+        _format_currency_legado(v) == format_currency(v) for v in coluna
+    ), "Novo formatador diverge do legado"
+
+    casos = {
+        'legado': lambda: [_format_currency_legado(v) for v in coluna],
+        'escalar': lambda: [format_currency(v) for v in coluna],
+        'lote': lambda: format_currency_column(coluna),
+    }
+    print(f"{args.linhas} valores por coluna")
+    base = None
+    for nome, func in casos.items():
+        tempo = min(timeit.repeat(func, number=20, repeat=5)) / 20
+        base = base or tempo
+        print(f"{nome:>8}: {tempo * 1000:7.3f} ms/coluna ({base / tempo:4.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
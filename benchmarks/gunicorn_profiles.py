@@ -0,0 +1,140 @@
+"""
+Benchmark: perfis do gunicorn contra um PostgREST falso com latência
+
+Sobe o app com cada perfil de gunicorn e mede requisições por segundo em uma
+view protegida (validação do token + consulta ao Supabase):
+
+- baseline: o antigo 'gunicorn app:app' (1 worker sync, sem preload)
+- gthread:  gunicorn.conf.py em produção (workers x threads, preload)
+- gevent:   gunicorn.conf.py com GUNICORN_WORKER_CLASS=gevent (sem preload)
+
+O app roda com FLASK_ENV=production (sessão em cookie), então o benchmark
+assina um cookie de sessão com o mesmo SECRET_KEY.
+
+Uso:
+    python benchmarks/gunicorn_profiles.py [--path /venda/list] [--clientes 32] [--duracao 10]
+"""
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from fake_postgrest import FAKE_USER, start_fake_postgrest  # noqa: E402
+
+SECRET_KEY = 'benchmark'
+
+PERFIS = {
+    'baseline': (['-c', os.devnull, '--workers', '1'], {}),
+    'gthread': (['-c', 'gunicorn.conf.py'], {'GUNICORN_WORKER_CLASS': 'gthread'}),
+    'gevent': (['-c', 'gunicorn.conf.py'], {'GUNICORN_WORKER_CLASS': 'gevent'}),
+}
+
+
+def _porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _cookie_sessao():
+    """Assina um cookie de sessão do Flask com um usuário logado"""
+    from flask import Flask
+    from flask.sessions import SecureCookieSessionInterface
+
+    app = Flask(__name__)
+    app.secret_key = SECRET_KEY
+    serializer = SecureCookieSessionInterface().get_signing_serializer(app)
+    return 'session=' + serializer.dumps({'user': FAKE_USER, 'access_token': 'benchmark'})
+
+
+def _aguardar(porta, timeout=30):
+    fim = time.time() + timeout
+    while time.time() < fim:
+        try:
+            socket.create_connection(('127.0.0.1', porta), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("gunicorn não subiu")
+
+
+def _carga(porta, path, cookie, clientes, duracao):
+    """Dispara requisições keep-alive de vários clientes durante 'duracao' segundos"""
+    contagem = {'ok': 0, 'erro': 0}
+    lock = threading.Lock()
+    fim = time.perf_counter() + duracao
+
+    def cliente():
+        conn = http.client.HTTPConnection('127.0.0.1', porta, timeout=60)
+        while time.perf_counter() < fim:
+            try:
+                conn.request('GET', path, headers={'Cookie': cookie})
+                resposta = conn.getresponse()
+                resposta.read()
+                chave = 'ok' if resposta.status == 200 else 'erro'
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', porta, timeout=60)
+                chave = 'erro'
+            with lock:
+                contagem[chave] += 1
+        conn.close()
+
+    pool = [threading.Thread(target=cliente) for _ in range(clientes)]
+    inicio = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return contagem, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--path', default='/venda/list', help='View a ser medida')
+    parser.add_argument('--latencia', type=float, default=0.05, help='Latência de cada consulta (s)')
+    parser.add_argument('--clientes', type=int, default=32, help='Clientes simultâneos')
+    parser.add_argument('--duracao', type=float, default=10.0, help='Duração de cada rodada (s)')
+    parser.add_argument('--perfis', default=','.join(PERFIS), help='Perfis a medir, separados por vírgula')
+    args = parser.parse_args()
+
+    supabase_url = start_fake_postgrest(args.latencia)
+    cookie = _cookie_sessao()
+    print(f"path={args.path} latência={args.latencia}s clientes={args.clientes} duração={args.duracao}s")
+
+    for nome in args.perfis.split(','):
+        opcoes, env_extra = PERFIS[nome]
+        porta = _porta_livre()
+        env = dict(
+            os.environ,
+            FLASK_ENV='production',
+            SECRET_KEY=SECRET_KEY,
+            SUPABASE_URL=supabase_url,
+            SUPABASE_KEY='benchmark',
+            SUPABASE_HTTP2='false',
+            PORT=str(porta),
+            **env_extra
+        )
+        processo = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', *opcoes, '--bind', f'127.0.0.1:{porta}',
+             '--access-logfile', os.devnull, 'app:app'],
+            cwd=RAIZ, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            _aguardar(porta)
+            contagem, elapsed = _carga(porta, args.path, cookie, args.clientes, args.duracao)
+            print(f"{nome:>9}: {contagem['ok'] / elapsed:7.1f} req/s ({contagem['ok']} ok, {contagem['erro']} erros)")
+        finally:
+            processo.terminate()
+            processo.wait()
+
+
+if __name__ == '__main__':
+    main()
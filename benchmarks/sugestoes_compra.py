@@ -0,0 +1,80 @@
+"""
+Microbenchmark: sugestões de compra para o catálogo inteiro
+
+Compara, para N produtos com 28 dias de vendas:
+- laço: as mesmas fórmulas produto a produto em Python puro
+- vetorizado: calcular_sugestoes de src/features/compras/compras_service.py
+
+Uso:
+    python benchmarks/sugestoes_compra.py [--produtos 50000] [--dias 28]
+"""
+import argparse
+import math
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.features.compras.compras_service import calcular_sugestoes  # noqa: E402
+
+
+def _sugestoes_laco(vendas, quantidade, custo, fornecedor, frete, prazo,
+                    nivel_servico=1.65, custo_manutencao=0.25, dias_cobertura=7):
+    """Mesmo cálculo, um produto por vez (referência para comparação)"""
+    demandas = [sum(linha) / len(linha) for linha in vendas]
+    consumo_fornecedor = [0.0] * len(frete)
+    for i, d in enumerate(demandas):
+        consumo_fornecedor[fornecedor[i]] += d * custo[i]
+    sugeridos = []
+    for i, linha in enumerate(vendas):
+        d = demandas[i]
+        desvio = math.sqrt(sum((v - d) ** 2 for v in linha) / len(linha))
+        p = prazo[fornecedor[i]]
+        ponto_pedido = d * p + nivel_servico * desvio * math.sqrt(p)
+        total = consumo_fornecedor[fornecedor[i]]
+        parte_frete = frete[fornecedor[i]] * (d * custo[i] / total) if total > 0 else 0.0
+        manutencao = custo[i] * custo_manutencao
+        lote = max(math.sqrt(2 * d * 365 * parte_frete / manutencao) if manutencao > 0 else 0.0, d * dias_cobertura)
+        if d > 0 and quantidade[i] <= ponto_pedido:
+            sugeridos.append(max(math.ceil(ponto_pedido + lote - quantidade[i] - 1e-9), 0))
+        else:
+            sugeridos.append(0)
+    return sugeridos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--produtos', type=int, default=50000, help='Produtos no catálogo')
+    parser.add_argument('--dias', type=int, default=28, help='Dias de vendas')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    vendas = rng.poisson(rng.gamma(0.5, 4, size=(args.produtos, 1)), size=(args.produtos, args.dias)).astype(float)
+    quantidade = rng.integers(0, 200, size=args.produtos).astype(float)
+    custo = rng.uniform(1, 100, size=args.produtos).round(2)
+    fornecedor = rng.integers(0, 200, size=args.produtos)
+    frete = rng.uniform(0, 300, size=200).round(2)
+    prazo = rng.integers(1, 15, size=200).astype(float)
+    entrada = (vendas, quantidade, custo, fornecedor, frete, prazo)
+
+    listas = tuple(x.tolist() for x in entrada)
+    assert _sugestoes_laco(*listas) == calcular_sugestoes(*entrada)['sugerido'].tolist(), \
+        "Cálculo vetorizado diverge do laço"
+
+    casos = {
+        'laço': lambda: _sugestoes_laco(*listas),
+        'vetorizado': lambda: calcular_sugestoes(*entrada),
+    }
+    print(f"{args.produtos} produtos × {args.dias} dias")
+    base = None
+    for nome, func in casos.items():
+        tempo = min(timeit.repeat(func, number=3, repeat=3)) / 3
+        base = base or tempo
+        print(f"{nome:>10}: {tempo * 1000:8.2f} ms ({base / tempo:5.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
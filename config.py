@@ -7,6 +7,7 @@ DECISÃO: Ajustar configurações de segurança baseado no ambiente
 """
 from datetime import timedelta
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -21,6 +22,26 @@ Config = {
     "SECRET_KEY": os.environ.get('SECRET_KEY'),
     "SUPABASE_URL": os.environ.get('SUPABASE_URL'),
     "SUPABASE_KEY": os.environ.get('SUPABASE_KEY'),
+    # DECISÃO: Pool de conexões HTTP do Supabase configurável por worker
+    # Com gunicorn + threads, max_connections deve ser >= número de threads
+    "SUPABASE_POOL_MAX_CONNECTIONS": int(os.environ.get('SUPABASE_POOL_MAX_CONNECTIONS', 20)),
+    "SUPABASE_POOL_MAX_KEEPALIVE": int(os.environ.get('SUPABASE_POOL_MAX_KEEPALIVE', 10)),
+    "SUPABASE_KEEPALIVE_EXPIRY": float(os.environ.get('SUPABASE_KEEPALIVE_EXPIRY', 30)),
+    "SUPABASE_HTTP2": os.environ.get('SUPABASE_HTTP2', 'true').lower() == 'true',
+    "SUPABASE_CONNECT_TIMEOUT": float(os.environ.get('SUPABASE_CONNECT_TIMEOUT', 5)),
+    "SUPABASE_READ_TIMEOUT": float(os.environ.get('SUPABASE_READ_TIMEOUT', 30)),
+    "SUPABASE_POOL_TIMEOUT": float(os.environ.get('SUPABASE_POOL_TIMEOUT', 10)),
+    # DECISÃO: Services async (dashboard, venda, produtos) opcionais
+    # O cliente async tem pool próprio, maior, pois uma só view dispara várias consultas
+    "ASYNC_SERVICES": os.environ.get('ASYNC_SERVICES', 'false').lower() == 'true',
+    "SUPABASE_ASYNC_MAX_CONNECTIONS": int(os.environ.get('SUPABASE_ASYNC_MAX_CONNECTIONS', 100)),
+    # DECISÃO: Retry curto com jitter para leituras e circuit breaker para falhar rápido
+    # Tempo máximo de retry por leitura fica em torno de 1-2s, sem prender threads
+    "RESILIENCE_RETRY_ATTEMPTS": int(os.environ.get('RESILIENCE_RETRY_ATTEMPTS', 3)),
+    "RESILIENCE_RETRY_BASE_DELAY": float(os.environ.get('RESILIENCE_RETRY_BASE_DELAY', 0.1)),
+    "RESILIENCE_RETRY_MAX_DELAY": float(os.environ.get('RESILIENCE_RETRY_MAX_DELAY', 1.0)),
+    "RESILIENCE_FAILURE_THRESHOLD": int(os.environ.get('RESILIENCE_FAILURE_THRESHOLD', 5)),
+    "RESILIENCE_RESET_TIMEOUT": float(os.environ.get('RESILIENCE_RESET_TIMEOUT', 30)),
     # DECISÃO: Usar 'filesystem' em desenvolvimento e 'null' (cookies) em produção
     # Railway e outros serviços de cloud não têm sistema de arquivos persistente
     # Sessões em cookies são adequadas para produção e funcionam com múltiplos workers
@@ -35,4 +56,68 @@ Config = {
     "SESSION_COOKIE_SAMESITE": 'Lax',
     "MAX_LOGIN_ATTEMPTS": 5,
     "LOGIN_ATTEMPT_TIMEOUT": 300,
+    # DECISÃO: Templates sem auto-reload em produção (não checa o disco a cada render)
+    # Bytecode compilado fica em disco, compartilhado entre workers
+    "TEMPLATES_AUTO_RELOAD": not IS_PRODUCTION,
+    "JINJA_BYTECODE_CACHE_DIR": os.environ.get('JINJA_BYTECODE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'mercadim_jinja_cache')),
+    "TEMPLATE_WARMUP": os.environ.get('TEMPLATE_WARMUP', str(IS_PRODUCTION)).lower() == 'true',
+    # DECISÃO: Estáticos com hash no nome, cache immutable e variantes gzip/brotli
+    # Desligado em desenvolvimento (arquivos mudam sem reiniciar o servidor)
+    "STATIC_FINGERPRINT": os.environ.get('STATIC_FINGERPRINT', str(IS_PRODUCTION)).lower() == 'true',
+    "STATIC_BUILD_DIR": os.environ.get('STATIC_BUILD_DIR', os.path.join(tempfile.gettempdir(), 'mercadim_static')),
+    # DECISÃO: Compressão gzip/brotli de respostas de texto (HTML, JSON, CSS...)
+    "COMPRESSION_ENABLED": os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true',
+    "COMPRESSION_MIN_SIZE": int(os.environ.get('COMPRESSION_MIN_SIZE', 500)),
+    "COMPRESSION_GZIP_LEVEL": int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6)),
+    "COMPRESSION_BROTLI": os.environ.get('COMPRESSION_BROTLI', 'true').lower() == 'true',
+    "COMPRESSION_BROTLI_QUALITY": int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4)),
+    # DECISÃO: ETag/304 nas listas e no detalhe da venda, sem consultar o banco
+    # Versões de dados em arquivos compartilhados pelos workers da máquina
+    "CONDITIONAL_GET_ENABLED": os.environ.get('CONDITIONAL_GET_ENABLED', 'true').lower() == 'true',
+    "CONDITIONAL_GET_MAX_STALE": int(os.environ.get('CONDITIONAL_GET_MAX_STALE', 300)),
+    "DATA_VERSION_DIR": os.environ.get('DATA_VERSION_DIR', os.path.join(tempfile.gettempdir(), 'mercadim_data_versions')),
+    # DECISÃO: PDV offline - sem conexão, vendas ficam numa fila no navegador e sincronizam em lote
+    # Cada venda leva uma chave de idempotência (reenvio não duplica a venda)
+    # Desligado por padrão: a fila registra vendas mesmo sem estoque (conflito a conferir)
+    "VENDA_OFFLINE_ENABLED": os.environ.get('VENDA_OFFLINE_ENABLED', 'false').lower() == 'true',
+    # Máximo de vendas por requisição em /venda/sync e /venda/lote
+    "VENDA_SYNC_MAX_BATCH": int(os.environ.get('VENDA_SYNC_MAX_BATCH', 50)),
+    "IDEMPOTENCY_DIR": os.environ.get('IDEMPOTENCY_DIR', os.path.join(tempfile.gettempdir(), 'mercadim_idempotency')),
+    "IDEMPOTENCY_LOCK_TIMEOUT": int(os.environ.get('IDEMPOTENCY_LOCK_TIMEOUT', 120)),
+    "IDEMPOTENCY_TTL_DAYS": int(os.environ.get('IDEMPOTENCY_TTL_DAYS', 7)),
+    # DECISÃO: Valor do estoque mantido por variações (card do dashboard sem ler todos os produtos)
+    # Arquivo compartilhado pelos workers; soma completa a cada ESTOQUE_VALOR_RECONCILIAR segundos
+    "ESTOQUE_VALOR_INCREMENTAL": os.environ.get('ESTOQUE_VALOR_INCREMENTAL', 'true').lower() == 'true',
+    "ESTOQUE_VALOR_ARQUIVO": os.environ.get('ESTOQUE_VALOR_ARQUIVO', os.path.join(tempfile.gettempdir(), 'mercadim_valor_estoque.json')),
+    "ESTOQUE_VALOR_RECONCILIAR": int(os.environ.get('ESTOQUE_VALOR_RECONCILIAR', 600)),
+    # Movimentos de estoque que falharam ao gravar, regravados na próxima gravação ou reconciliação
+    # Em produção é obrigatório e deve ficar num volume persistente (/tmp some no redeploy)
+    "ESTOQUE_MOVIMENTOS_PENDENTES_ARQUIVO": os.environ.get('ESTOQUE_MOVIMENTOS_PENDENTES_ARQUIVO') or (
+        None if IS_PRODUCTION else os.path.join(tempfile.gettempdir(), 'mercadim_movimentos_pendentes.json')
+    ),
+    # Produtos que vencem em até 30 dias: lista refeita uma vez por dia e a cada escrita em produtos
+    "ESTOQUE_VENCIMENTO_ARQUIVO": os.environ.get('ESTOQUE_VENCIMENTO_ARQUIVO', os.path.join(tempfile.gettempdir(), 'mercadim_vencimentos.json')),
+    # Estoque baixo: produtos com quantidade <= estoque_minimo (vazio = ESTOQUE_MINIMO_PADRAO)
+    "ESTOQUE_BAIXO_ARQUIVO": os.environ.get('ESTOQUE_BAIXO_ARQUIVO', os.path.join(tempfile.gettempdir(), 'mercadim_estoque_baixo.json')),
+    "ESTOQUE_MINIMO_PADRAO": float(os.environ.get('ESTOQUE_MINIMO_PADRAO', 10)),
+    # DECISÃO: Totais diários de vendas por produto em arquivo (.npz) compartilhado pelos workers
+    # Itens novos são somados no máximo a cada ANALISE_INTERVALO segundos
+    "ANALISE_DIR": os.environ.get('ANALISE_DIR', os.path.join(tempfile.gettempdir(), 'mercadim_analise')),
+    "ANALISE_INTERVALO": int(os.environ.get('ANALISE_INTERVALO', 60)),
+    # Sugestões de compra: média de COMPRAS_JANELA_DIAS dias de vendas, prazo padrão para
+    # fornecedores sem prazo_entrega, fator z do estoque de segurança (1.65 ≈ 95%),
+    # custo anual de manter estoque (fração do custo) e cobertura mínima de cada pedido (dias)
+    "COMPRAS_JANELA_DIAS": int(os.environ.get('COMPRAS_JANELA_DIAS', 28)),
+    "COMPRAS_PRAZO_PADRAO": int(os.environ.get('COMPRAS_PRAZO_PADRAO', 7)),
+    "COMPRAS_NIVEL_SERVICO": float(os.environ.get('COMPRAS_NIVEL_SERVICO', 1.65)),
+    "COMPRAS_CUSTO_MANUTENCAO": float(os.environ.get('COMPRAS_CUSTO_MANUTENCAO', 0.25)),
+    "COMPRAS_DIAS_COBERTURA": float(os.environ.get('COMPRAS_DIAS_COBERTURA', 7)),
+    # DECISÃO: Profiler desligado por padrão (nenhum hook é registrado)
+    # Quando ligado, admins usam '?_profile=1' ou header 'X-Profile: 1'
+    # PROFILER_SAMPLE_RATE=N perfila 1 a cada N requisições (0 = desativado)
+    "PROFILER_ENABLED": os.environ.get('PROFILER_ENABLED', 'false').lower() == 'true',
+    "PROFILER_SAMPLE_RATE": int(os.environ.get('PROFILER_SAMPLE_RATE', 0)),
+    "PROFILER_INTERVAL": float(os.environ.get('PROFILER_INTERVAL', 0.005)),
+    "PROFILER_DIR": os.environ.get('PROFILER_DIR', os.path.join(tempfile.gettempdir(), 'mercadim_profiles')),
+    "PROFILER_MAX_FILES": int(os.environ.get('PROFILER_MAX_FILES', 200)),
 }
@@ -0,0 +1,96 @@
+"""
+Configuração do Gunicorn
+
+Carregada automaticamente pelo gunicorn (arquivo gunicorn.conf.py na raiz)
+e referenciada explicitamente no Procfile.
+
+DECISÃO: Perfil escolhido pelo ambiente (FLASK_ENV), como em config.py
+- production: vários workers, preload_app, reciclagem de workers com jitter
+- development: um worker com reload automático (reload e preload não combinam)
+
+DECISÃO: Worker 'gthread' por padrão
+As views passam a maior parte do tempo esperando o Supabase; threads deixam
+um worker atender várias requisições enquanto outras esperam a rede.
+Threads por worker acompanham as CPUs (2 × CPUs): numa máquina pequena,
+threads demais só disputam o GIL na renderização; o mínimo de 4 mantém a
+espera de rede coberta e o teto de 16 limita o pool HTTP por worker.
+'gevent' é suportado via GUNICORN_WORKER_CLASS=gevent (sem preload, ver abaixo).
+
+Variáveis de ambiente:
+    PORT                    Porta HTTP (padrão: 5000)
+    WEB_CONCURRENCY         Número de workers (padrão: CPUs + 1 em produção)
+    GUNICORN_WORKER_CLASS   gthread | gevent | sync (padrão: gthread)
+    GUNICORN_THREADS        Threads por worker gthread (padrão: 2 × CPUs, entre 4 e 16)
+    GUNICORN_WORKER_CONNECTIONS  Conexões simultâneas por worker gevent (padrão: 200)
+"""
+import multiprocessing
+import os
+
+from dotenv import load_dotenv
+
+# Carrega o .env antes de derivar valores padrão dele
+load_dotenv()
+
+IS_PRODUCTION = os.environ.get('FLASK_ENV', 'development').lower() == 'production'
+_cpus = multiprocessing.cpu_count()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.environ.get('WEB_CONCURRENCY', _cpus + 1 if IS_PRODUCTION else 1))
+threads = int(os.environ.get('GUNICORN_THREADS', max(4, min(16, _cpus * 2))))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 200))
+
+if worker_class == 'gevent':
+    # DECISÃO: Sob gevent o app é carregado no worker, depois do monkey-patching
+    # Com preload o httpx/httpcore (sockets, locks, ssl) seria importado no master
+    # sem patch; patchear o próprio master trava o tratamento de sinais do arbiter.
+    # Obs.: o httpcore importa o trio se ele estiver instalado, e o trio não
+    # importa com 'select' patchado pelo gevent. Não instale trio junto com gevent.
+
+    # DECISÃO: Services async exigem uma thread real com event loop asyncio
+    # Sob gevent essa "thread" é um greenlet e bloquearia o hub
+    if os.environ.get('ASYNC_SERVICES', 'false').lower() == 'true':
+        raise RuntimeError("ASYNC_SERVICES não é compatível com GUNICORN_WORKER_CLASS=gevent")
+
+    # Cada greenlet pode fazer uma chamada ao Supabase ao mesmo tempo
+    os.environ.setdefault('SUPABASE_POOL_MAX_CONNECTIONS', str(min(worker_connections, 100)))
+else:
+    # DECISÃO: Pool HTTP do Supabase nunca menor que o número de threads
+    # Senão threads ficam esperando conexão livre (pool_timeout)
+    os.environ.setdefault('SUPABASE_POOL_MAX_CONNECTIONS', str(max(20, threads)))
+
+if IS_PRODUCTION:
+    # Importa o app uma vez no master; workers nascem por fork (copy-on-write)
+    preload_app = worker_class != 'gevent'
+    # Recicla workers para conter vazamento de memória, sem reiniciar todos juntos
+    max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+    max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+    reload = False
+else:
+    preload_app = False
+    max_requests = 0
+    max_requests_jitter = 0
+    reload = True
+
+# Conexões keep-alive com o proxy da plataforma (Railway, Heroku)
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+
+# Heartbeat dos workers em memória (evita disco lento em containers)
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    """
+    Após o fork, o cliente Supabase do worker é recriado pelo hook
+    os.register_at_fork de src/core/database.py (sockets TLS do master
+    não podem ser compartilhados entre workers).
+    """
+    server.log.info("Worker %s iniciado (%s)", worker.pid, worker_class)
+
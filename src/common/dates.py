@@ -0,0 +1,239 @@
+"""
+Datas e horários: parse, fuso da loja e formatação no padrão brasileiro
+
+DECISÃO: Um único módulo para datas em vez de strptime/fromisoformat espalhados
+Services e filtros de template usam as mesmas regras de parse e de fuso.
+
+DECISÃO: Fuso da loja (STORE_TIMEZONE, padrão America/Sao_Paulo)
+O Supabase devolve timestamptz em UTC e o servidor (Railway) roda em UTC;
+"hoje", agrupamentos por dia e horários exibidos usam o relógio da loja.
+Timestamps sem fuso vindos do banco são tratados como UTC (padrão do Postgres).
+
+DECISÃO: Formato detectado uma vez por coluna
+Em uma listagem todos os valores de uma coluna têm o mesmo formato; o parser
+é escolhido pela primeira amostra e só há nova detecção se um valor falhar.
+
+DECISÃO: Datas puras (validade_lote) memoizadas
+Muitos produtos compartilham a mesma validade; o parse de cada string
+distinta é feito uma vez por processo (lru_cache).
+"""
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Callable, Iterable, List, Optional, Union
+
+try:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+except ImportError:  # Python < 3.9
+    ZoneInfo = None
+
+STORE_TIMEZONE_NAME = os.environ.get('STORE_TIMEZONE', 'America/Sao_Paulo')
+
+
+def _load_store_timezone():
+    """Carrega o fuso da loja; sem base tz (ex: Windows sem tzdata) usa UTC-3 fixo"""
+    if ZoneInfo is not None:
+        try:
+            return ZoneInfo(STORE_TIMEZONE_NAME)
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    # Brasil não tem horário de verão desde 2019
+    return timezone(timedelta(hours=-3), 'BRT')
+
+
+STORE_TZ = _load_store_timezone()
+
+DateLike = Union[str, date, datetime, None]
+
+
+def now_local() -> datetime:
+    """Data e hora atuais no fuso da loja (com tzinfo)"""
+    return datetime.now(STORE_TZ)
+
+
+def to_local(dt: datetime) -> datetime:
+    """Converte um datetime para o fuso da loja (sem fuso é tratado como UTC)"""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(STORE_TZ)
+
+
+# ============================================
+# PARSERS (um por formato)
+# ============================================
+
+def _parse_iso_datetime(value: str) -> datetime:
+    """Timestamp ISO do Supabase (ex: 2024-01-31T13:45:00.123+00:00) no fuso da loja"""
+    if value[-1] == 'Z':
+        # fromisoformat só aceita 'Z' a partir do Python 3.11
+        value = value[:-1] + '+00:00'
+    return to_local(datetime.fromisoformat(value))
+
+
+@lru_cache(maxsize=4096)
+def _parse_iso_date(value: str) -> date:
+    """Data ISO pura (ex: 2024-01-31)"""
+    return date.fromisoformat(value)
+
+
+@lru_cache(maxsize=4096)
+def _parse_br_date(value: str) -> date:
+    """Data brasileira (ex: 31/01/2024)"""
+    return datetime.strptime(value, '%d/%m/%Y').date()
+
+
+@lru_cache(maxsize=4096)
+def _parse_dash_date(value: str) -> date:
+    """Data com hífen no formato dia-mês-ano (ex: 31-01-2024)"""
+    return datetime.strptime(value, '%d-%m-%Y').date()
+
+
+def _parse_datetime_value(value: datetime) -> datetime:
+    return to_local(value)
+
+
+def _parse_date_value(value: date) -> date:
+    return value
+
+
+def _detect_parser(sample: Any) -> Optional[Callable[[Any], Union[date, datetime]]]:
+    """Escolhe o parser pelo formato de uma amostra; None se não reconhecido"""
+    if isinstance(sample, datetime):
+        return _parse_datetime_value
+    if isinstance(sample, date):
+        return _parse_date_value
+    if not isinstance(sample, str) or len(sample) < 10:
+        return None
+    if sample[4] == '-':
+        return _parse_iso_date if len(sample) == 10 else _parse_iso_datetime
+    if sample[2] == '/':
+        return _parse_br_date
+    if sample[2] == '-':
+        return _parse_dash_date
+    return None
+
+
+def parse_date_value(value: Any) -> Optional[Union[date, datetime]]:
+    """
+    Converte um valor de data/hora vindo do banco ou de formulário
+
+    Args:
+        value: String (ISO, dd/mm/aaaa, dd-mm-aaaa), date, datetime ou None
+
+    Returns:
+        date para datas puras, datetime no fuso da loja para timestamps,
+        None se vazio ou inválido
+    """
+    if not value:
+        return None
+    parser = _detect_parser(value)
+    if parser is None:
+        return None
+    try:
+        return parser(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def parse_date_column(values: Iterable[Any]) -> List[Optional[Union[date, datetime]]]:
+    """
+    Converte uma coluna inteira detectando o formato uma única vez
+
+    Args:
+        values: Valores de uma mesma coluna (ex: data_venda de cada linha)
+
+    Returns:
+        Lista com date/datetime (None onde vazio ou inválido), na mesma ordem
+    """
+    parser = None
+    result = []
+    append = result.append
+    for value in values:
+        if not value:
+            append(None)
+            continue
+        if parser is None:
+            parser = _detect_parser(value)
+        try:
+            append(parser(value))
+        except (ValueError, TypeError, IndexError):
+            # Valor fora do padrão da coluna: detecção individual
+            append(parse_date_value(value))
+    return result
+
+
+# ============================================
+# FORMATAÇÃO
+# ============================================
+
+# hh:mm de cada minuto do dia, pré-calculados
+_HORAS_MINUTOS = tuple(f"{h:02d}:{m:02d}" for h in range(24) for m in range(60))
+
+
+@lru_cache(maxsize=4096)
+def _format_dia_br(dia: date) -> str:
+    """dd/mm/aaaa de um dia (memoizado: vendas de uma página caem em poucos dias)"""
+    return f"{dia.day:02d}/{dia.month:02d}/{dia.year}"
+
+
+def _format_br(parsed: Union[date, datetime], with_time: bool) -> str:
+    """dd/mm/aaaa (e hh:mm se with_time e for datetime) sem passar por strftime"""
+    if isinstance(parsed, datetime):
+        dia = _format_dia_br(parsed.date())
+        if with_time:
+            return dia + ' ' + _HORAS_MINUTOS[parsed.hour * 60 + parsed.minute]
+        return dia
+    return _format_dia_br(parsed)
+
+
+def format_date_br(value: DateLike) -> str:
+    """Formata como dd/mm/aaaa; devolve o valor original se não for uma data"""
+    parsed = parse_date_value(value)
+    if parsed is None:
+        return value or ''
+    return _format_br(parsed, with_time=False)
+
+
+def format_datetime_br(value: DateLike) -> str:
+    """Formata como dd/mm/aaaa hh:mm no fuso da loja; devolve o valor original se inválido"""
+    parsed = parse_date_value(value)
+    if parsed is None:
+        return value or ''
+    return _format_br(parsed, with_time=True)
+
+
+def format_date_column(values: Iterable[Any], with_time: bool = False) -> List[str]:
+    """
+    Formata uma coluna inteira como dd/mm/aaaa (ou dd/mm/aaaa hh:mm)
+
+    Args:
+        values: Valores de uma mesma coluna
+        with_time: Inclui hora e minuto para timestamps
+
+    Returns:
+        Lista de strings formatadas; valores inválidos são devolvidos como vieram
+    """
+    values = list(values)
+    return [
+        _format_br(parsed, with_time) if parsed is not None else (value or '')
+        for value, parsed in zip(values, parse_date_column(values))
+    ]
+
+
+def days_until(value: DateLike, reference: datetime) -> Optional[int]:
+    """
+    Dias inteiros entre 'reference' e a meia-noite da data (negativo se já passou)
+
+    Args:
+        value: Data alvo (ex: validade_lote)
+        reference: Instante de referência, normalmente now_local()
+
+    Returns:
+        Número de dias (arredondado para baixo) ou None se a data for inválida
+    """
+    parsed = parse_date_value(value)
+    if parsed is None:
+        return None
+    if isinstance(parsed, datetime):
+        parsed = parsed.date()
+    return (datetime.combine(parsed, time.min, reference.tzinfo) - reference).days
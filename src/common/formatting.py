@@ -0,0 +1,156 @@
+"""
+Formatação numérica no padrão brasileiro (1.234,56), sem depender de locale
+
+DECISÃO: Um único formatador baseado no mini-idioma de formatação do Python
+f"{valor:,.2f}" já gera os separadores em C; basta trocar ',' <-> '.' com
+str.translate. Evita setlocale (global ao processo, não thread-safe) e laços
+de concatenação de caracteres em Python.
+DECISÃO: API em lote (format_*_column) para colunas inteiras de listagens
+A coluna é formatada em uma única string e traduzida com um só translate,
+diluindo o custo por célula.
+"""
+from typing import Any, Iterable, List, Optional
+
+# Troca separadores do padrão americano (1,234.56) para o brasileiro (1.234,56)
+_BR_SEPARATORS = str.maketrans(',.', '.,')
+
+
+def _to_float(value: Any) -> Optional[float]:
+    """Converte para float; None se o valor for vazio ou inválido"""
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def format_br(value: float, decimals: int = 2) -> str:
+    """
+    Formata um float com separador de milhar '.' e decimal ','
+
+    Args:
+        value: Valor numérico (já convertido para float)
+        decimals: Número de casas decimais
+
+    Returns:
+        String formatada (ex: 1.234,56)
+    """
+    return f"{value:,.{decimals}f}".translate(_BR_SEPARATORS)
+
+
+def format_currency(value: Any, symbol: str = 'R$') -> str:
+    """
+    Formata um valor numérico como moeda brasileira
+
+    Args:
+        value: Valor numérico a ser formatado
+        symbol: Símbolo da moeda (padrão: R$)
+
+    Returns:
+        String formatada como moeda (ex: R$ 1.234,56); 'R$ 0,00' se inválido
+    """
+    # Caminho rápido: float() já rejeita None e textos inválidos
+    try:
+        valor = float(value)
+    except (ValueError, TypeError):
+        valor = 0.0
+    return f"{symbol} " + f"{valor:,.2f}".translate(_BR_SEPARATORS)
+
+
+def format_number(value: Any, decimals: int = 2) -> str:
+    """
+    Formata um número com separador de milhar e casas decimais
+
+    Args:
+        value: Valor numérico
+        decimals: Número de casas decimais (padrão: 2)
+
+    Returns:
+        String formatada (ex: 1.234,56); zero formatado se inválido
+    """
+    valor = _to_float(value)
+    return format_br(valor if valor is not None else 0.0, decimals)
+
+
+def format_quantity(value: Any, unit: str = '') -> str:
+    """
+    Formata quantidade com unidade de medida
+
+    Args:
+        value: Valor numérico
+        unit: Unidade de medida (ex: 'kg', 'un')
+
+    Returns:
+        String formatada (ex: 10,50 kg); '0 kg' se inválido
+    """
+    try:
+        valor = float(value)
+    except (ValueError, TypeError):
+        return f"0 {unit}".strip()
+    return (f"{valor:,.2f}".translate(_BR_SEPARATORS) + f" {unit}").strip()
+
+
+# ============================================
+# API EM LOTE (colunas inteiras)
+# ============================================
+
+def _format_column(values: Iterable[Any], decimals: int) -> List[Optional[str]]:
+    """
+    Formata uma coluna com um único translate; valores inválidos viram None
+
+    Returns:
+        Lista com a string formatada de cada valor (None onde o valor é inválido)
+    """
+    floats = [_to_float(v) for v in values]
+    spec = f",.{decimals}f"
+    # Inválidos viram string vazia no bloco e depois None na saída
+    joined = '\n'.join([format(v, spec) if v is not None else '' for v in floats])
+    formatted = joined.translate(_BR_SEPARATORS).split('\n')
+    return [s if v is not None else None for s, v in zip(formatted, floats)]
+
+
+def format_currency_column(values: Iterable[Any], symbol: str = 'R$') -> List[str]:
+    """
+    Formata uma coluna inteira como moeda (mesmo resultado de format_currency)
+
+    Args:
+        values: Valores numéricos
+        symbol: Símbolo da moeda (padrão: R$)
+
+    Returns:
+        Lista de strings formatadas, na mesma ordem
+    """
+    zero = f"{symbol} 0,00"
+    return [f"{symbol} {s}" if s is not None else zero for s in _format_column(values, 2)]
+
+
+def format_number_column(values: Iterable[Any], decimals: int = 2) -> List[str]:
+    """
+    Formata uma coluna inteira de números (mesmo resultado de format_number)
+
+    Args:
+        values: Valores numéricos
+        decimals: Número de casas decimais (padrão: 2)
+
+    Returns:
+        Lista de strings formatadas, na mesma ordem
+    """
+    zero = format_br(0.0, decimals)
+    return [s if s is not None else zero for s in _format_column(values, decimals)]
+
+
+def format_quantity_column(values: Iterable[Any], units: Iterable[str]) -> List[str]:
+    """
+    Formata uma coluna de quantidades com a unidade de cada linha
+    (mesmo resultado de format_quantity)
+
+    Args:
+        values: Valores numéricos
+        units: Unidade de medida de cada valor
+
+    Returns:
+        Lista de strings formatadas, na mesma ordem
+    """
+    return [
+        f"{s} {unit or ''}".strip() if s is not None else f"0 {unit or ''}".strip()
+        for s, unit in zip(_format_column(values, 2), units)
+    ]
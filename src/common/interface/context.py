@@ -1,9 +1,10 @@
 """
 Gerencia contexto global da interface do usuário
 """
-from flask import session, request, has_request_context
+from flask import session, request, has_request_context, g
+from werkzeug.local import LocalProxy
 from typing import Dict, Optional
-from .menu import get_menu_sections, get_menu_items, set_active_menu_item
+from .menu import get_menu_sections, get_menu_items, get_cached_menu
 
 
 def get_interface_context() -> Dict:
@@ -21,15 +22,12 @@ def get_interface_context() -> Dict:
         # Obter URL atual (apenas se houver contexto de requisição)
         current_url = request.path if has_request_context() else None
         
-        # Obter seções do menu
-        menu_sections = get_menu_sections(user_role)
-        
-        # Marcar item ativo baseado na URL
-        if current_url:
-            menu_sections = set_active_menu_item(menu_sections, current_url)
-        
-        # Obter itens do menu principal
-        main_menu_items = get_menu_items(current_url)
+        # Obter menus (montados uma vez por papel) com o item ativo marcado
+        if has_request_context():
+            main_menu_items, menu_sections = get_cached_menu(user_role, current_url)
+        else:
+            menu_sections = get_menu_sections(user_role)
+            main_menu_items = get_menu_items()
         
         return {
             'sidebar_menu_sections': menu_sections,
@@ -48,3 +46,48 @@ def get_interface_context() -> Dict:
             'user': {}  # Retorna dicionário vazio em caso de erro
         }
 
+
+
+
+def _session_user() -> Dict:
+    """Usuário da sessão (dicionário vazio fora de requisição)"""
+    if not has_request_context():
+        return {}
+    user = session.get('user', {})
+    return user if isinstance(user, dict) else {}
+
+
+def _request_menu():
+    """Menu da requisição atual, calculado uma vez por requisição (guardado em g)"""
+    if not has_request_context():
+        return (), ()
+    if '_interface_menu' not in g:
+        try:
+            g._interface_menu = get_cached_menu(_session_user().get('role'), request.path)
+        except Exception:
+            # Em caso de erro, o layout é renderizado sem menu
+            g._interface_menu = ((), ())
+    return g._interface_menu
+
+
+# DECISÃO: Proxies criados uma única vez e registrados como globals do Jinja
+# Nada é calculado (nem alocado) por requisição até o template ler o valor;
+# páginas fora do layout do dashboard (ex.: login) não pagam pelo menu
+_LAZY_INTERFACE_CONTEXT = {
+    'sidebar_menu_sections': LocalProxy(lambda: _request_menu()[1]),
+    'sidebar_main_menu': LocalProxy(lambda: _request_menu()[0]),
+    'user_role': LocalProxy(lambda: _session_user().get('role')),
+    'current_url': LocalProxy(lambda: request.path if has_request_context() else None),
+    'user': LocalProxy(_session_user),
+}
+
+
+def get_lazy_interface_context() -> Dict:
+    """
+    Versão preguiçosa de get_interface_context, para registrar como globals do Jinja
+
+    Returns:
+        Dicionário com as mesmas chaves de get_interface_context; cada valor é um
+        proxy resolvido apenas quando o template o lê
+    """
+    return dict(_LAZY_INTERFACE_CONTEXT)
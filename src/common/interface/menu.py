@@ -1,8 +1,24 @@
 """
 Gerencia itens e seções do menu lateral
+
+DECISÃO: Menu montado uma vez por papel e por URL ativa, e depois reaproveitado
+Os menus são estáticos; antes cada render refazia todas as seções, os url_for
+e a busca linear pelo item ativo. Agora cada render é só uma busca em dicionário
+e recebe estruturas imutáveis (tuplas e MappingProxyType), seguras para
+compartilhar entre threads.
 """
-from typing import List, Dict, Optional
-from flask import url_for
+from types import MappingProxyType
+from typing import List, Dict, Optional, Tuple
+from flask import url_for, request
+
+# URLs adicionais que marcam um item do menu principal como ativo
+_MAIN_MENU_ACTIVE_URLS = {
+    'dashboard.dashboard_view': ('/', '/dashboard'),
+    'venda.venda_view': ('/venda',),
+}
+
+# Menus prontos por (script_root, papel) -> {url_ativa: (menu_principal, seções)}
+_menu_cache: Dict[Tuple[str, Optional[str]], Dict[Optional[str], Tuple]] = {}
 
 
 def get_menu_sections(user_role: Optional[str] = None) -> List[Dict]:
@@ -42,6 +58,13 @@ def get_menu_sections(user_role: Optional[str] = None) -> List[Dict]:
                     'url': url_for('venda.list_vendas_view'),
                     'has_submenu': False,
                     'active': False
+                },
+                {
+                    'icon': 'bi-truck',
+                    'text': 'Sugestões de Compra',
+                    'url': url_for('compras.sugestoes_view'),
+                    'has_submenu': False,
+                    'active': False
                 }
             ]
         },
@@ -81,16 +104,20 @@ def get_menu_items(current_url: Optional[str] = None) -> List[Dict]:
             'icon': 'bi-speedometer2',
             'text': 'Dashboard',
             'url': url_for('dashboard.dashboard_view'),
-            'active': current_url == '/' or current_url == '/dashboard'
+            'endpoint': 'dashboard.dashboard_view'
         },
         {
             'icon': 'bi-basket2',
             'text': 'Vendas',
             'url': url_for('venda.venda_view'),
-            'active': current_url == '/venda'
+            'endpoint': 'venda.venda_view'
         }
     ]
     
+    for item in items:
+        active_urls = (item['url'],) + _MAIN_MENU_ACTIVE_URLS.get(item.pop('endpoint'), ())
+        item['active'] = current_url in active_urls
+    
     return items
 
 
@@ -130,3 +157,61 @@ def set_active_menu_item(sections: List[Dict], current_url: str) -> List[Dict]:
     
     return sections
 
+
+
+def _freeze_items(items: List[Dict]) -> Tuple:
+    """Converte uma lista de itens em uma tupla de mapeamentos somente leitura"""
+    return tuple(MappingProxyType(dict(item)) for item in items)
+
+
+def _freeze_sections(sections: List[Dict]) -> Tuple:
+    """Converte as seções (e seus itens) em estruturas somente leitura"""
+    return tuple(
+        MappingProxyType({**section, 'items': _freeze_items(section.get('items', []))})
+        for section in sections
+    )
+
+
+def _build_menu_views(user_role: Optional[str]) -> Dict[Optional[str], Tuple]:
+    """
+    Monta o menu de um papel para cada URL que ativa algum item
+
+    Returns:
+        Dicionário {url: (menu_principal, seções)}; a chave None é o menu sem item ativo
+    """
+    main_items = get_menu_items()
+    sections = get_menu_sections(user_role)
+
+    active_urls = {item['url'] for section in sections for item in section.get('items', [])}
+    active_urls.update(item['url'] for item in main_items)
+    for urls in _MAIN_MENU_ACTIVE_URLS.values():
+        active_urls.update(urls)
+
+    views = {None: (_freeze_items(main_items), _freeze_sections(sections))}
+    for url in active_urls:
+        views[url] = (
+            _freeze_items(get_menu_items(url)),
+            _freeze_sections(set_active_menu_item(get_menu_sections(user_role), url))
+        )
+    return views
+
+
+def get_cached_menu(user_role: Optional[str], current_url: Optional[str]) -> Tuple[Tuple, Tuple]:
+    """
+    Retorna o menu principal e as seções já com o item ativo marcado
+
+    Os menus de cada papel são montados na primeira requisição (url_for
+    precisa do contexto de requisição) e reaproveitados nas seguintes.
+
+    Args:
+        user_role: Papel do usuário
+        current_url: URL atual
+
+    Returns:
+        Tupla (menu_principal, seções), ambos imutáveis
+    """
+    cache_key = (request.script_root, user_role)
+    views = _menu_cache.get(cache_key)
+    if views is None:
+        views = _menu_cache[cache_key] = _build_menu_views(user_role)
+    return views.get(current_url, views[None])
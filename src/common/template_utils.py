@@ -2,76 +2,18 @@
 Utilitários para uso nos templates Jinja2
 Inclui filtros customizados e funções auxiliares
 """
-from datetime import datetime
+from datetime import date
 from typing import Any, Optional
 
+# DECISÃO: Filtros numéricos vivem em formatting.py (usado também pelos services)
+from .formatting import format_currency, format_number, format_quantity
+from .dates import format_date_br, format_datetime_br, parse_date_value
+
 
 # ============================================
 # FILTROS CUSTOMIZADOS
 # ============================================
 
-def format_currency(value: Any, symbol: str = 'R$') -> str:
-    """
-    Formata um valor numérico como moeda brasileira
-    
-    Args:
-        value: Valor numérico a ser formatado
-        symbol: Símbolo da moeda (padrão: R$)
-    
-    Returns:
-        String formatada como moeda (ex: R$ 1.234,56)
-    """
-    try:
-        if value is None:
-            return f"{symbol} 0,00"
-        
-        # Converte para float
-        valor = float(value)
-        
-        # Formata com 2 casas decimais
-        valor_str = f"{valor:.2f}"
-        
-        # Substitui ponto por vírgula
-        valor_str = valor_str.replace('.', ',')
-        
-        # Adiciona separador de milhar
-        partes = valor_str.split(',')
-        parte_inteira = partes[0]
-        
-        # Adiciona pontos a cada 3 dígitos
-        parte_inteira_formatada = ''
-        for i, digito in enumerate(reversed(parte_inteira)):
-            if i > 0 and i % 3 == 0:
-                parte_inteira_formatada = '.' + parte_inteira_formatada
-            parte_inteira_formatada = digito + parte_inteira_formatada
-        
-        return f"{symbol} {parte_inteira_formatada},{partes[1]}"
-    except (ValueError, TypeError, IndexError):
-        return f"{symbol} 0,00"
-
-
-def format_number(value: Any, decimals: int = 2) -> str:
-    """
-    Formata um número com separador de milhar e casas decimais
-    
-    Args:
-        value: Valor numérico
-        decimals: Número de casas decimais (padrão: 2)
-    
-    Returns:
-        String formatada (ex: 1.234,56)
-    """
-    try:
-        if value is None:
-            return "0,00"
-        
-        valor = float(value)
-        valor_str = f"{valor:.{decimals}f}"
-        return valor_str.replace('.', ',')
-    except (ValueError, TypeError):
-        return "0,00"
-
-
 def format_date(value: Any, format_str: str = '%d/%m/%Y') -> str:
     """
     Formata uma data
@@ -83,50 +25,34 @@ def format_date(value: Any, format_str: str = '%d/%m/%Y') -> str:
     Returns:
         String formatada ou string vazia se inválido
     """
-    try:
-        if value is None:
-            return ''
-        
-        # Se já for string, tenta converter
-        if isinstance(value, str):
-            # Tenta vários formatos comuns
-            for fmt in ['%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%d/%m/%Y', '%d-%m-%Y']:
-                try:
-                    dt = datetime.strptime(value, fmt)
-                    return dt.strftime(format_str)
-                except ValueError:
-                    continue
-            return value
-        
-        # Se for datetime
-        if isinstance(value, datetime):
-            return value.strftime(format_str)
-        
-        return str(value)
-    except Exception:
+    if value is None:
         return ''
+    if not isinstance(value, (str, date)):
+        return str(value)
 
+    # DECISÃO: Parse centralizado em dates.py (formato detectado pela forma
+    # da string, datas puras memoizadas, timestamps no fuso da loja)
+    if format_str == '%d/%m/%Y':
+        return format_date_br(value)
+    parsed = parse_date_value(value)
+    if parsed is None:
+        return value if isinstance(value, str) else ''
+    return parsed.strftime(format_str)
 
-def format_quantity(value: Any, unit: str = '') -> str:
+
+def format_datetime(value: Any) -> str:
     """
-    Formata quantidade com unidade de medida
-    
+    Formata data e hora (dd/mm/aaaa hh:mm) no fuso da loja
+
     Args:
-        value: Valor numérico
-        unit: Unidade de medida (ex: 'kg', 'un')
-    
+        value: Timestamp (string ISO, datetime ou None)
+
     Returns:
-        String formatada (ex: 10,5 kg)
+        String formatada ou string vazia se vazio
     """
-    try:
-        if value is None:
-            return f"0 {unit}".strip()
-        
-        valor = float(value)
-        valor_str = f"{valor:.2f}".replace('.', ',')
-        return f"{valor_str} {unit}".strip()
-    except (ValueError, TypeError):
-        return f"0 {unit}".strip()
+    if value is None:
+        return ''
+    return format_datetime_br(value)
 
 
 # ============================================
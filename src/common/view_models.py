@@ -0,0 +1,56 @@
+"""
+View models das listagens: linhas compactas com valores crus
+
+DECISÃO: Services devolvem linhas tipadas (NamedTuple, sem __dict__) em vez de
+listas de strings já formatadas. O mesmo resultado serve para HTML, JSON e CSV;
+a formatação acontece só no template, pelos filtros registrados (format_currency,
+format_quantity, format_date...), e só para as células realmente exibidas.
+
+DECISÃO: O primeiro campo de toda linha é o ID, como nas listas anteriores
+(components/table.html usa row[0] nas ações de editar/excluir/visualizar).
+"""
+from datetime import date
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+
+class Column(NamedTuple):
+    """Coluna exibida em components/table.html"""
+    header: str
+    index: int
+    # currency | quantity | date | datetime | status | capitalize (None = valor como está)
+    format: Optional[str] = None
+    # Índice do campo com a unidade (format='quantity')
+    unit_index: Optional[int] = None
+
+
+def columns_for(row_type: type, specs: Sequence[tuple]) -> List[Column]:
+    """
+    Monta as colunas de uma tabela a partir dos nomes dos campos da linha
+
+    Args:
+        row_type: Classe NamedTuple da linha (ex: ProdutoRow)
+        specs: Tuplas (header, campo[, format[, campo_unidade]])
+
+    Returns:
+        Lista de Column com os índices já resolvidos
+    """
+    fields = row_type._fields
+    columns = []
+    for header, field, *rest in specs:
+        fmt = rest[0] if rest else None
+        unit_index = fields.index(rest[1]) if len(rest) > 1 else None
+        columns.append(Column(header, fields.index(field), fmt, unit_index))
+    return columns
+
+
+def row_to_dict(row: NamedTuple) -> Dict[str, Any]:
+    """Converte uma linha em dict serializável (datas em ISO 8601) para JSON/CSV"""
+    return {
+        field: value.isoformat() if isinstance(value, date) else value
+        for field, value in zip(row._fields, row)
+    }
+
+
+def rows_to_dicts(rows: Iterable[NamedTuple]) -> List[Dict[str, Any]]:
+    """Converte várias linhas com row_to_dict"""
+    return [row_to_dict(row) for row in rows]
@@ -3,13 +3,66 @@ Módulo Core - Infraestrutura base da aplicação
 
 Contém configurações e serviços de infraestrutura como:
 - Database (Supabase)
+- Database async (event loop do worker)
+- Profiler (amostragem de requisições)
+- Resiliência (retry, circuit breaker)
+- Templates (cache de bytecode e pré-compilação)
+- Arquivos estáticos (fingerprint, cache immutable, gzip/brotli)
+- Compressão de respostas (gzip/brotli)
+- GET condicional (ETag/304 por versão dos dados)
+- Idempotência (chaves de operações já processadas)
+- Estado compartilhado (arquivos lidos e escritos por todos os workers)
 - Exceptions (futuro)
 - Configurações base (futuro)
 """
-from .database import init_supabase, supabase_client
+from .database import init_supabase, reinit_supabase, supabase_client, get_pool_stats
+from .profiler import init_profiler
+from .templates import init_templates, warmup_templates
+from .static_assets import init_static_assets, build_static_manifest
+from .compression import init_compression
+from .conditional import init_conditional_get, conditional_get, bump_data_version, get_data_version
+from .idempotency import (
+    init_idempotency, is_valid_idempotency_key, claim_idempotency_key,
+    complete_idempotency_key, release_idempotency_key
+)
+from .shared_state import shared_lock, write_atomic, read_json, write_json
+from .async_database import run_async, async_supabase_client, use_async_services
+from .resilience import (
+    configure_resilience, execute_read, execute_read_all, execute_read_async, call_with_retry,
+    get_resilience_stats
+)
 
 __all__ = [
     'init_supabase',
+    'reinit_supabase',
     'supabase_client',
+    'get_pool_stats',
+    'run_async',
+    'async_supabase_client',
+    'use_async_services',
+    'init_profiler',
+    'init_templates',
+    'warmup_templates',
+    'init_static_assets',
+    'build_static_manifest',
+    'init_compression',
+    'init_conditional_get',
+    'conditional_get',
+    'bump_data_version',
+    'get_data_version',
+    'init_idempotency',
+    'is_valid_idempotency_key',
+    'claim_idempotency_key',
+    'complete_idempotency_key',
+    'release_idempotency_key',
+    'shared_lock',
+    'write_atomic',
+    'read_json',
+    'write_json',
+    'configure_resilience',
+    'execute_read',
+    'execute_read_all',
+    'execute_read_async',
+    'call_with_retry',
+    'get_resilience_stats',
 ]
-
@@ -0,0 +1,113 @@
+"""
+Módulo de Database Assíncrono - Cliente Supabase async e event loop do worker
+
+Permite que as views (sync) disparem várias consultas ao Supabase em paralelo.
+
+DECISÃO: Manter um único event loop por processo, rodando em uma thread de fundo,
+em vez de usar views async do Flask. O Flask cria um event loop novo a cada
+requisição async, o que descartaria o pool de conexões (e os handshakes TLS) a
+cada request. Com um loop de longa duração, o cliente async e suas conexões
+keep-alive são reaproveitados por todas as threads do worker.
+DECISÃO: O loop e o cliente são recriados de forma preguiçosa após fork
+(threads não sobrevivem ao fork do gunicorn com preload).
+"""
+import asyncio
+import os
+import threading
+
+import httpx
+from flask import current_app
+from supabase import acreate_client, AsyncClient
+from supabase.lib.client_options import AsyncClientOptions
+
+from .database import get_supabase_settings, http2_available, http_limits, http_timeout
+
+_loop: asyncio.AbstractEventLoop = None
+_loop_lock = threading.Lock()
+_async_client: AsyncClient = None
+_async_client_lock: asyncio.Lock = None
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Retorna o event loop do worker, iniciando a thread na primeira chamada"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever,
+                name='mercadim-asyncio',
+                daemon=True
+            ).start()
+    return _loop
+
+
+def _reset_after_fork():
+    """Descarta loop e cliente herdados do processo pai"""
+    global _loop, _loop_lock, _async_client, _async_client_lock
+    _loop = None
+    _loop_lock = threading.Lock()
+    _async_client = None
+    _async_client_lock = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def run_async(coro, timeout: float = None):
+    """
+    Executa uma coroutine no event loop do worker e aguarda o resultado.
+
+    Pode ser chamada de qualquer thread (views, services sync).
+
+    Args:
+        coro: Coroutine a executar
+        timeout: Tempo máximo de espera em segundos (padrão: sem limite)
+
+    Returns:
+        Resultado da coroutine
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result(timeout)
+
+
+def use_async_services() -> bool:
+    """Indica se as views devem usar as variantes async dos services (ASYNC_SERVICES)"""
+    return bool(current_app.config.get('ASYNC_SERVICES', False))
+
+
+async def async_supabase_client() -> AsyncClient:
+    """
+    Retorna o cliente Supabase assíncrono (deve ser chamado dentro do loop do worker).
+
+    Returns:
+        Cliente Supabase async
+
+    Raises:
+        RuntimeError: Se init_supabase(app) não foi chamado
+    """
+    global _async_client, _async_client_lock
+    if _async_client is not None:
+        return _async_client
+
+    if _async_client_lock is None:
+        _async_client_lock = asyncio.Lock()
+
+    async with _async_client_lock:
+        if _async_client is None:
+            settings = get_supabase_settings()
+            max_connections = settings['async_max_connections']
+            # DECISÃO: Manter todas as conexões async vivas entre rajadas
+            # Um dashboard abre ~10 conexões de uma vez; com poucas keep-alive
+            # cada rajada pagaria novos handshakes TLS
+            http_client = httpx.AsyncClient(
+                http2=http2_available(settings),
+                limits=http_limits(settings, max_connections, max_connections),
+                timeout=http_timeout(settings),
+            )
+            options = AsyncClientOptions(
+                httpx_client=http_client,
+                postgrest_client_timeout=settings['read_timeout'],
+            )
+            _async_client = await acreate_client(settings['url'], settings['key'], options)
+    return _async_client
@@ -0,0 +1,157 @@
+"""
+Módulo de Compressão - gzip/brotli para respostas HTML e JSON
+
+As páginas são grandes e repetitivas (venda_view.html traz a lista de produtos
+duas vezes: nas linhas da tabela e em produtos|tojson; dashboard.html tem
+centenas de linhas de markup). Texto assim comprime 5-10x, o que pesa na
+Wi-Fi das lojas.
+
+DECISÃO: Hook after_request no próprio app em vez de depender do proxy
+O Railway/Heroku não comprime respostas do app. Registrado antes dos demais
+hooks after_request (que rodam em ordem inversa), comprime a resposta final.
+DECISÃO: Brotli (qualidade baixa, rápido) quando o cliente aceita; senão gzip
+Qualidade/nível moderados: compressão em tempo de requisição custa CPU do worker.
+DECISÃO: Só tipos de texto (COMPRESSION_MIMETYPES) e acima de COMPRESSION_MIN_SIZE
+Imagens, PDFs e zips já são comprimidos; respostas pequenas cabem em um pacote.
+Respostas de arquivo (send_file, direct_passthrough), parciais (206) ou já
+codificadas (estáticos pré-comprimidos) passam direto.
+DECISÃO: Respostas em streaming são comprimidas bloco a bloco, com flush a
+cada bloco, para o navegador continuar recebendo à medida que são geradas.
+"""
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # Brotli é opcional
+    brotli = None
+
+DEFAULT_MIMETYPES = (
+    'text/html',
+    'text/css',
+    'text/plain',
+    'text/xml',
+    'text/javascript',
+    'application/javascript',
+    'application/json',
+    'image/svg+xml',
+)
+
+
+class _GzipEncoder:
+    """Compressor gzip incremental (zlib com cabeçalho gzip)"""
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def process(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliEncoder:
+    """Compressor brotli incremental"""
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def process(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+def _choose_encoding(accept_encodings, brotli_enabled: bool):
+    """Retorna 'br', 'gzip' ou None conforme o Accept-Encoding"""
+    if brotli_enabled and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def _compress_stream(chunks, encoder):
+    """Comprime um iterável de blocos, liberando a saída a cada bloco"""
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = encoder.process(chunk) + encoder.flush()
+            if data:
+                yield data
+        yield encoder.finish()
+    finally:
+        # Repassa o fechamento ao iterável original (libera recursos do gerador)
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def init_compression(app):
+    """
+    Registra a compressão de respostas na aplicação, se habilitada.
+
+    Args:
+        app: Instância da aplicação Flask
+    """
+    if not app.config.get('COMPRESSION_ENABLED'):
+        return
+
+    mimetypes = frozenset(app.config.get('COMPRESSION_MIMETYPES') or DEFAULT_MIMETYPES)
+    min_size = app.config.get('COMPRESSION_MIN_SIZE', 500)
+    gzip_level = app.config.get('COMPRESSION_GZIP_LEVEL', 6)
+    brotli_quality = app.config.get('COMPRESSION_BROTLI_QUALITY', 4)
+    brotli_enabled = brotli is not None and app.config.get('COMPRESSION_BROTLI', True)
+
+    def new_encoder(encoding):
+        return _BrotliEncoder(brotli_quality) if encoding == 'br' else _GzipEncoder(gzip_level)
+
+    @app.after_request
+    def _compress_response(response):
+        if response.mimetype not in mimetypes:
+            return response
+        # Cache intermediário deve separar versões comprimidas e não comprimidas
+        response.vary.add('Accept-Encoding')
+
+        if (
+            response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.status_code < 200
+            or response.status_code in (204, 206, 304)
+            or request.method == 'HEAD'
+        ):
+            return response
+
+        encoding = _choose_encoding(request.accept_encodings, brotli_enabled)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = _compress_stream(response.response, new_encoder(encoding))
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            encoder = new_encoder(encoding)
+            compressed = encoder.process(data) + encoder.finish()
+            if len(compressed) >= len(data):
+                return response
+            response.set_data(compressed)
+
+        response.headers['Content-Encoding'] = encoding
+        # A representação mudou: o ETag (se houver) também precisa mudar
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f"{etag}-{encoding}", weak)
+        return response
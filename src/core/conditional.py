@@ -0,0 +1,189 @@
+"""
+Módulo de GET Condicional - ETag/Last-Modified e 304 sem consultar o banco
+
+Páginas que não mudaram (uma venda já registrada, a lista de produtos sem
+alterações) eram consultadas e renderizadas de novo a cada visita.
+
+DECISÃO: ETag calculado antes da view, a partir de versões de dados
+- Vendas são imutáveis: o ETag do detalhe depende só do ID da venda.
+- Listas dependem de um contador de alterações por recurso ('produtos',
+  'fornecedores', 'vendas'), incrementado pelos services a cada escrita.
+Se o If-None-Match bate, a resposta 304 sai sem consulta ao Supabase e sem
+renderizar template.
+
+DECISÃO: Contador de alterações em arquivos JSON de DATA_VERSION_DIR
+Compartilhado entre os workers do gunicorn da mesma máquina. O incremento é
+feito sob shared_lock (ler, somar 1, gravar), então duas escritas seguidas
+sempre geram versões diferentes; um mtime podia repetir na mesma fatia de
+tempo do relógio ou quando o relógio era ajustado.
+Escritas feitas fora do app (painel do Supabase) não passam pelos services:
+o ETag também muda a cada CONDITIONAL_GET_MAX_STALE segundos.
+
+DECISÃO: O ETag inclui a versão do deploy e o usuário da sessão
+A página carrega topbar e menu do usuário, e muda quando o código muda.
+Com mensagens flash pendentes a página é sempre renderizada (elas fazem parte do HTML).
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+from functools import wraps
+
+from flask import make_response, request, session
+
+from .shared_state import read_json, shared_lock, write_json
+
+# Estado configurado por init_conditional_get (services chamam bump fora do contexto do app)
+_state = {
+    'enabled': False,
+    'dir': os.path.join(tempfile.gettempdir(), 'mercadim_data_versions'),
+    'app_version': '',
+    'max_stale': 300,
+}
+
+
+def _version_path(resource: str) -> str:
+    return os.path.join(_state['dir'], f"{resource}.json")
+
+
+def _read_version(resource: str) -> dict:
+    """Contador e hora da última alteração de um recurso"""
+    data = read_json(_version_path(resource))
+    return data if isinstance(data, dict) else {}
+
+
+def bump_data_version(*resources: str):
+    """
+    Marca recursos como alterados (invalida os ETags das páginas que dependem deles)
+
+    Args:
+        resources: Nomes dos recursos (ex: 'produtos', 'vendas')
+    """
+    if not _state['enabled']:
+        return
+    for resource in resources:
+        path = _version_path(resource)
+        try:
+            os.makedirs(_state['dir'], exist_ok=True)
+            with shared_lock(path):
+                versao = int(_read_version(resource).get('versao', 0)) + 1
+                write_json(path, {'versao': versao, 'alterado_em': time.time()})
+        except (OSError, ValueError):
+            pass
+
+
+def get_data_version(resource: str) -> int:
+    """Versão atual de um recurso (contador de alterações; 0 se nunca alterado)"""
+    try:
+        return int(_read_version(resource).get('versao', 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _compute_app_version(app) -> str:
+    """Versão do deploy: SHA do commit (Railway/Heroku) ou assinatura dos fontes"""
+    for var in ('APP_VERSION', 'RAILWAY_GIT_COMMIT_SHA', 'SOURCE_VERSION'):
+        if os.environ.get(var):
+            return os.environ[var]
+
+    # Mesmo resultado em todos os workers (não depende da hora de início)
+    digest = hashlib.sha1()
+    folders = [os.path.join(app.root_path, 'src'), app.template_folder, app.static_folder]
+    for name in sorted(os.listdir(app.root_path)):
+        if name.endswith('.py'):
+            st = os.stat(os.path.join(app.root_path, name))
+            digest.update(f"{name}:{st.st_mtime_ns}:{st.st_size};".encode())
+    for folder in folders:
+        if not folder or not os.path.isdir(folder):
+            continue
+        for root, dirs, names in os.walk(folder):
+            dirs[:] = sorted(d for d in dirs if not d.startswith('.') and d != '__pycache__')
+            for name in sorted(names):
+                if name.endswith(('.py', '.html', '.css', '.js')):
+                    st = os.stat(os.path.join(root, name))
+                    digest.update(f"{root}/{name}:{st.st_mtime_ns}:{st.st_size};".encode())
+    return digest.hexdigest()[:12]
+
+
+def _user_fingerprint() -> str:
+    """Identifica o usuário da sessão e o que aparece dele no layout"""
+    user = session.get('user', {})
+    return json.dumps(user, sort_keys=True, default=str) if isinstance(user, dict) else ''
+
+
+def conditional_get(resources=(), key=None):
+    """
+    Decorador que responde 304 quando a página não mudou desde a última visita.
+
+    Deve ficar abaixo de @login_required (o 304 só sai para usuário autenticado).
+
+    Args:
+        resources: Recursos cujas alterações mudam a página (ex: ('produtos',))
+        key: Função que recebe os argumentos da view e devolve a identidade
+             de um dado imutável (ex: lambda id: f'venda:{id}')
+
+    Returns:
+        Decorador da view
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not _state['enabled'] or request.method != 'GET':
+                return f(*args, **kwargs)
+
+            changes = [_read_version(resource) for resource in resources]
+            versions = [int(change.get('versao') or 0) for change in changes]
+            parts = [
+                _state['app_version'],
+                request.full_path,
+                _user_fingerprint(),
+                key(*args, **kwargs) if key else '',
+                *map(str, versions),
+            ]
+            if resources:
+                # Escritas fora do app aparecem no máximo após max_stale segundos
+                parts.append(str(int(time.time() // _state['max_stale'])))
+            etag = hashlib.sha1('|'.join(parts).encode()).hexdigest()[:20]
+
+            # A compressão acrescenta '-br'/'-gzip' ao ETag enviado ao navegador
+            had_flashes = bool(session.get('_flashes'))
+            if not had_flashes:
+                for tag in (etag, f"{etag}-br", f"{etag}-gzip"):
+                    if tag in request.if_none_match:
+                        response = make_response('', 304)
+                        response.set_etag(tag)
+                        response.headers['Cache-Control'] = 'private, no-cache'
+                        return response
+
+            response = make_response(f(*args, **kwargs))
+            # Sessão modificada durante a view (ex: flash exibido na página): sem ETag
+            if response.status_code == 200 and not had_flashes and not session.modified:
+                response.set_etag(etag)
+                # O navegador guarda, mas sempre revalida (o ETag depende da sessão)
+                response.headers['Cache-Control'] = 'private, no-cache'
+                changed_at = [change['alterado_em'] for change in changes if change.get('alterado_em')]
+                if changed_at:
+                    response.last_modified = max(changed_at)
+            return response
+
+        return decorated_function
+
+    return decorator
+
+
+def init_conditional_get(app):
+    """
+    Configura o GET condicional (diretório de versões e versão do deploy).
+
+    Args:
+        app: Instância da aplicação Flask
+    """
+    _state['enabled'] = bool(app.config.get('CONDITIONAL_GET_ENABLED'))
+    if not _state['enabled']:
+        return
+
+    _state['dir'] = app.config.get('DATA_VERSION_DIR') or _state['dir']
+    _state['max_stale'] = max(1, int(app.config.get('CONDITIONAL_GET_MAX_STALE', 300)))
+    _state['app_version'] = _compute_app_version(app)
+    os.makedirs(_state['dir'], exist_ok=True)
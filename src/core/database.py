@@ -2,39 +2,216 @@
 Módulo de Database - Cliente Supabase
 
 Gerencia a conexão e inicialização do cliente Supabase.
+
+DECISÃO: Criar o cliente HTTP (httpx) explicitamente em vez de deixar o
+supabase-py criar um por sub-cliente. Assim controlamos o pool de conexões,
+keep-alive, HTTP/2 e timeouts, e todas as chamadas (postgrest, auth, storage)
+compartilham as mesmas conexões TLS já abertas.
 """
+import importlib.util
+import os
+import threading
+
+import httpx
 from supabase import create_client, Client
+from supabase.lib.client_options import SyncClientOptions
 from flask import current_app
 
 _supabase_client: Client = None
+_supabase_settings: dict = None
+_transport = None
+_fork_hook_registered = False
+
+
+class _MeteredTransport(httpx.HTTPTransport):
+    """
+    Transport HTTP que conta requisições em andamento para medir saturação do pool
+
+    DECISÃO: Herdar de httpx.HTTPTransport em vez de envolver o pool do httpcore
+    O comportamento de conexão continua o mesmo, só adicionamos contadores
+    """
+
+    def __init__(self, max_connections: int, **kwargs):
+        super().__init__(**kwargs)
+        self.max_connections = max_connections
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests_total = 0
+        self.saturated_total = 0
+
+    def handle_request(self, request):
+        with self._lock:
+            self.in_flight += 1
+            self.requests_total += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            # Requisição que encontra todas as conexões ocupadas vai esperar na fila
+            if self.in_flight > self.max_connections:
+                self.saturated_total += 1
+        try:
+            return super().handle_request(request)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def stats(self) -> dict:
+        """Retorna métricas do pool de conexões"""
+        connections = list(getattr(self._pool, 'connections', []))
+        return {
+            'max_connections': self.max_connections,
+            'open_connections': len(connections),
+            'idle_connections': sum(1 for c in connections if c.is_idle()),
+            'in_flight': self.in_flight,
+            'peak_in_flight': self.peak_in_flight,
+            'requests_total': self.requests_total,
+            'saturated_total': self.saturated_total,
+        }
+
+
+def _build_http_client(settings: dict) -> httpx.Client:
+    """
+    Cria o cliente httpx compartilhado com pool, keep-alive e timeouts configurados
+
+    Args:
+        settings: Configurações de transporte (ver init_supabase)
+
+    Returns:
+        Cliente httpx pronto para ser usado pelo supabase-py
+    """
+    global _transport
+
+    _transport = _MeteredTransport(
+        max_connections=settings['max_connections'],
+        http2=http2_available(settings),
+        limits=http_limits(settings, settings['max_connections']),
+    )
+
+    return httpx.Client(transport=_transport, timeout=http_timeout(settings))
+
+
+def http2_available(settings: dict) -> bool:
+    """
+    Indica se HTTP/2 deve ser usado
+
+    DECISÃO: HTTP/2 apenas se o pacote 'h2' estiver instalado
+    Sem ele o httpx levanta erro ao criar o transport
+    """
+    return settings['http2'] and importlib.util.find_spec('h2') is not None
+
+
+def http_limits(settings: dict, max_connections: int, max_keepalive: int = None) -> httpx.Limits:
+    """Limites do pool de conexões (compartilhado pelos clientes sync e async)"""
+    if max_keepalive is None:
+        max_keepalive = settings['max_keepalive']
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=min(max_keepalive, max_connections),
+        keepalive_expiry=settings['keepalive_expiry'],
+    )
+
+
+def http_timeout(settings: dict) -> httpx.Timeout:
+    """Timeouts de conexão, leitura e espera por conexão livre no pool"""
+    return httpx.Timeout(
+        settings['read_timeout'],
+        connect=settings['connect_timeout'],
+        pool=settings['pool_timeout'],
+    )
+
+
+def _create_supabase_client(settings: dict) -> Client:
+    """Cria o cliente Supabase usando o cliente HTTP compartilhado"""
+    options = SyncClientOptions(
+        httpx_client=_build_http_client(settings),
+        postgrest_client_timeout=settings['read_timeout'],
+    )
+    return create_client(settings['url'], settings['key'], options)
+
 
 def init_supabase(app):
     """
     Inicializa o cliente Supabase com as configurações da aplicação.
-    
+
     Args:
         app: Instância da aplicação Flask
     """
-    global _supabase_client
+    global _supabase_client, _supabase_settings, _fork_hook_registered
     url = app.config.get('SUPABASE_URL')
     key = app.config.get('SUPABASE_KEY')
 
     if not url or not key:
         raise ValueError("SUPABASE_URL e SUPABASE_KEY devem estar configurados")
 
-    _supabase_client = create_client(url, key)
+    _supabase_settings = {
+        'url': url,
+        'key': key,
+        'max_connections': app.config.get('SUPABASE_POOL_MAX_CONNECTIONS', 20),
+        'max_keepalive': app.config.get('SUPABASE_POOL_MAX_KEEPALIVE', 10),
+        'keepalive_expiry': app.config.get('SUPABASE_KEEPALIVE_EXPIRY', 30.0),
+        'http2': app.config.get('SUPABASE_HTTP2', True),
+        'connect_timeout': app.config.get('SUPABASE_CONNECT_TIMEOUT', 5.0),
+        'read_timeout': app.config.get('SUPABASE_READ_TIMEOUT', 30.0),
+        'pool_timeout': app.config.get('SUPABASE_POOL_TIMEOUT', 10.0),
+        'async_max_connections': app.config.get('SUPABASE_ASYNC_MAX_CONNECTIONS', 100),
+    }
+
+    _supabase_client = _create_supabase_client(_supabase_settings)
+
+    # DECISÃO: Recriar o cliente no processo filho após fork (gunicorn --preload)
+    # Sockets TLS herdados do processo pai não podem ser compartilhados entre workers
+    if not _fork_hook_registered and hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=reinit_supabase)
+        _fork_hook_registered = True
+
+
+def reinit_supabase():
+    """
+    Recria o cliente Supabase (e seu pool de conexões) com as mesmas configurações.
+
+    Deve ser chamado no processo filho após um fork. Não fecha o cliente antigo
+    porque os sockets ainda pertencem ao processo pai.
+    """
+    global _supabase_client
+    if _supabase_settings is None:
+        return
+    _supabase_client = _create_supabase_client(_supabase_settings)
+
+
+def get_supabase_settings() -> dict:
+    """
+    Retorna as configurações usadas para criar o cliente Supabase.
+
+    Raises:
+        RuntimeError: Se o cliente não foi inicializado
+    """
+    if _supabase_settings is None:
+        raise RuntimeError("Supabase client não inicializado. Chame init_supabase(app) primeiro")
+    return _supabase_settings
+
+
+def get_pool_stats() -> dict:
+    """
+    Retorna métricas de uso do pool de conexões do worker atual.
+
+    Returns:
+        Dicionário com conexões abertas/ociosas, requisições em andamento,
+        pico e quantas requisições encontraram o pool saturado
+    """
+    if _transport is None:
+        return {}
+    return {'pid': os.getpid(), **_transport.stats()}
+
 
 def supabase_client() -> Client:
     """
     Retorna o cliente Supabase inicializado.
-    
+
     Returns:
         Cliente Supabase
-        
+
     Raises:
         RuntimeError: Se o cliente não foi inicializado
     """
     if _supabase_client is None:
         raise RuntimeError("Supabase client não inicializado. Chame init_supabase(app) primeiro")
     return _supabase_client
-
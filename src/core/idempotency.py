@@ -0,0 +1,170 @@
+"""
+Módulo de Idempotência - Chaves de operações já processadas
+
+O PDV offline reenvia a fila de vendas até receber confirmação. Se a resposta
+se perde (conexão caiu depois do commit), a mesma venda chega de novo e não
+pode ser gravada duas vezes.
+
+DECISÃO: Um arquivo por chave em IDEMPOTENCY_DIR, criado com O_EXCL
+A criação exclusiva é atômica entre os workers do gunicorn da mesma máquina
+(mesmo esquema do DATA_VERSION_DIR em conditional.py). O arquivo vazio marca
+a chave como "em processamento"; ao concluir, recebe o resultado em JSON.
+DECISÃO: O arquivo é só o caminho rápido; a garantia está no banco
+IDEMPOTENCY_DIR some num redeploy e não é visto por outra réplica. A chave
+também é gravada em vendas.idempotency_key (unique): quem salva a venda
+confere o banco antes de gravar e trata a violação de unicidade como venda
+já registrada (ver venda_service.salvar_vendas_lote).
+DECISÃO: Chaves em processamento há mais de IDEMPOTENCY_LOCK_TIMEOUT segundos
+são consideradas abandonadas (worker reiniciado no meio) e podem ser retomadas.
+A retomada é decidida sob shared_lock: dois workers nunca retomam a mesma chave.
+Chaves concluídas ficam IDEMPOTENCY_TTL_DAYS dias e são removidas na inicialização.
+"""
+import json
+import os
+import re
+import tempfile
+import time
+
+from src.core.shared_state import shared_lock
+
+# Estado configurado por init_idempotency (services usam fora do contexto do app)
+_state = {
+    'dir': os.path.join(tempfile.gettempdir(), 'mercadim_idempotency'),
+    'lock_timeout': 120,
+    'ttl_days': 7,
+}
+
+# Chaves vêm do cliente (UUID): só caracteres seguros para nome de arquivo
+_KEY_RE = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+
+# Trava das retomadas de chaves abandonadas (uma para o diretório: retomar é raro)
+_RETOMADA = '.retomada'
+
+# Resultados de claim_idempotency_key
+CLAIMED = 'claimed'
+IN_PROGRESS = 'in_progress'
+DONE = 'done'
+
+
+def is_valid_idempotency_key(key) -> bool:
+    """Verifica se a chave tem formato aceito (8-64 caracteres [A-Za-z0-9_-])"""
+    return isinstance(key, str) and bool(_KEY_RE.match(key))
+
+
+def _key_path(scope: str, key: str) -> str:
+    return os.path.join(_state['dir'], f"{scope}-{key}")
+
+
+def _read_result(path: str):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        return json.loads(content) if content else None
+    except (OSError, ValueError):
+        return None
+
+
+def claim_idempotency_key(scope: str, key: str):
+    """
+    Reserva uma chave para processamento
+
+    Args:
+        scope: Tipo da operação (ex: 'venda')
+        key: Chave enviada pelo cliente (validar com is_valid_idempotency_key)
+
+    Returns:
+        (status, resultado):
+        - (CLAIMED, None): chave reservada; chamar complete_ ou release_ depois
+        - (IN_PROGRESS, None): outro worker está processando a mesma chave
+        - (DONE, resultado): já processada; resultado gravado em complete_
+    """
+    path = _key_path(scope, key)
+    os.makedirs(_state['dir'], exist_ok=True)
+    try:
+        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+        return CLAIMED, None
+    except FileExistsError:
+        pass
+
+    result = _read_result(path)
+    if result is not None:
+        return DONE, result
+    if not _abandonada(path):
+        return IN_PROGRESS, None
+
+    with shared_lock(os.path.join(_state['dir'], _RETOMADA)):
+        # Outro worker pode ter retomado, concluído ou liberado enquanto esperávamos
+        result = _read_result(path)
+        if result is not None:
+            return DONE, result
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+            return CLAIMED, None
+        except FileExistsError:
+            pass
+        if not _abandonada(path):
+            return IN_PROGRESS, None
+        # Retoma: utime renova o prazo, e os próximos a conferir veem a reserva nova
+        os.utime(path, None)
+        return CLAIMED, None
+
+
+def _abandonada(path: str) -> bool:
+    """Reserva sem resultado há mais de lock_timeout segundos"""
+    try:
+        return time.time() - os.stat(path).st_mtime > _state['lock_timeout']
+    except OSError:
+        return False
+
+
+def complete_idempotency_key(scope: str, key: str, result: dict):
+    """Grava o resultado da operação (respostas seguintes devolvem o mesmo)"""
+    path = _key_path(scope, key)
+    fd, tmp_path = tempfile.mkstemp(dir=_state['dir'])
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(result, f, default=str)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def release_idempotency_key(scope: str, key: str):
+    """Libera a chave sem resultado (falha temporária: o cliente reenvia)"""
+    try:
+        os.unlink(_key_path(scope, key))
+    except OSError:
+        pass
+
+
+def _purge_expired():
+    """Remove chaves concluídas há mais de ttl_days dias"""
+    limite = time.time() - _state['ttl_days'] * 86400
+    try:
+        names = os.listdir(_state['dir'])
+    except OSError:
+        return
+    for name in names:
+        if name.startswith(_RETOMADA):
+            continue
+        path = os.path.join(_state['dir'], name)
+        try:
+            if os.stat(path).st_mtime < limite:
+                os.unlink(path)
+        except OSError:
+            pass
+
+
+def init_idempotency(app):
+    """
+    Configura o diretório e os prazos das chaves de idempotência.
+
+    Args:
+        app: Instância da aplicação Flask
+    """
+    _state['dir'] = app.config.get('IDEMPOTENCY_DIR') or _state['dir']
+    _state['lock_timeout'] = max(1, int(app.config.get('IDEMPOTENCY_LOCK_TIMEOUT', 120)))
+    _state['ttl_days'] = max(1, int(app.config.get('IDEMPOTENCY_TTL_DAYS', 7)))
+    os.makedirs(_state['dir'], exist_ok=True)
+    _purge_expired()
@@ -0,0 +1,144 @@
+"""
+Módulo de Profiler - Amostragem de tempo de parede por requisição
+
+Captura onde o tempo de uma requisição é gasto (esperas no Supabase,
+loops de formatação nos services, renderização Jinja) amostrando a pilha
+da thread que atende a requisição em intervalos fixos.
+
+DECISÃO: Gerar arquivos no formato "folded stacks" (uma pilha por linha,
+frames separados por ';' e a contagem de amostras no final). É o formato
+aceito pelo flamegraph.pl, speedscope e similares.
+DECISÃO: Não registrar nenhum hook quando PROFILER_ENABLED for falso,
+garantindo custo zero em produção com o profiler desligado.
+"""
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import g, request, session
+
+PROFILE_EXTENSION = '.folded'
+
+
+class _StackSampler(threading.Thread):
+    """Thread que amostra periodicamente a pilha de outra thread"""
+
+    def __init__(self, target_thread_id: int, interval: float):
+        super().__init__(name='mercadim-profiler', daemon=True)
+        self.target_thread_id = target_thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_thread_id)
+            if frame is not None:
+                self.stacks[_fold_stack(frame)] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def _fold_stack(frame) -> str:
+    """Converte uma pilha de frames em uma linha 'raiz;...;folha'"""
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    frames.reverse()
+    return ';'.join(frames)
+
+
+def _is_admin() -> bool:
+    """Verifica se o usuário da sessão é admin (mesmo critério do admin_required)"""
+    user = session.get('user', {})
+    return bool(user.get('user_metadata', {}).get('is_admin', False))
+
+
+def _should_profile(app) -> bool:
+    """
+    Decide se a requisição atual deve ser perfilada
+
+    DECISÃO: Parâmetro '?_profile=1' ou header 'X-Profile' só valem para admin
+    DECISÃO: Amostragem 1-em-N independe do usuário (PROFILER_SAMPLE_RATE)
+    """
+    sample_rate = app.config.get('PROFILER_SAMPLE_RATE', 0)
+    if sample_rate and random.randrange(sample_rate) == 0:
+        return True
+
+    if request.args.get('_profile') or request.headers.get('X-Profile'):
+        return _is_admin()
+
+    return False
+
+
+def _profile_filename(method: str, path: str, duration_ms: int) -> str:
+    """Monta o nome do arquivo: timestamp__METODO__caminho__duracaoms.folded"""
+    timestamp = datetime.now().strftime('%Y%m%dT%H%M%S_%f')
+    slug = path.strip('/').replace('/', '.') or 'index'
+    return f"{timestamp}__{method}__{slug}__{duration_ms}ms{PROFILE_EXTENSION}"
+
+
+def _prune_profiles(profile_dir: str, max_files: int):
+    """Remove os perfis mais antigos mantendo apenas os últimos max_files"""
+    files = sorted(f for f in os.listdir(profile_dir) if f.endswith(PROFILE_EXTENSION))
+    for old_file in files[:-max_files] if max_files > 0 else []:
+        try:
+            os.remove(os.path.join(profile_dir, old_file))
+        except OSError:
+            pass
+
+
+def init_profiler(app):
+    """
+    Registra os hooks de profiling na aplicação, se habilitado.
+
+    Args:
+        app: Instância da aplicação Flask
+    """
+    if not app.config.get('PROFILER_ENABLED'):
+        return
+
+    profile_dir = app.config.get('PROFILER_DIR')
+    interval = app.config.get('PROFILER_INTERVAL', 0.005)
+    max_files = app.config.get('PROFILER_MAX_FILES', 200)
+    os.makedirs(profile_dir, exist_ok=True)
+
+    @app.before_request
+    def _start_profiler():
+        if request.endpoint and request.endpoint.startswith('static'):
+            return
+        if not _should_profile(app):
+            return
+
+        sampler = _StackSampler(threading.get_ident(), interval)
+        g._profiler = (sampler, time.perf_counter())
+        sampler.start()
+
+    # DECISÃO: Usar teardown_request (e não after_request) para que o perfil
+    # seja gravado mesmo quando a view levanta uma exceção
+    @app.teardown_request
+    def _stop_profiler(exc):
+        profiler = g.pop('_profiler', None)
+        if profiler is None:
+            return
+
+        sampler, started_at = profiler
+        sampler.stop()
+        duration_ms = int((time.perf_counter() - started_at) * 1000)
+
+        filename = _profile_filename(request.method, request.path, duration_ms)
+        try:
+            with open(os.path.join(profile_dir, filename), 'w', encoding='utf-8') as f:
+                for stack, count in sampler.stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            _prune_profiles(profile_dir, max_files)
+        except OSError:
+            pass  # Profiling nunca deve derrubar a requisição
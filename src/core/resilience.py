@@ -0,0 +1,290 @@
+"""
+Módulo de Resiliência - Retry com backoff e circuit breaker
+
+Protege as chamadas ao Supabase contra falhas transitórias:
+- Retry limitado com backoff exponencial e jitter (apenas leituras idempotentes)
+- Circuit breaker que falha rápido quando o backend está fora do ar
+- Último valor bom (stale) servido quando a leitura falha
+
+DECISÃO: Retentar somente erros transitórios (rede, timeout, 5xx)
+Erros de validação/permissão (4xx) não melhoram com nova tentativa
+DECISÃO: Desligar o retry interno do postgrest nas leituras protegidas
+Ele dorme 1s, 2s, 4s... sem jitter e prende a thread do worker
+"""
+import asyncio
+import random
+import threading
+import time
+
+import httpx
+from postgrest.exceptions import APIError
+from supabase_auth.errors import AuthRetryableError
+
+# O PostgREST limita as linhas por resposta (padrão 1000): leituras completas paginam
+PAGE_SIZE = 1000
+
+# Códigos de erro considerados transitórios (HTTP 5xx e timeout de statement do Postgres)
+_TRANSIENT_CODES = {'500', '502', '503', '504', '520', '522', '524', '57014'}
+
+# Últimos valores bons por chave, servidos quando a leitura falha
+_stale_cache = {}
+_stale_cache_max = 500
+_stale_lock = threading.Lock()
+
+
+class CircuitOpenError(Exception):
+    """Levantada quando o circuito está aberto e a chamada não é executada"""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker simples com três estados
+
+    - closed: chamadas passam normalmente, falhas consecutivas são contadas
+    - open: chamadas falham imediatamente até reset_timeout expirar
+    - half_open: uma chamada de teste passa; sucesso fecha, falha reabre
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._half_open_probe = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state_unlocked()
+
+    def _state_unlocked(self) -> str:
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def before_call(self):
+        """Verifica se a chamada pode prosseguir, senão levanta CircuitOpenError"""
+        with self._lock:
+            state = self._state_unlocked()
+            if state == 'closed':
+                return
+            # DECISÃO: Em half_open apenas uma thread faz a chamada de teste
+            if state == 'half_open' and not self._half_open_probe:
+                self._half_open_probe = True
+                return
+        raise CircuitOpenError(f"Serviço '{self.name}' indisponível no momento")
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._half_open_probe = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._half_open_probe = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'name': self.name, 'state': self._state_unlocked(), 'failures': self._failures}
+
+
+# DECISÃO: Um circuito para dados (postgrest) e outro para auth
+# Se o auth cair, leituras de dados ainda podem funcionar (e vice-versa)
+data_breaker = CircuitBreaker('supabase')
+auth_breaker = CircuitBreaker('supabase_auth')
+
+_retry_settings = {'attempts': 3, 'base_delay': 0.1, 'max_delay': 1.0}
+
+
+def configure_resilience(app):
+    """
+    Aplica as configurações de retry e circuit breaker da aplicação.
+
+    Args:
+        app: Instância da aplicação Flask
+    """
+    for breaker in (data_breaker, auth_breaker):
+        breaker.failure_threshold = app.config.get('RESILIENCE_FAILURE_THRESHOLD', 5)
+        breaker.reset_timeout = app.config.get('RESILIENCE_RESET_TIMEOUT', 30.0)
+
+    _retry_settings.update({
+        'attempts': app.config.get('RESILIENCE_RETRY_ATTEMPTS', 3),
+        'base_delay': app.config.get('RESILIENCE_RETRY_BASE_DELAY', 0.1),
+        'max_delay': app.config.get('RESILIENCE_RETRY_MAX_DELAY', 1.0),
+    })
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Indica se o erro é transitório (vale a pena tentar novamente)"""
+    if isinstance(error, (httpx.TransportError, AuthRetryableError)):
+        return True
+    if isinstance(error, APIError):
+        return str(error.code) in _TRANSIENT_CODES
+    return False
+
+
+def call_with_retry(func, breaker: CircuitBreaker = data_breaker, retry: bool = True):
+    """
+    Executa func protegida pelo circuit breaker, com retry em erros transitórios
+
+    Args:
+        func: Função sem argumentos a executar
+        breaker: Circuit breaker que protege a chamada
+        retry: Se False, faz apenas uma tentativa (para operações não idempotentes)
+
+    Returns:
+        Resultado de func
+
+    Raises:
+        CircuitOpenError: Se o circuito estiver aberto
+        Exception: O último erro de func, se todas as tentativas falharem
+    """
+    attempts = _retry_settings['attempts'] if retry else 1
+
+    for attempt in range(attempts):
+        breaker.before_call()
+        try:
+            result = func()
+        except Exception as e:
+            if not is_transient_error(e):
+                # Erro de negócio/validação: o backend respondeu, então está de pé
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            if attempt == attempts - 1:
+                raise
+            # DECISÃO: "Full jitter" - espera aleatória entre 0 e o teto exponencial
+            # Evita que vários workers retentem ao mesmo tempo
+            teto = min(_retry_settings['max_delay'], _retry_settings['base_delay'] * (2 ** attempt))
+            time.sleep(random.uniform(0, teto))
+        else:
+            breaker.record_success()
+            return result
+
+
+def execute_read(query, stale_key: str = None):
+    """
+    Executa uma consulta de leitura do postgrest com retry, circuit breaker e fallback stale
+
+    Args:
+        query: Query builder do Supabase (antes do .execute())
+        stale_key: Chave para guardar/servir o último resultado bom (opcional)
+
+    Returns:
+        Resposta do .execute() (ou a última resposta boa, se a leitura falhar)
+
+    Raises:
+        Exception: Se a leitura falhar e não houver valor stale disponível
+    """
+    if hasattr(query, 'retry'):
+        query = query.retry(False)
+
+    try:
+        response = call_with_retry(query.execute)
+    except Exception as e:
+        # DECISÃO: Servir stale apenas quando o backend está com problema
+        # Erros de consulta (4xx) devem aparecer, não ser mascarados
+        transient = is_transient_error(e) or isinstance(e, CircuitOpenError)
+        if transient and stale_key is not None and stale_key in _stale_cache:
+            return _stale_cache[stale_key]
+        raise
+
+    if stale_key is not None:
+        with _stale_lock:
+            if stale_key not in _stale_cache and len(_stale_cache) >= _stale_cache_max:
+                _stale_cache.pop(next(iter(_stale_cache)))
+            _stale_cache[stale_key] = response
+    return response
+
+
+def execute_read_all(build_query) -> list:
+    """
+    Lê todas as linhas de uma consulta ordenada, em páginas de PAGE_SIZE
+
+    Args:
+        build_query: Função que monta a query (ordenada) a cada página
+
+    Returns:
+        Lista com as linhas de todas as páginas
+    """
+    rows = []
+    start = 0
+    while True:
+        page = execute_read(build_query().range(start, start + PAGE_SIZE - 1)).data
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+        start += PAGE_SIZE
+
+
+async def call_with_retry_async(func, breaker: CircuitBreaker = data_breaker, retry: bool = True):
+    """
+    Versão assíncrona de call_with_retry (func retorna um awaitable)
+
+    Compartilha os mesmos circuit breakers da versão sync, então uma queda
+    detectada por uma thread também faz as chamadas async falharem rápido.
+    """
+    attempts = _retry_settings['attempts'] if retry else 1
+
+    for attempt in range(attempts):
+        breaker.before_call()
+        try:
+            result = await func()
+        except Exception as e:
+            if not is_transient_error(e):
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            if attempt == attempts - 1:
+                raise
+            teto = min(_retry_settings['max_delay'], _retry_settings['base_delay'] * (2 ** attempt))
+            await asyncio.sleep(random.uniform(0, teto))
+        else:
+            breaker.record_success()
+            return result
+
+
+async def execute_read_async(query, stale_key: str = None):
+    """
+    Versão assíncrona de execute_read, para query builders do cliente async
+
+    Args:
+        query: Query builder do cliente Supabase async (antes do .execute())
+        stale_key: Chave para guardar/servir o último resultado bom (opcional)
+
+    Returns:
+        Resposta do .execute() (ou a última resposta boa, se a leitura falhar)
+    """
+    if hasattr(query, 'retry'):
+        query = query.retry(False)
+
+    try:
+        response = await call_with_retry_async(query.execute)
+    except Exception as e:
+        transient = is_transient_error(e) or isinstance(e, CircuitOpenError)
+        if transient and stale_key is not None and stale_key in _stale_cache:
+            return _stale_cache[stale_key]
+        raise
+
+    if stale_key is not None:
+        with _stale_lock:
+            if stale_key not in _stale_cache and len(_stale_cache) >= _stale_cache_max:
+                _stale_cache.pop(next(iter(_stale_cache)))
+            _stale_cache[stale_key] = response
+    return response
+
+
+def get_resilience_stats() -> dict:
+    """Retorna o estado dos circuit breakers"""
+    return {
+        'breakers': [data_breaker.stats(), auth_breaker.stats()],
+        'stale_entries': len(_stale_cache),
+    }
@@ -0,0 +1,92 @@
+"""
+Módulo de Estado Compartilhado - Arquivos lidos e escritos por todos os workers
+
+Dados mantidos fora do banco (valor do estoque, listas do dashboard, agregados
+de vendas) precisam ser os mesmos em todos os workers do gunicorn da máquina.
+
+DECISÃO: Leitura sem trava, escrita atômica (arquivo temporário + os.replace)
+Leitores nunca veem um arquivo pela metade. Quem lê-modifica-grava segura
+shared_lock(path): um Lock por arquivo entre as threads do processo e flock
+entre processos (mesmo esquema de máquina única de DATA_VERSION_DIR).
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows (desenvolvimento): trava só entre threads do processo
+    fcntl = None
+
+# Um Lock por arquivo: uma escrita lenta em um arquivo não trava os outros
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _reset_after_fork():
+    """Descarta travas herdadas do processo pai (threads não sobrevivem ao fork)"""
+    global _locks, _locks_guard
+    _locks = {}
+    _locks_guard = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _thread_lock(path: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(path, threading.Lock())
+
+
+@contextmanager
+def shared_lock(path: str):
+    """Trava um arquivo compartilhado entre threads e workers"""
+    with _thread_lock(path):
+        if fcntl is None:
+            yield
+            return
+        with open(path + '.lock', 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def write_atomic(path: str, write: Callable, binary: bool = False):
+    """
+    Grava um arquivo de uma vez: write(f) escreve num temporário que substitui o original
+
+    Args:
+        path: Arquivo de destino
+        write: Função que recebe o arquivo aberto e escreve o conteúdo
+        binary: Abre o temporário em modo binário
+    """
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, 'wb' if binary else 'w', **({} if binary else {'encoding': 'utf-8'})) as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def read_json(path: str) -> Optional[dict]:
+    """Conteúdo JSON do arquivo (None se não existe ou está inválido)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_json(path: str, data: dict):
+    """Grava JSON de forma atômica"""
+    write_atomic(path, lambda f: json.dump(data, f))
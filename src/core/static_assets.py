@@ -0,0 +1,190 @@
+"""
+Módulo de Arquivos Estáticos - Fingerprint, cache longo e pré-compressão
+
+Sem isso cada página revalida global.css e o logo (If-Modified-Since -> 304),
+um round-trip a mais por arquivo na Wi-Fi lenta das lojas.
+
+DECISÃO: Nome com hash do conteúdo (css/global.3f2a9c1b7d4e.css)
+url_for('static', filename='css/global.css') passa a gerar a URL com hash
+(via url_defaults), então os templates não mudam. Como a URL muda quando o
+conteúdo muda, a resposta pode ser 'Cache-Control: immutable' por um ano.
+
+DECISÃO: Variantes gzip/brotli gravadas uma vez na inicialização
+Em STATIC_BUILD_DIR, com nomes endereçados pelo conteúdo: workers que sobem
+juntos (ou reinícios) reaproveitam os arquivos já gerados. Brotli é opcional
+(pacote 'brotli'); sem ele só há gzip. Imagens já comprimidas (png, jpg...)
+não ganham variantes.
+
+DECISÃO: URLs sem hash continuam funcionando, com o cache padrão do Flask
+(ex: url() relativo dentro do CSS, links antigos).
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import tempfile
+
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # Brotli é opcional
+    brotli = None
+
+# Tipos que valem a pena comprimir (texto)
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.svg', '.json', '.txt', '.html', '.xml', '.map'}
+
+# Não compensa comprimir arquivos muito pequenos (cabem em um pacote)
+MIN_COMPRESS_SIZE = 1024
+
+# Um ano: o máximo recomendado para respostas 'immutable'
+IMMUTABLE_MAX_AGE = 31536000
+
+# Ordem de preferência quando o cliente aceita mais de uma codificação
+_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _file_hash(path: str) -> str:
+    """Hash curto (12 hex) do conteúdo do arquivo"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def _hashed_name(filename: str, file_hash: str) -> str:
+    """css/global.css -> css/global.<hash>.css"""
+    base, ext = os.path.splitext(filename)
+    return f"{base}.{file_hash}{ext}"
+
+
+def _write_atomic(path: str, data: bytes):
+    """Grava via arquivo temporário + rename (outro worker pode estar lendo)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _compressed_variants(data: bytes):
+    """Gera (encoding, sufixo, bytes) para cada compressão disponível que reduz o tamanho"""
+    variants = []
+    if brotli is not None:
+        variants.append(('br', '.br', brotli.compress(data, quality=11)))
+    # mtime=0: mesmo conteúdo gera sempre os mesmos bytes
+    variants.append(('gzip', '.gz', gzip.compress(data, compresslevel=9, mtime=0)))
+    return [(enc, suffix, comp) for enc, suffix, comp in variants if len(comp) < len(data)]
+
+
+def build_static_manifest(static_folder: str, build_dir: str) -> dict:
+    """
+    Calcula o hash de cada arquivo estático e grava as variantes comprimidas.
+
+    Args:
+        static_folder: Pasta static da aplicação
+        build_dir: Pasta onde ficam as variantes .gz/.br
+
+    Returns:
+        {
+            'urls': {'css/global.css': 'css/global.<hash>.css', ...},
+            'files': {'css/global.<hash>.css': {
+                'source': 'css/global.css',
+                'mimetype': 'text/css',
+                'encodings': {'br': 'css/global.<hash>.css.br', ...}
+            }}
+        }
+    """
+    urls = {}
+    files = {}
+    for root, _dirs, names in os.walk(static_folder):
+        for name in names:
+            path = os.path.join(root, name)
+            filename = os.path.relpath(path, static_folder).replace(os.sep, '/')
+            hashed = _hashed_name(filename, _file_hash(path))
+
+            encodings = {}
+            ext = os.path.splitext(name)[1].lower()
+            if ext in COMPRESSIBLE_EXTENSIONS and os.path.getsize(path) >= MIN_COMPRESS_SIZE:
+                # Nomes endereçados pelo conteúdo: se já existe, já está certo
+                pending = {
+                    enc for enc, suffix in _ENCODINGS
+                    if (enc != 'br' or brotli is not None)
+                    and not os.path.exists(os.path.join(build_dir, hashed + suffix))
+                }
+                if pending:
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                    for enc, suffix, compressed in _compressed_variants(data):
+                        if enc in pending:
+                            _write_atomic(os.path.join(build_dir, hashed + suffix), compressed)
+                for enc, suffix in _ENCODINGS:
+                    if os.path.exists(os.path.join(build_dir, hashed + suffix)):
+                        encodings[enc] = hashed + suffix
+
+            urls[filename] = hashed
+            files[hashed] = {
+                'source': filename,
+                'mimetype': mimetypes.guess_type(name)[0] or 'application/octet-stream',
+                'encodings': encodings,
+            }
+    return {'urls': urls, 'files': files}
+
+
+def init_static_assets(app):
+    """
+    Ativa URLs com hash, cache immutable e variantes pré-comprimidas.
+
+    Não faz nada se STATIC_FINGERPRINT for falso (padrão em desenvolvimento,
+    onde os arquivos mudam sem reiniciar o servidor).
+
+    Args:
+        app: Instância da aplicação Flask
+    """
+    if not app.config.get('STATIC_FINGERPRINT') or not app.static_folder:
+        return
+
+    build_dir = app.config.get('STATIC_BUILD_DIR') or os.path.join(tempfile.gettempdir(), 'mercadim_static')
+    manifest = build_static_manifest(app.static_folder, build_dir)
+    urls = manifest['urls']
+    files = manifest['files']
+    app.extensions['static_manifest'] = manifest
+
+    @app.url_defaults
+    def _fingerprint_static_url(endpoint, values):
+        if endpoint == 'static':
+            filename = values.get('filename')
+            if filename in urls:
+                values['filename'] = urls[filename]
+
+    default_static_view = app.view_functions['static']
+
+    def static_view(filename):
+        asset = files.get(filename)
+        if asset is None:
+            # URL sem hash (ou arquivo novo): comportamento padrão do Flask
+            return default_static_view(filename=filename)
+
+        accepted = request.accept_encodings
+        for enc, _suffix in _ENCODINGS:
+            variant = asset['encodings'].get(enc)
+            if variant and accepted[enc]:
+                response = send_from_directory(build_dir, variant, mimetype=asset['mimetype'])
+                response.headers['Content-Encoding'] = enc
+                break
+        else:
+            response = send_from_directory(app.static_folder, asset['source'], mimetype=asset['mimetype'])
+
+        response.headers['Cache-Control'] = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+        if asset['encodings']:
+            response.vary.add('Accept-Encoding')
+        return response
+
+    app.view_functions['static'] = static_view
+    app.logger.info("Arquivos estáticos com fingerprint: %d (brotli: %s)", len(files), brotli is not None)
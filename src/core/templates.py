@@ -0,0 +1,56 @@
+"""
+Módulo de Templates - Cache de bytecode e pré-compilação do Jinja
+
+Evita que cada worker do gunicorn recompile todos os templates no primeiro
+acesso (pago por requisições reais de usuários).
+
+DECISÃO: FileSystemBytecodeCache em um diretório compartilhado pelos workers
+O primeiro processo a compilar grava o bytecode; os demais só carregam.
+O Jinja confere o checksum do fonte, então templates alterados são recompilados.
+DECISÃO: Pré-compilação (warm-up) de todos os templates na inicialização
+Com preload_app o master compila uma vez e os workers herdam o cache em memória.
+"""
+import os
+
+from jinja2 import FileSystemBytecodeCache
+
+
+def warmup_templates(app) -> int:
+    """
+    Compila todos os templates da aplicação e os deixa no cache do Jinja.
+
+    Args:
+        app: Instância da aplicação Flask
+
+    Returns:
+        Quantidade de templates compilados
+    """
+    compiled = 0
+    for name in app.jinja_env.list_templates(extensions=['html']):
+        try:
+            app.jinja_env.get_template(name)
+            compiled += 1
+        except Exception:
+            # Um template com erro não deve impedir o worker de subir;
+            # o erro aparece de novo quando a página for acessada
+            app.logger.exception("Falha ao pré-compilar o template %s", name)
+    return compiled
+
+
+def init_templates(app):
+    """
+    Configura o cache de bytecode e, se habilitado, pré-compila os templates.
+
+    Deve ser chamado depois de registrar filtros e globals do Jinja, pois
+    filtros desconhecidos são erro de compilação.
+
+    Args:
+        app: Instância da aplicação Flask
+    """
+    cache_dir = app.config.get('JINJA_BYTECODE_CACHE_DIR')
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+
+    if app.config.get('TEMPLATE_WARMUP'):
+        warmup_templates(app)
@@ -0,0 +1,4 @@
+from .analise_routes import analise_bp
+from .analise_service import init_analise
+
+__all__ = ['analise_bp', 'init_analise']
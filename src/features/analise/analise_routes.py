@@ -0,0 +1,57 @@
+import click
+from datetime import timedelta
+from flask import Blueprint, request, jsonify
+from src.features.auth.auth_decorators import login_required
+from src.features.analise.analise_service import consultar_vendas, reconstruir_cubo
+from src.common.dates import now_local
+
+analise_bp = Blueprint('analise', __name__, url_prefix='/analise')
+
+
+def _lista(nome, tipo=str):
+    """Parâmetro de filtro separado por vírgula (None se ausente)"""
+    valor = request.args.get(nome)
+    if valor is None:
+        return None
+    return [tipo(v.strip()) for v in valor.split(',') if v.strip()]
+
+
+@analise_bp.route('/vendas')
+@login_required
+def vendas():
+    """
+    Receita, quantidade e número de vendas por dimensões (JSON)
+
+    Query:
+        inicio, fim: AAAA-MM-DD (padrão: últimos 30 dias)
+        por: dimensões separadas por vírgula (dia, dia_semana, hora, metodo, produto, fornecedor)
+        metodo, produto, fornecedor, dia_semana, hora: filtros separados por vírgula
+    Ex.: /analise/vendas?inicio=2026-01-01&por=dia_semana,hora&metodo=pix
+    """
+    try:
+        filtros = {
+            'metodo': _lista('metodo'),
+            'produto': _lista('produto', int),
+            'fornecedor': _lista('fornecedor', int),
+            'dia_semana': _lista('dia_semana', int),
+            'hora': _lista('hora', int),
+        }
+    except ValueError:
+        return jsonify({"success": False, "error": "Filtro inválido"}), 400
+    result = consultar_vendas(
+        request.args.get('inicio') or (now_local().date() - timedelta(days=29)),
+        request.args.get('fim'),
+        por=_lista('por') or (),
+        **filtros
+    )
+    if result['success']:
+        return jsonify(result), 200
+    # Cubo ainda não gerado: resposta vazia, tentar de novo em instantes
+    return jsonify(result), 503 if 'data' in result else 400
+
+
+@analise_bp.cli.command('reconstruir')
+def reconstruir_command():
+    """Refaz o cubo de vendas do zero (após apagar vendas no banco)"""
+    dados = reconstruir_cubo()
+    click.echo(f"{len(dados['dia'])} linhas no cubo até o item {dados['ultimo_item']}")
@@ -0,0 +1,677 @@
+"""
+Análise de vendas: cubo de receita por dia × hora × pagamento × produto
+
+Relatórios que olham semanas ou meses de vendas (sugestões de compra,
+recortes por hora, dia da semana, forma de pagamento, produto ou fornecedor)
+não leem itens_vendas linha a linha: leem o cubo mantido aqui, em arrays NumPy.
+
+DECISÃO: Cubo pré-agregado por hora, em colunas
+Uma linha por (dia, hora, forma de pagamento, produto) com quantidade e
+receita somadas; vendas no mesmo grão sem o produto (uma venda tem vários
+itens e só pode ser contada uma vez). Linhas ordenadas por dia: um intervalo
+de datas é um recorte por busca binária, e cada consulta é soma agrupada
+sobre o recorte.
+
+DECISÃO: Produtos e formas de pagamento codificados por dicionário
+As colunas guardam códigos pequenos (int32/int16); os ids e nomes ficam uma
+vez só em 'produtos' e 'metodos'. O fornecedor de cada produto fica alinhado
+ao dicionário de produtos, relido de 'produtos' quando surge produto novo e
+a cada _FORNECEDORES_VALIDADE segundos.
+
+DECISÃO: Atualização incremental por marca d'água no id de itens_vendas
+Cada atualização lê só os itens novos e soma no dia e hora da venda (vendas
+offline sincronizadas depois caem no dia certo). A leitura recomeça
+_MARGEM_ITENS ids antes da marca: itens de transações que confirmaram fora
+de ordem entram depois; os ids já somados ficam guardados e são ignorados.
+Vendas apagadas depois de somadas só saem com 'flask analise reconstruir'.
+
+DECISÃO: Totais por dia em arrays densos, guardados junto do cubo
+Receita e número de vendas de cada dia, somados item a item como o cubo.
+Dias fechados não mudam, então não são recalculados: só recebem itens novos
+com data antiga (vendas offline), na mesma atualização que os soma ao cubo.
+Uma janela de N dias é um recorte do array, com o mesmo custo para 7 ou 365.
+
+DECISÃO: Arquivo .npz em ANALISE_DIR, compartilhado pelos workers
+Atualizado no máximo a cada ANALISE_INTERVALO segundos, por um worker de
+cada vez (core/shared_state.py); cada worker guarda a última versão lida.
+
+DECISÃO: Atualização só em segundo plano; consultas só leem o arquivo
+Uma thread por worker chama atualizar_cubo a cada ANALISE_INTERVALO segundos
+(como a reconciliação do estoque). Uma consulta nunca lê itens_vendas nem
+espera a trava do arquivo; antes da primeira atualização ela responde erro.
+"""
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+import numpy as np
+
+from src.core.database import supabase_client
+from src.core.resilience import execute_read_all
+from src.core.shared_state import shared_lock, write_atomic
+from src.common.dates import now_local, parse_date_column, parse_date_value
+
+logger = logging.getLogger(__name__)
+
+# Estado configurado por init_analise (services usam fora do contexto do app)
+_state = {
+    'enabled': False,
+    'dir': os.path.join(tempfile.gettempdir(), 'mercadim_analise'),
+    'intervalo': 60,
+    'pid': None,  # processo em que a thread de atualização está rodando
+}
+_atualizacao_lock = threading.Lock()
+
+SEM_CUBO = "Cubo de vendas ainda não foi gerado; tente de novo em instantes"
+
+# Quantos ids antes da marca d'água são relidos a cada atualização
+_MARGEM_ITENS = 1000
+
+# Segundos até reler o fornecedor de todos os produtos do dicionário
+_FORNECEDORES_VALIDADE = 3600
+
+# Dias são contados a partir de 1970-01-01 (int32), uma quinta-feira
+_EPOCH = date(1970, 1, 1)
+
+# Dimensões aceitas em consultar_vendas (agrupamento e filtros)
+DIMENSOES = ('dia', 'dia_semana', 'hora', 'metodo', 'produto', 'fornecedor')
+
+# Última versão lida do arquivo neste worker
+_cache = {'mtime': None, 'dados': None}
+_cache_lock = threading.Lock()
+
+
+class CuboIndisponivelError(Exception):
+    """Levantada quando o cubo ainda não existe em disco"""
+
+
+def init_analise(app):
+    """
+    Configura o cubo de vendas
+
+    Configurações:
+        ANALISE_DIR: Diretório dos arquivos de análise (compartilhado pelos workers)
+        ANALISE_INTERVALO: Segundos entre atualizações do cubo em segundo plano (padrão 60)
+    """
+    _state['enabled'] = True
+    _state['dir'] = app.config.get('ANALISE_DIR', _state['dir'])
+    _state['intervalo'] = app.config.get('ANALISE_INTERVALO', 60)
+    os.makedirs(_state['dir'], exist_ok=True)
+
+
+def dia_numero(dia: date) -> int:
+    """Data -> número do dia usado nos arrays"""
+    return (dia - _EPOCH).days
+
+
+def numero_dia(numero: int) -> date:
+    """Número do dia dos arrays -> data"""
+    return _EPOCH + timedelta(days=int(numero))
+
+
+def _arquivo() -> str:
+    return os.path.join(_state['dir'], 'cubo_vendas.npz')
+
+
+def _vazio() -> dict:
+    return {
+        # Cubo de itens: uma linha por (dia, hora, metodo, produto)
+        'dia': np.zeros(0, dtype=np.int32),
+        'hora': np.zeros(0, dtype=np.int8),
+        'metodo': np.zeros(0, dtype=np.int16),
+        'produto': np.zeros(0, dtype=np.int32),
+        'quantidade': np.zeros(0, dtype=np.float64),
+        'receita': np.zeros(0, dtype=np.float64),
+        # Vendas: uma linha por (dia, hora, metodo)
+        'vendas_dia': np.zeros(0, dtype=np.int32),
+        'vendas_hora': np.zeros(0, dtype=np.int8),
+        'vendas_metodo': np.zeros(0, dtype=np.int16),
+        'vendas_num': np.zeros(0, dtype=np.int64),
+        # Dicionários (código = posição)
+        'produtos': np.zeros(0, dtype=np.int64),
+        'produto_fornecedor': np.zeros(0, dtype=np.int64),
+        'metodos': np.zeros(0, dtype=np.str_),
+        # Totais por dia (posição 0 = dia diario_inicio)
+        'diario_inicio': 0,
+        'diario_receita': np.zeros(0, dtype=np.float64),
+        'diario_vendas': np.zeros(0, dtype=np.int64),
+        # Controle da atualização incremental
+        'ids_recentes': np.zeros(0, dtype=np.int64),
+        'ultimo_item': 0,
+        'atualizado_em': 0.0,
+        'fornecedores_em': 0.0,
+    }
+
+
+def _ler_arquivo() -> Optional[dict]:
+    """Lê o cubo do disco (None se ainda não existe ou é de outro formato)"""
+    try:
+        with np.load(_arquivo()) as npz:
+            dados = {nome: npz[nome] for nome in npz.files}
+    except (OSError, ValueError):
+        return None
+    if set(dados) != set(_vazio()):
+        return None
+    for nome in ('ultimo_item', 'diario_inicio'):
+        dados[nome] = int(dados[nome])
+    for nome in ('atualizado_em', 'fornecedores_em'):
+        dados[nome] = float(dados[nome])
+    return dados
+
+
+def _gravar_arquivo(dados: dict):
+    write_atomic(_arquivo(), lambda f: np.savez(f, **dados), binary=True)
+
+
+def _carregar() -> Optional[dict]:
+    """Cubo atual, relido do disco só quando outro worker o regravou"""
+    try:
+        mtime = os.stat(_arquivo()).st_mtime_ns
+    except OSError:
+        return None
+    with _cache_lock:
+        if _cache['mtime'] != mtime:
+            _cache['dados'] = _ler_arquivo()
+            _cache['mtime'] = mtime
+        return _cache['dados']
+
+
+def _cubo() -> Optional[dict]:
+    """Cubo para consultas (garante a thread de atualização; None se ainda não existe)"""
+    if _state['enabled']:
+        _garantir_atualizacao()
+    return _carregar()
+
+
+def carregar_cubo() -> dict:
+    """
+    Cubo em disco, para várias consultas de uma mesma requisição (ver totais_por_dia)
+
+    Raises:
+        CuboIndisponivelError: O cubo ainda não foi gerado
+    """
+    dados = _cubo()
+    if dados is None:
+        raise CuboIndisponivelError(SEM_CUBO)
+    return dados
+
+
+def _agregar(dia, hora, metodo, produto, medidas: dict):
+    """
+    Soma linhas repetidas de (dia, hora, metodo, produto)
+
+    Returns:
+        (dia, hora, metodo, produto, medidas) ordenados pela chave, sem repetições
+    """
+    if not len(dia):
+        return dia, hora, metodo, produto, medidas
+    # Chave única de 63 bits: dia (17) | hora (5) | metodo (10) | produto (31)
+    chave = (((dia.astype(np.int64) << 5 | hora) << 10 | metodo) << 31) | produto
+    # Ordenação estável: o cubo antigo já vem ordenado, só os itens novos se movem
+    ordem = np.argsort(chave, kind='stable')
+    chave = chave[ordem]
+    novo = np.ones(len(chave), dtype=bool)
+    novo[1:] = chave[1:] != chave[:-1]
+    inicios = np.flatnonzero(novo)
+    primeiros = ordem[inicios]
+    return (
+        dia[primeiros], hora[primeiros], metodo[primeiros], produto[primeiros],
+        {nome: np.add.reduceat(valores[ordem], inicios) for nome, valores in medidas.items()},
+    )
+
+
+def _somar_diario(dados: dict, dia, receita, dia_venda) -> dict:
+    """Soma receita (por item) e vendas (por venda) nos totais por dia, ampliando o intervalo se preciso"""
+    antigo_inicio, antigo_receita = dados['diario_inicio'], dados['diario_receita']
+    dias = np.concatenate([dia, dia_venda])
+    if not len(dias):
+        return {}
+    inicio = int(dias.min())
+    fim = int(dias.max())
+    if len(antigo_receita):
+        inicio = min(inicio, antigo_inicio)
+        fim = max(fim, antigo_inicio + len(antigo_receita) - 1)
+    tamanho = fim - inicio + 1
+    receita_dia = np.zeros(tamanho, dtype=np.float64)
+    vendas_dia = np.zeros(tamanho, dtype=np.int64)
+    deslocamento = antigo_inicio - inicio
+    receita_dia[deslocamento:deslocamento + len(antigo_receita)] = antigo_receita
+    vendas_dia[deslocamento:deslocamento + len(antigo_receita)] = dados['diario_vendas']
+    receita_dia += np.bincount(dia - inicio, weights=receita, minlength=tamanho)
+    vendas_dia += np.bincount(dia_venda - inicio, minlength=tamanho)
+    return {'diario_inicio': inicio, 'diario_receita': receita_dia, 'diario_vendas': vendas_dia}
+
+
+def _ler_itens(desde_id: int) -> list:
+    """Itens com id > desde_id, com data e forma de pagamento da venda"""
+    return execute_read_all(
+        lambda: supabase_client()
+        .table("itens_vendas")
+        .select("id, id_vendas, id_produto, quantidade, subtotal, vendas(data_venda, metodo_pagamento)")
+        .gt("id", desde_id)
+        .order("id")
+    )
+
+
+def _codificar(dicionario: np.ndarray, valores: list, dtype) -> tuple:
+    """
+    Códigos dos valores no dicionário, acrescentando os que faltam
+
+    Returns:
+        (dicionário atualizado, array de códigos)
+    """
+    codigos = {valor: codigo for codigo, valor in enumerate(dicionario.tolist())}
+    novos = []
+    resultado = np.empty(len(valores), dtype=dtype)
+    for i, valor in enumerate(valores):
+        codigo = codigos.get(valor)
+        if codigo is None:
+            codigo = codigos[valor] = len(codigos)
+            novos.append(valor)
+        resultado[i] = codigo
+    if novos:
+        # Strings: o tamanho do tipo (<U...) cresce com o maior nome
+        novos = np.array(novos) if dicionario.dtype.kind == 'U' else np.array(novos, dtype=dicionario.dtype)
+        dicionario = np.concatenate([dicionario, novos])
+    return dicionario, resultado
+
+
+def _somar_itens(dados: dict, itens: list) -> dict:
+    """Acrescenta itens ao cubo (ignorando ids já somados)"""
+    ja_somados = set(dados['ids_recentes'].tolist())
+    novos = [
+        item for item in itens
+        if item.get('id') not in ja_somados and isinstance(item.get('vendas'), dict)
+    ]
+    datas = parse_date_column([item['vendas'].get('data_venda') for item in novos])
+    linhas = [(item, data) for item, data in zip(novos, datas) if data is not None]
+    n = len(linhas)
+
+    dia = np.fromiter(
+        (dia_numero(data.date() if isinstance(data, datetime) else data) for _i, data in linhas),
+        dtype=np.int32, count=n
+    )
+    hora = np.fromiter(
+        (data.hour if isinstance(data, datetime) else 0 for _i, data in linhas), dtype=np.int8, count=n
+    )
+    metodos, metodo = _codificar(
+        dados['metodos'], [item['vendas'].get('metodo_pagamento') or '' for item, _d in linhas], np.int16
+    )
+    # Produto removido (id_produto nulo) vira o id 0: conta na receita, não em produto algum
+    produtos, produto = _codificar(
+        dados['produtos'], [int(item.get('id_produto') or 0) for item, _d in linhas], np.int32
+    )
+    quantidade = np.fromiter((float(item.get('quantidade') or 0) for item, _d in linhas), dtype=np.float64, count=n)
+    receita = np.fromiter((float(item.get('subtotal') or 0) for item, _d in linhas), dtype=np.float64, count=n)
+
+    # Cada venda conta uma vez, no primeiro item novo dela
+    primeiro_da_venda = {}
+    for i, (item, _d) in enumerate(linhas):
+        primeiro_da_venda.setdefault(item.get('id_vendas'), i)
+    contadas = np.fromiter(primeiro_da_venda.values(), dtype=np.intp, count=len(primeiro_da_venda))
+
+    dia_c, hora_c, metodo_c, produto_c, medidas = _agregar(
+        np.concatenate([dados['dia'], dia]),
+        np.concatenate([dados['hora'], hora]),
+        np.concatenate([dados['metodo'], metodo]),
+        np.concatenate([dados['produto'], produto]),
+        {
+            'quantidade': np.concatenate([dados['quantidade'], quantidade]),
+            'receita': np.concatenate([dados['receita'], receita]),
+        },
+    )
+    vendas_dia, vendas_hora, vendas_metodo, _p, vendas = _agregar(
+        np.concatenate([dados['vendas_dia'], dia[contadas]]),
+        np.concatenate([dados['vendas_hora'], hora[contadas]]),
+        np.concatenate([dados['vendas_metodo'], metodo[contadas]]),
+        np.zeros(len(dados['vendas_dia']) + len(contadas), dtype=np.int32),
+        {'num': np.concatenate([dados['vendas_num'], np.ones(len(contadas), dtype=np.int64)])},
+    )
+
+    ultimo = max([dados['ultimo_item']] + [int(item['id']) for item in itens])
+    ids = np.concatenate([dados['ids_recentes'], np.array([int(item['id']) for item in novos], dtype=np.int64)])
+    return dict(
+        dados,
+        dia=dia_c, hora=hora_c, metodo=metodo_c, produto=produto_c,
+        quantidade=medidas['quantidade'], receita=medidas['receita'],
+        vendas_dia=vendas_dia, vendas_hora=vendas_hora, vendas_metodo=vendas_metodo, vendas_num=vendas['num'],
+        produtos=produtos,
+        produto_fornecedor=np.concatenate([
+            dados['produto_fornecedor'], np.zeros(len(produtos) - len(dados['produtos']), dtype=np.int64)
+        ]),
+        metodos=metodos,
+        **_somar_diario(dados, dia, receita, dia[contadas]),
+        ids_recentes=ids[ids > ultimo - _MARGEM_ITENS],
+        ultimo_item=ultimo,
+        atualizado_em=time.time(),
+    )
+
+
+def _atualizar_fornecedores(dados: dict, produtos_antes: int) -> dict:
+    """Relê o fornecedor dos produtos se surgiu produto novo ou a leitura venceu"""
+    vencido = time.time() - dados['fornecedores_em'] >= _FORNECEDORES_VALIDADE
+    if len(dados['produtos']) == produtos_antes and not vencido:
+        return dados
+    linhas = execute_read_all(
+        lambda: supabase_client().table("produtos").select("id, id_fornecedor").order("id")
+    )
+    fornecedor_de = {int(linha['id']): int(linha.get('id_fornecedor') or 0) for linha in linhas}
+    # Produtos apagados mantêm o último fornecedor conhecido
+    atual = dados['produto_fornecedor'].tolist()
+    fornecedores = [fornecedor_de.get(pid, atual[i]) for i, pid in enumerate(dados['produtos'].tolist())]
+    return dict(
+        dados,
+        produto_fornecedor=np.array(fornecedores, dtype=np.int64),
+        fornecedores_em=time.time(),
+    )
+
+
+def atualizar_cubo(forcar: bool = False) -> dict:
+    """
+    Soma ao cubo os itens vendidos desde a última atualização
+
+    Args:
+        forcar: Atualiza mesmo que a última atualização seja recente
+
+    Returns:
+        Cubo atualizado (colunas e dicionários)
+    """
+    dados = _carregar()
+    if dados is not None and not forcar and time.time() - dados['atualizado_em'] < _state['intervalo']:
+        return dados
+    with shared_lock(_arquivo()):
+        # Outro worker pode ter atualizado enquanto esperávamos a trava
+        dados = _carregar()
+        if dados is not None and not forcar and time.time() - dados['atualizado_em'] < _state['intervalo']:
+            return dados
+        dados = dados or _vazio()
+        produtos_antes = len(dados['produtos'])
+        dados = _somar_itens(dados, _ler_itens(max(dados['ultimo_item'] - _MARGEM_ITENS, 0)))
+        dados = _atualizar_fornecedores(dados, produtos_antes)
+        _gravar_arquivo(dados)
+    return dados
+
+
+def reconstruir_cubo() -> dict:
+    """Refaz o cubo do zero lendo todos os itens (remove vendas apagadas)"""
+    with shared_lock(_arquivo()):
+        dados = _somar_itens(_vazio(), _ler_itens(0))
+        dados = _atualizar_fornecedores(dados, -1)
+        _gravar_arquivo(dados)
+    return dados
+
+
+def _loop_atualizacao():
+    while True:
+        try:
+            atualizar_cubo()
+        except Exception:
+            logger.exception("Falha ao atualizar o cubo de vendas")
+        time.sleep(_state['intervalo'])
+
+
+def _reset_after_fork():
+    """Descarta a trava herdada do processo pai (a thread não sobrevive ao fork)"""
+    global _atualizacao_lock, _cache_lock
+    _atualizacao_lock = threading.Lock()
+    _cache_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _garantir_atualizacao():
+    """Inicia a thread de atualização do cubo deste worker (uma vez por processo)"""
+    pid = os.getpid()
+    if _state['pid'] == pid:
+        return
+    with _atualizacao_lock:
+        if _state['pid'] == pid:
+            return
+        _state['pid'] = pid
+        threading.Thread(target=_loop_atualizacao, name='mercadim-atualizar-cubo', daemon=True).start()
+
+
+def _recorte_dias(dias: np.ndarray, inicio: int, fim: int) -> slice:
+    """Linhas de dias em [inicio, fim] (colunas ordenadas por dia)"""
+    return slice(
+        int(np.searchsorted(dias, inicio, side='left')),
+        int(np.searchsorted(dias, fim, side='right')),
+    )
+
+
+def vendas_por_dia(produto_ids: np.ndarray, dias: int, ate: Optional[date] = None):
+    """
+    Matriz de quantidades vendidas: uma linha por produto, uma coluna por dia
+
+    Args:
+        produto_ids: IDs dos produtos (ordem das linhas)
+        dias: Número de dias da janela (colunas), terminando em 'ate'
+        ate: Último dia da janela (padrão: hoje)
+
+    Returns:
+        np.ndarray float64 de formato (len(produto_ids), dias); a última coluna é 'ate'
+
+    Raises:
+        CuboIndisponivelError: O cubo ainda não foi gerado
+    """
+    dados = carregar_cubo()
+    fim = dia_numero(ate or now_local().date())
+    inicio = fim - dias + 1
+    matriz = np.zeros((len(produto_ids), dias), dtype=np.float64)
+    if not len(produto_ids) or not len(dados['produtos']):
+        return matriz
+
+    # Linha da matriz de cada código do dicionário (-1 = produto fora da lista)
+    ordem = np.argsort(produto_ids, kind='stable')
+    posicao = np.minimum(np.searchsorted(produto_ids, dados['produtos'], sorter=ordem), len(produto_ids) - 1)
+    linha_do_codigo = np.where(produto_ids[ordem[posicao]] == dados['produtos'], ordem[posicao], -1)
+
+    recorte = _recorte_dias(dados['dia'], inicio, fim)
+    linha = linha_do_codigo[dados['produto'][recorte]]
+    encontrado = linha >= 0
+    np.add.at(
+        matriz,
+        (linha[encontrado], dados['dia'][recorte][encontrado] - inicio),
+        dados['quantidade'][recorte][encontrado]
+    )
+    return matriz
+
+
+def totais_por_dia(dias: int, ate: Optional[date] = None, dados: Optional[dict] = None) -> dict:
+    """
+    Receita e número de vendas de cada dia de uma janela
+
+    Args:
+        dias: Número de dias da janela, terminando em 'ate'
+        ate: Último dia da janela (padrão: hoje)
+        dados: Cubo já carregado (carregar_cubo); padrão: lê o atual
+
+    Returns:
+        {'receita': np.ndarray float64, 'vendas': np.ndarray int64}, um valor por
+        dia (o último é 'ate'); dias sem venda valem zero
+
+    Raises:
+        CuboIndisponivelError: O cubo ainda não foi gerado
+    """
+    if dados is None:
+        dados = carregar_cubo()
+    inicio = dia_numero(ate or now_local().date()) - dias + 1
+    receita = np.zeros(dias, dtype=np.float64)
+    vendas = np.zeros(dias, dtype=np.int64)
+    # Interseção da janela com os dias guardados
+    de = max(inicio, dados['diario_inicio'])
+    ate_dia = min(inicio + dias, dados['diario_inicio'] + len(dados['diario_receita']))
+    if de < ate_dia:
+        origem = slice(de - dados['diario_inicio'], ate_dia - dados['diario_inicio'])
+        receita[de - inicio:ate_dia - inicio] = dados['diario_receita'][origem]
+        vendas[de - inicio:ate_dia - inicio] = dados['diario_vendas'][origem]
+    return {'receita': receita, 'vendas': vendas}
+
+
+def _codigos_filtro(dicionario: np.ndarray, valores) -> np.ndarray:
+    """Códigos dos valores presentes no dicionário (ausentes são ignorados)"""
+    return np.flatnonzero(np.isin(dicionario, np.asarray(list(valores), dtype=dicionario.dtype)))
+
+
+def consultar_vendas(inicio, fim=None, por=(), metodo=None, produto=None, fornecedor=None,
+                     dia_semana=None, hora=None):
+    """
+    Receita, quantidade e número de vendas de um período, agrupados por dimensões
+
+    Args:
+        inicio, fim: Primeiro e último dia (date ou ISO; fim padrão: hoje)
+        por: Dimensões do agrupamento, na ordem das linhas (ver DIMENSOES);
+             vazio = só o total
+        metodo, produto, fornecedor, dia_semana, hora: Filtros (listas de valores).
+             dia_semana: 0 = segunda ... 6 = domingo; fornecedor 0 = sem fornecedor;
+             produto 0 = itens de produtos já removidos
+
+    Returns:
+        {
+            'success': bool,
+            'data': {
+                'inicio', 'fim': str ISO,
+                'por': list,
+                'linhas': [{<dimensão>: valor, 'receita', 'quantidade', 'vendas'}],
+                'total': {'receita', 'quantidade', 'vendas'}
+            } (se success=True),
+            'error': str (se success=False)
+        }
+        'vendas' é None quando há agrupamento ou filtro por produto/fornecedor
+        (uma venda com vários produtos não se divide entre eles). Antes da
+        primeira atualização do cubo: success=False com 'data' vazio.
+    """
+    try:
+        por = list(por)
+        invalidas = [d for d in por if d not in DIMENSOES]
+        if invalidas or len(set(por)) != len(por):
+            return {"success": False, "error": f"Dimensões inválidas: {', '.join(invalidas) or 'repetidas'}"}
+        inicio = parse_date_value(inicio)
+        fim = parse_date_value(fim) if fim else now_local().date()
+        if inicio is None or fim is None:
+            return {"success": False, "error": "Datas inválidas (use AAAA-MM-DD)"}
+        inicio = inicio.date() if isinstance(inicio, datetime) else inicio
+        fim = fim.date() if isinstance(fim, datetime) else fim
+
+        dados = _cubo()
+        gerado = dados is not None
+        dados = dados if gerado else _vazio()
+        intervalo = (dia_numero(inicio), dia_numero(fim))
+        filtros = {'metodo': metodo, 'dia_semana': dia_semana, 'hora': hora}
+        itens = _agrupar(dados, '', *intervalo, por, dict(filtros, produto=produto, fornecedor=fornecedor))
+        # Vendas só existem no grão sem produto
+        por_produto = produto is not None or fornecedor is not None or bool({'produto', 'fornecedor'} & set(por))
+        vendas = {} if por_produto else _agrupar(dados, 'vendas_', *intervalo, por, filtros)
+
+        linhas = []
+        # Sem fornecedor (None) por último
+        for chave in sorted(set(itens) | set(vendas), key=lambda chave: [(v is None, v) for v in chave]):
+            receita, quantidade = itens.get(chave, (0.0, 0.0))
+            linha = dict(zip(por, chave))
+            linha.update(
+                receita=round(receita, 2),
+                quantidade=round(quantidade, 3),
+                vendas=None if por_produto else int(vendas.get(chave, (0,))[0]),
+            )
+            linhas.append(linha)
+
+        resposta = {
+            "success": gerado,
+            "data": {
+                "inicio": inicio.isoformat(),
+                "fim": fim.isoformat(),
+                "por": por,
+                "linhas": linhas,
+                "total": {
+                    "receita": round(sum(v[0] for v in itens.values()), 2),
+                    "quantidade": round(sum(v[1] for v in itens.values()), 3),
+                    "vendas": None if por_produto else int(sum(v[0] for v in vendas.values())),
+                },
+            }
+        }
+        if not gerado:
+            resposta["error"] = SEM_CUBO
+        return resposta
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def _agrupar(dados: dict, prefixo: str, inicio: int, fim: int, por: list, filtros: dict) -> dict:
+    """
+    Soma agrupada sobre o recorte de dias do cubo de itens ('') ou de vendas ('vendas_')
+
+    Returns:
+        {tupla de valores das dimensões: tupla de somas}; somas do cubo de itens
+        são (receita, quantidade), do cubo de vendas (vendas,)
+    """
+    recorte = _recorte_dias(dados[prefixo + 'dia'], inicio, fim)
+    dia = dados[prefixo + 'dia'][recorte]
+    # Código de cada linha por dimensão (inteiros >= 0)
+    colunas = {
+        'dia': lambda: dia - inicio,
+        'dia_semana': lambda: (dia + 3) % 7,
+        'hora': lambda: dados[prefixo + 'hora'][recorte],
+        'metodo': lambda: dados[prefixo + 'metodo'][recorte],
+    }
+    if prefixo:
+        medidas = [dados['vendas_num'][recorte]]
+    else:
+        fornecedores, fornecedor_do_codigo = np.unique(dados['produto_fornecedor'], return_inverse=True)
+        fornecedor_do_codigo = fornecedor_do_codigo.reshape(-1)
+        colunas['produto'] = lambda: dados['produto'][recorte]
+        colunas['fornecedor'] = lambda: fornecedor_do_codigo[dados['produto'][recorte]]
+        medidas = [dados['receita'][recorte], dados['quantidade'][recorte]]
+
+    # Filtros: valores pedidos -> códigos das colunas
+    mascara = np.ones(len(dia), dtype=bool)
+    for nome, valores in filtros.items():
+        if valores is None:
+            continue
+        if nome == 'metodo':
+            codigos = _codigos_filtro(dados['metodos'], valores)
+        elif nome == 'produto':
+            codigos = _codigos_filtro(dados['produtos'], valores)
+        elif nome == 'fornecedor':
+            codigos = _codigos_filtro(fornecedores, valores)
+        else:
+            codigos = np.asarray(list(valores), dtype=np.int64)
+        mascara &= np.isin(colunas[nome](), codigos)
+    if not mascara.any():
+        return {}
+
+    # Um número por combinação de dimensões; soma por grupo com bincount
+    chaves = [colunas[nome]()[mascara].astype(np.int64) for nome in por]
+    tamanhos = [int(chave.max()) + 1 for chave in chaves]
+    grupo = np.ravel_multi_index(chaves, tamanhos) if chaves else np.zeros(int(mascara.sum()), dtype=np.int64)
+    celulas = int(np.prod(tamanhos))
+    if celulas <= len(grupo) + 65536:
+        # Poucas combinações possíveis (dia × hora...): soma direta, sem ordenar
+        linhas_grupo = np.bincount(grupo, minlength=celulas)
+        grupos = np.flatnonzero(linhas_grupo)
+        somas = [np.bincount(grupo, weights=m[mascara], minlength=celulas)[grupos] for m in medidas]
+    else:
+        grupos, indice = np.unique(grupo, return_inverse=True)
+        somas = [np.bincount(indice.reshape(-1), weights=m[mascara], minlength=len(grupos)) for m in medidas]
+
+    rotulos = {
+        'dia': lambda codigo: numero_dia(inicio + codigo).isoformat(),
+        'dia_semana': int,
+        'hora': int,
+        'metodo': lambda codigo: str(dados['metodos'][codigo]),
+        'produto': lambda codigo: int(dados['produtos'][codigo]),
+        'fornecedor': lambda codigo: int(fornecedores[codigo]) or None,
+    }
+    dimensoes = [
+        [rotulos[nome](int(codigo)) for codigo in codigos]
+        for nome, codigos in zip(por, np.unravel_index(grupos, tamanhos) if chaves else [])
+    ]
+    return {
+        tuple(d[g] for d in dimensoes): tuple(float(s[g]) for s in somas)
+        for g in range(len(grupos))
+    }
@@ -29,6 +29,11 @@ def login_required(f):
         access_token = session.get('access_token')
         result = get_user(access_token)
 
+        if not result['success'] and result.get('unavailable'):
+            # DECISÃO: Auth fora do ar não significa token inválido
+            # Mantém a sessão e responde 503 para o usuário tentar novamente
+            return 'Serviço de autenticação indisponível. Tente novamente em instantes.', 503
+
         if not result['success']:
             # Token inválido ou expirado
             session.clear()
@@ -10,6 +10,7 @@ DECISÃO: Criar uma camada de serviço para:
 """
 from typing import Dict, Optional, Any
 from src.core.database import supabase_client
+from src.core.resilience import call_with_retry, auth_breaker, is_transient_error, CircuitOpenError
 
 
 def login(email: str, password: str) -> Dict[str, Any]:
@@ -33,10 +34,16 @@ def login(email: str, password: str) -> Dict[str, Any]:
     try:
         # O Supabase retorna um objeto AuthResponse, não um dict
         # Precisamos acessar .user e .session como atributos
-        response = supabase_client().auth.sign_in_with_password({
-            'email': email,
-            'password': password
-        })
+        # DECISÃO: Login passa pelo circuit breaker, mas sem retry
+        # (cada tentativa conta para MAX_LOGIN_ATTEMPTS)
+        response = call_with_retry(
+            lambda: supabase_client().auth.sign_in_with_password({
+                'email': email,
+                'password': password
+            }),
+            breaker=auth_breaker,
+            retry=False
+        )
         
         # Verifica se a resposta tem os dados necessários
         if response.user and response.session:
@@ -86,12 +93,17 @@ def get_user(access_token: str) -> Dict[str, Any]:
         {
             'success': bool,
             'data': User (se success=True),
-            'error': str (se success=False)
+            'error': str (se success=False),
+            'unavailable': bool (True se o serviço de auth estiver fora do ar)
         }
     """
     try:
         # O Supabase retorna um objeto UserResponse
-        response = supabase_client().auth.get_user(access_token)
+        # DECISÃO: Validar token é leitura idempotente, então pode ser retentada
+        response = call_with_retry(
+            lambda: supabase_client().auth.get_user(access_token),
+            breaker=auth_breaker
+        )
         
         if response.user:
             return {
@@ -105,6 +117,14 @@ def get_user(access_token: str) -> Dict[str, Any]:
             }
             
     except Exception as e:
+        # DECISÃO: Diferenciar "token inválido" de "auth fora do ar"
+        # Com o backend indisponível a sessão local não deve ser descartada
+        if isinstance(e, CircuitOpenError) or is_transient_error(e):
+            return {
+                'success': False,
+                'unavailable': True,
+                'error': 'Serviço de autenticação indisponível no momento'
+            }
         error_message = str(e)
         if 'JWT' in error_message or 'expired' in error_message.lower() or 'invalid' in error_message.lower():
             return {
@@ -0,0 +1,3 @@
+from .compras_routes import compras_bp
+
+__all__ = ['compras_bp']
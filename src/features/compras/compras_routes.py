@@ -0,0 +1,74 @@
+from flask import Blueprint, render_template, session, request, jsonify, current_app, flash
+from src.common.formatting import format_currency, format_number, format_quantity
+from src.features.auth.auth_decorators import login_required
+from src.features.compras.compras_service import get_sugestoes_compra
+
+compras_bp = Blueprint('compras', __name__, url_prefix='/compras')
+
+
+def _parametros():
+    """Parâmetros do cálculo: configuração do app, janela ajustável por ?janela="""
+    config = current_app.config
+    janela = request.args.get('janela', config.get('COMPRAS_JANELA_DIAS', 28), type=int)
+    return {
+        'janela': min(max(janela, 7), 365),
+        'prazo_padrao': config.get('COMPRAS_PRAZO_PADRAO', 7),
+        'nivel_servico': config.get('COMPRAS_NIVEL_SERVICO', 1.65),
+        'custo_manutencao': config.get('COMPRAS_CUSTO_MANUTENCAO', 0.25),
+        'dias_cobertura': config.get('COMPRAS_DIAS_COBERTURA', 7),
+    }
+
+
+@compras_bp.route('/sugestoes')
+@login_required
+def sugestoes_view():
+    """Relatório de sugestões de compra por fornecedor"""
+    logged_user = session.get('user', {})
+    parametros = _parametros()
+
+    result = get_sugestoes_compra(**parametros)
+
+    if not result['success']:
+        flash(f'Erro ao calcular sugestões: {result.get("error", "Erro desconhecido")}', 'error')
+        result['data'] = {'fornecedores': [], 'produtos_analisados': 0}
+
+    headers = ["Produto", "Estoque", "Venda/dia", "Dura (dias)", "Ponto de pedido", "Pedir", "Custo"]
+    grupos = []
+    for grupo in result['data']['fornecedores']:
+        fornecedor = grupo['fornecedor']
+        grupos.append({
+            'nome': fornecedor['nome_fantasia'],
+            'prazo': fornecedor['prazo_entrega'],
+            'frete': format_currency(fornecedor['frete']),
+            'total': format_currency(grupo['custo_total']),
+            'rows': [
+                [
+                    item['nome'],
+                    format_quantity(item['quantidade'], item['uni_medida']),
+                    format_number(item['demanda_diaria']),
+                    format_number(item['dias_restantes'], 1),
+                    format_number(item['ponto_pedido']),
+                    format_quantity(item['sugerido'], item['uni_medida']),
+                    format_currency(item['custo']),
+                ]
+                for item in grupo['itens']
+            ],
+        })
+
+    return render_template(
+        'compras/sugestoes.html',
+        title="Sugestões de Compra",
+        headers=headers,
+        grupos=grupos,
+        janela=parametros['janela'],
+        produtos_analisados=result['data']['produtos_analisados'],
+        user=logged_user
+    )
+
+
+@compras_bp.route('/sugestoes.json')
+@login_required
+def sugestoes_json():
+    """Sugestões de compra por fornecedor (JSON)"""
+    result = get_sugestoes_compra(**_parametros())
+    return jsonify(result), 200 if result['success'] else 500
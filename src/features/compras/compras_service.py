@@ -0,0 +1,186 @@
+"""
+Sugestões de compra por fornecedor a partir da velocidade de vendas
+
+Para cada produto: demanda diária (média das vendas dos últimos N dias, dias
+sem venda contam como zero), estoque de segurança pela variação diária e pelo
+prazo de entrega do fornecedor, ponto de pedido e quantidade a pedir.
+
+DECISÃO: Cálculo vetorizado sobre o catálogo inteiro (NumPy)
+As vendas vêm do rollup diário (analise_service) como matriz produto × dia;
+todas as fórmulas são operações sobre arrays, sem laço por produto
+(benchmarks/sugestoes_compra.py mede 50 mil produtos).
+
+DECISÃO: Frete rateado entre os produtos do fornecedor
+O frete é um custo por pedido. Ele entra no lote econômico de cada produto,
+sqrt(2 × demanda anual × custo do pedido / custo anual de manter uma unidade),
+na proporção do valor que o produto representa no consumo do fornecedor:
+frete caro leva a pedidos maiores e menos frequentes.
+"""
+
+import numpy as np
+
+from src.core.database import supabase_client
+from src.core.resilience import execute_read_all
+from src.common.dates import now_local
+from src.features.analise.analise_service import vendas_por_dia
+
+
+def calcular_sugestoes(vendas, quantidade, custo, fornecedor, frete, prazo,
+                       nivel_servico: float = 1.65, custo_manutencao: float = 0.25,
+                       dias_cobertura: float = 7):
+    """
+    Calcula ponto de pedido e quantidade sugerida para todos os produtos de uma vez
+
+    Args:
+        vendas: Matriz (produtos × dias) de quantidades vendidas por dia
+        quantidade: Estoque atual por produto
+        custo: Preço de custo por produto
+        fornecedor: Índice do fornecedor de cada produto em frete/prazo
+        frete: Custo de um pedido, por fornecedor
+        prazo: Dias entre o pedido e a chegada, por fornecedor
+        nivel_servico: Fator z do estoque de segurança (1.65 ≈ 95% dos dias sem ruptura)
+        custo_manutencao: Custo anual de manter estoque, em fração do custo (0.25 = 25%)
+        dias_cobertura: Cobertura mínima de cada pedido, em dias de demanda
+
+    Returns:
+        dict de arrays por produto: demanda, estoque_seguranca, ponto_pedido,
+        lote, sugerido, dias_restantes (inf sem demanda)
+    """
+    vendas = np.asarray(vendas, dtype=np.float64)
+    quantidade = np.asarray(quantidade, dtype=np.float64)
+    custo = np.asarray(custo, dtype=np.float64)
+    fornecedor = np.asarray(fornecedor, dtype=np.intp)
+    frete = np.asarray(frete, dtype=np.float64)
+    prazo = np.asarray(prazo, dtype=np.float64)[fornecedor]
+
+    demanda = vendas.mean(axis=1) if vendas.shape[1] else np.zeros(len(quantidade))
+    desvio = vendas.std(axis=1) if vendas.shape[1] else np.zeros(len(quantidade))
+    estoque_seguranca = nivel_servico * desvio * np.sqrt(prazo)
+    ponto_pedido = demanda * prazo + estoque_seguranca
+
+    # Parte do frete de cada produto: sua fatia do consumo (em R$) do fornecedor
+    consumo = demanda * custo
+    consumo_fornecedor = np.bincount(fornecedor, weights=consumo, minlength=len(frete))[fornecedor]
+    parte_frete = frete[fornecedor] * np.divide(
+        consumo, consumo_fornecedor, out=np.zeros_like(consumo), where=consumo_fornecedor > 0
+    )
+    manutencao = custo * custo_manutencao
+    lote_economico = np.sqrt(np.divide(
+        2 * demanda * 365 * parte_frete, manutencao, out=np.zeros_like(consumo), where=manutencao > 0
+    ))
+    lote = np.maximum(lote_economico, demanda * dias_cobertura)
+
+    pedir = (demanda > 0) & (quantidade <= ponto_pedido)
+    # Tolerância: 2.0000000001 não vira 3
+    sugerido = np.where(pedir, np.maximum(np.ceil(ponto_pedido + lote - quantidade - 1e-9), 0), 0)
+    dias_restantes = np.divide(
+        np.maximum(quantidade, 0), demanda, out=np.full_like(demanda, np.inf), where=demanda > 0
+    )
+    return {
+        'demanda': demanda,
+        'estoque_seguranca': estoque_seguranca,
+        'ponto_pedido': ponto_pedido,
+        'lote': lote,
+        'sugerido': sugerido,
+        'dias_restantes': dias_restantes,
+    }
+
+
+def get_sugestoes_compra(janela: int = 28, prazo_padrao: int = 7, nivel_servico: float = 1.65,
+                         custo_manutencao: float = 0.25, dias_cobertura: float = 7):
+    """
+    Sugestões de compra agrupadas por fornecedor
+
+    Args:
+        janela: Dias de vendas da média móvel
+        prazo_padrao: Prazo de entrega de fornecedores sem prazo cadastrado
+        nivel_servico, custo_manutencao, dias_cobertura: ver calcular_sugestoes
+
+    Returns:
+        {
+            'success': bool,
+            'data': {
+                'janela': int,
+                'gerado_em': str ISO,
+                'produtos_analisados': int,
+                'fornecedores': [{
+                    'fornecedor': {'id', 'nome_fantasia', 'frete', 'prazo_entrega'},
+                    'itens': [{'id', 'nome', 'uni_medida', 'quantidade', 'demanda_diaria',
+                               'dias_restantes', 'ponto_pedido', 'sugerido', 'custo'}],
+                    'custo_total': float (itens + frete)
+                }]
+            } (se success=True),
+            'error': str (se success=False)
+        }
+    """
+    try:
+        produtos = execute_read_all(
+            lambda: supabase_client().table("produtos")
+            .select("id, nome, quantidade, preco_custo, uni_medida, id_fornecedor").order("id")
+        )
+        fornecedores = execute_read_all(
+            lambda: supabase_client().table("fornecedores")
+            .select("id, nome_fantasia, frete, prazo_entrega").order("id")
+        )
+
+        # Índice 0 = sem fornecedor (sem frete, prazo padrão)
+        grupos = [{'id': None, 'nome_fantasia': 'Sem fornecedor', 'frete': 0.0, 'prazo_entrega': prazo_padrao}]
+        indice_fornecedor = {}
+        for f in fornecedores:
+            indice_fornecedor[f.get('id')] = len(grupos)
+            grupos.append({
+                'id': f.get('id'),
+                'nome_fantasia': f.get('nome_fantasia') or '',
+                'frete': float(f.get('frete') or 0),
+                'prazo_entrega': int(f['prazo_entrega']) if f.get('prazo_entrega') is not None else prazo_padrao,
+            })
+
+        ids = np.array([int(p['id']) for p in produtos], dtype=np.int64)
+        resultado = calcular_sugestoes(
+            vendas_por_dia(ids, janela),
+            np.array([float(p.get('quantidade') or 0) for p in produtos]),
+            np.array([float(p.get('preco_custo') or 0) for p in produtos]),
+            np.array([indice_fornecedor.get(p.get('id_fornecedor'), 0) for p in produtos], dtype=np.intp),
+            np.array([g['frete'] for g in grupos]),
+            np.array([g['prazo_entrega'] for g in grupos], dtype=np.float64),
+            nivel_servico, custo_manutencao, dias_cobertura,
+        )
+
+        por_fornecedor = {}
+        for i in np.flatnonzero(resultado['sugerido'] > 0):
+            produto = produtos[i]
+            custo = float(produto.get('preco_custo') or 0)
+            por_fornecedor.setdefault(indice_fornecedor.get(produto.get('id_fornecedor'), 0), []).append({
+                'id': produto.get('id'),
+                'nome': produto.get('nome', ''),
+                'uni_medida': produto.get('uni_medida', ''),
+                'quantidade': float(produto.get('quantidade') or 0),
+                'demanda_diaria': round(float(resultado['demanda'][i]), 3),
+                'dias_restantes': round(float(resultado['dias_restantes'][i]), 1),
+                'ponto_pedido': round(float(resultado['ponto_pedido'][i]), 2),
+                'sugerido': float(resultado['sugerido'][i]),
+                'custo': round(float(resultado['sugerido'][i]) * custo, 2),
+            })
+
+        lista = []
+        for indice, itens in por_fornecedor.items():
+            itens.sort(key=lambda item: item['dias_restantes'])
+            lista.append({
+                'fornecedor': grupos[indice],
+                'itens': itens,
+                'custo_total': round(sum(item['custo'] for item in itens) + grupos[indice]['frete'], 2),
+            })
+        # Fornecedores em ordem alfabética; sem fornecedor por último
+        lista.sort(key=lambda g: (g['fornecedor']['id'] is None, g['fornecedor']['nome_fantasia'].lower()))
+
+        return {
+            "success": True,
+            "data": {
+                "janela": janela,
+                "gerado_em": now_local().isoformat(),
+                "produtos_analisados": len(produtos),
+                "fornecedores": lista,
+            }
+        }
+    except Exception as e:
+        return {"success": False, "error": str(e)}
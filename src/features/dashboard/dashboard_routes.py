@@ -1,16 +1,7 @@
-from flask import Blueprint, render_template, session, redirect, url_for
+from flask import Blueprint, render_template, session, redirect, url_for, flash, request
 from src.features.auth.auth_decorators import login_required
-from src.features.dashboard.dashboard_service import (
-    get_produtos_proximos_vencimento,
-    get_produto_mais_vendido,
-    get_produtos_estoque_baixo,
-    get_receita_periodo,
-    get_vendas_dia,
-    get_top_produtos_vendidos,
-    get_valor_total_estoque,
-    get_vendas_ultimos_dias,
-    get_ticket_medio
-)
+from src.features.dashboard.dashboard_service import get_dashboard_data, get_dashboard_data_async, JANELAS_GRAFICO
+from src.core.async_database import run_async, use_async_services
 
 dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/dashboard')
 
@@ -20,17 +11,33 @@ dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/dashboard')
 def dashboard_view():
     """Rota do dashboard com cards informativos"""
     logged_user = session.get('user', {})
-    
+
+    # Janela do gráfico: ?dias=7 | 30 | 90 | 365
+    dias = request.args.get('dias', 7, type=int)
+    if dias not in JANELAS_GRAFICO:
+        dias = 7
+
     # Busca os dados para os cards
-    produtos_vencimento = get_produtos_proximos_vencimento(30)
-    produto_mais_vendido = get_produto_mais_vendido()
-    produtos_estoque_baixo = get_produtos_estoque_baixo(10)
-    receita_data = get_receita_periodo()
-    vendas_data = get_vendas_dia()
-    top_produtos = get_top_produtos_vendidos(5)
-    valor_estoque = get_valor_total_estoque()
-    vendas_grafico = get_vendas_ultimos_dias(7)
-    ticket_medio = get_ticket_medio()
+    # DECISÃO: Com ASYNC_SERVICES, todas as consultas dos cards rodam em paralelo
+    if use_async_services():
+        cards = run_async(get_dashboard_data_async(dias))
+    else:
+        cards = get_dashboard_data(dias)
+
+    produtos_vencimento = cards['produtos_vencimento']
+    produto_mais_vendido = cards['produto_mais_vendido']
+    produtos_estoque_baixo = cards['produtos_estoque_baixo']
+    receita_data = cards['receita']
+    vendas_data = cards['vendas']
+    top_produtos = cards['top_produtos']
+    valor_estoque = cards['valor_estoque']
+    vendas_periodo = cards['vendas_periodo']
+    ticket_medio = cards['ticket_medio']
+    
+    # DECISÃO: Avisar quando algum card não pôde ser carregado
+    # Evita que uma falha do Supabase seja lida como "R$ 0,00 de receita"
+    if not all(r.get('success') for r in cards.values()):
+        flash('Alguns dados do painel estão indisponíveis no momento. Tente novamente em instantes.', 'warning')
     
     return render_template(
         'dashboard.html',
@@ -42,7 +49,10 @@ def dashboard_view():
         vendas=vendas_data.get('data', {}) if vendas_data.get('success') else {},
         top_produtos=top_produtos.get('data', []) if top_produtos.get('success') else [],
         valor_estoque=valor_estoque.get('data', {}).get('valor_total', 0) if valor_estoque.get('success') else 0,
-        vendas_grafico=vendas_grafico.get('data', []) if vendas_grafico.get('success') else [],
+        vendas_grafico=vendas_periodo.get('data', {}).get('grafico', []) if vendas_periodo.get('success') else [],
+        periodo=vendas_periodo.get('data', {}) if vendas_periodo.get('success') else {},
+        dias_grafico=dias,
+        janelas_grafico=JANELAS_GRAFICO,
         ticket_medio=ticket_medio.get('data', {}) if ticket_medio.get('success') else {}
     )
 
@@ -1,81 +1,333 @@
 from src.core.database import supabase_client
+from src.core.resilience import execute_read, execute_read_async
+from src.core.async_database import async_supabase_client
+from src.common.dates import format_date_br, now_local
+from src.features.estoque.estoque_service import get_valor_estoque_atual, get_vencimentos, get_estoque_baixo
+from src.features.analise.analise_service import CuboIndisponivelError, carregar_cubo, totais_por_dia
 from datetime import datetime, timedelta
+import asyncio
 import time
 
 # Cache simples em memória para dados do dashboard
 _dashboard_cache = {}
 _cache_ttl = 60  # Cache válido por 60 segundos
 
+# TTLs dos cards com cache
+_receita_ttl = 30  # Cache menor para receita (30s)
+_estoque_ttl = 120  # Cache maior para estoque (2min)
+
+# Janelas do gráfico de vendas oferecidas no dashboard (dias)
+JANELAS_GRAFICO = (7, 30, 90, 365)
+
 
 def _get_inicio_dia(data=None):
     """Retorna o início do dia (00:00:00) para uma data"""
     if data is None:
-        data = datetime.now()
+        data = now_local()
     return data.replace(hour=0, minute=0, second=0, microsecond=0)
 
 
 def _get_fim_dia(data=None):
     """Retorna o fim do dia (23:59:59) para uma data"""
     if data is None:
-        data = datetime.now()
+        data = now_local()
     return data.replace(hour=23, minute=59, second=59, microsecond=999999)
 
 
 def _get_inicio_mes(data=None):
     """Retorna o início do mês para uma data"""
     if data is None:
-        data = datetime.now()
+        data = now_local()
     return data.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
 
 
+def _get_periodos(hoje):
+    """Retorna os limites de período usados pelos cards (dia, ontem, mês, mês anterior)"""
+    ontem = hoje - timedelta(days=1)
+    inicio_mes = _get_inicio_mes(hoje)
+    return {
+        'inicio_dia': _get_inicio_dia(hoje),
+        'fim_dia': _get_fim_dia(hoje),
+        'inicio_ontem': _get_inicio_dia(ontem),
+        'fim_ontem': _get_fim_dia(ontem),
+        'inicio_mes': inicio_mes,
+        'inicio_mes_anterior': _get_inicio_mes(inicio_mes - timedelta(days=1)),
+        'fim_mes_anterior': inicio_mes - timedelta(seconds=1),
+    }
+
+
 def _get_produtos_map(produto_ids):
     """
     Busca nomes de múltiplos produtos de uma vez (otimização para evitar N+1)
-    
+
     Args:
         produto_ids: Lista de IDs de produtos
-        
+
     Returns:
         Dict com {produto_id: nome}
     """
     if not produto_ids:
         return {}
-    
+
     try:
-        response = (
+        response = execute_read(
             supabase_client()
             .table("produtos")
             .select("id, nome")
             .in_("id", produto_ids)
-            .execute()
         )
-        
+
         produtos_map = {}
         for produto in response.data:
             produtos_map[produto.get('id')] = produto.get('nome', 'Produto Desconhecido')
-        
+
         return produtos_map
     except:
         return {}
 
 
-def _calcular_receita_vendas(data_inicio, data_fim=None):
-    """Calcula a receita total de vendas em um período"""
+# ============================================
+# CONSULTAS E PARSERS
+# ============================================
+# DECISÃO: Separar a montagem da consulta (_query_*) da transformação da
+# resposta (_parse_*). O mesmo código serve o cliente sync e o async, pois
+# os query builders dos dois têm a mesma API.
+
+def _query_receita(client, data_inicio, data_fim=None):
+    """Consulta os valores de venda de um período"""
+    query = (
+        client
+        .table("vendas")
+        .select("valor_venda")
+        .gte("data_venda", data_inicio.isoformat())
+    )
+
+    if data_fim:
+        query = query.lte("data_venda", data_fim.isoformat())
+    return query
+
+
+def _parse_receita(response):
+    """Soma os valores de venda de uma resposta"""
+    return sum(float(v.get('valor_venda', 0)) for v in response.data)
+
+
+def _query_contagem(client, data_inicio, data_fim=None):
+    """Consulta a contagem de vendas de um período"""
+    query = (
+        client
+        .table("vendas")
+        .select("id", count="exact")
+        .gte("data_venda", data_inicio.isoformat())
+    )
+
+    if data_fim:
+        query = query.lte("data_venda", data_fim.isoformat())
+    return query
+
+
+def _parse_contagem(response):
+    """Extrai a contagem de vendas de uma resposta"""
+    # Usa count se disponível, senão conta os dados
+    if hasattr(response, 'count') and response.count is not None:
+        return response.count
+    return len(response.data) if response.data else 0
+
+
+def _query_itens_vendidos(client):
+    """
+    Consulta todos os itens vendidos com o nome do produto
+    Usa JOIN para evitar N+1 queries
+    """
+    return (
+        client
+        .table("itens_vendas")
+        .select("id_produto, quantidade, preco_unitario, produtos(nome)")
+    )
+
+
+def _agrupar_vendas_por_produto(response):
+    """Agrupa itens vendidos por produto somando quantidades e receita"""
+    vendas_por_produto = {}
+    for item in response.data:
+        produto_id = item.get('id_produto')
+        quantidade = float(item.get('quantidade', 0))
+        preco_unitario = float(item.get('preco_unitario', 0) or 0)
+
+        if produto_id:
+            if produto_id not in vendas_por_produto:
+                # Extrai nome do produto do JOIN
+                produto_info = item.get('produtos', {})
+                produto_nome = produto_info.get('nome', 'Produto Desconhecido') if isinstance(produto_info, dict) else 'Produto Desconhecido'
+
+                vendas_por_produto[produto_id] = {
+                    'id': produto_id,
+                    'nome': produto_nome,
+                    'quantidade_total': 0,
+                    'receita_total': 0
+                }
+            vendas_por_produto[produto_id]['quantidade_total'] += quantidade
+            vendas_por_produto[produto_id]['receita_total'] += quantidade * preco_unitario
+    return vendas_por_produto
+
+
+def _montar_produto_mais_vendido(response):
+    """Monta o resultado do card de produto mais vendido"""
+    vendas_por_produto = _agrupar_vendas_por_produto(response) if response.data else {}
+
+    if not vendas_por_produto:
+        return {
+            "success": True,
+            "data": None,
+            "message": "Nenhuma venda encontrada"
+        }
+
+    # Encontra o produto com maior quantidade vendida
+    produto_mais_vendido = max(
+        vendas_por_produto.values(),
+        key=lambda x: x['quantidade_total']
+    )
+    return {"success": True, "data": produto_mais_vendido}
+
+
+def _montar_top_produtos(response, limit):
+    """Monta o resultado do card de top N produtos"""
+    if not response.data:
+        return {
+            "success": True,
+            "data": [],
+            "message": "Nenhuma venda encontrada"
+        }
+
+    # Ordena por quantidade total e pega os top N
+    produtos_ordenados = sorted(
+        _agrupar_vendas_por_produto(response).values(),
+        key=lambda x: x['quantidade_total'],
+        reverse=True
+    )[:limit]
+    return {"success": True, "data": produtos_ordenados}
+
+
+def _query_valor_estoque(client):
+    """Consulta quantidade e custo de todos os produtos"""
+    return (
+        client
+        .table("produtos")
+        .select("quantidade, preco_custo")
+    )
+
+
+def _parse_valor_estoque(response):
+    """Soma quantidade × preço de custo"""
+    return sum(
+        float(p.get('quantidade', 0) or 0) * float(p.get('preco_custo', 0) or 0)
+        for p in response.data
+    )
+
+
+def _mesmo_dia_ano_anterior(dia):
+    """Mesma data um ano antes (29/02 vira 28/02)"""
     try:
-        query = (
-            supabase_client()
-            .table("vendas")
-            .select("valor_venda")
-            .gte("data_venda", data_inicio.isoformat())
-        )
-        
-        if data_fim:
-            query = query.lte("data_venda", data_fim.isoformat())
-        
-        response = query.execute()
-        return sum(float(v.get('valor_venda', 0)) for v in response.data)
-    except:
-        return 0.0
+        return dia.replace(year=dia.year - 1)
+    except ValueError:
+        return dia.replace(year=dia.year - 1, day=28)
+
+
+def _resumo_periodo(receita, vendas, receita_atual=None):
+    """Totais de uma janela; com receita_atual, a variação da janela atual sobre esta"""
+    resumo = {
+        "receita": receita,
+        "vendas": vendas,
+        "ticket_medio": receita / vendas if vendas > 0 else 0,
+    }
+    if receita_atual is not None:
+        resumo["variacao_percentual"] = ((receita_atual - receita) / receita) * 100 if receita > 0 else 0
+    return resumo
+
+
+def _montar_periodo(dias, hoje, receita_hoje, vendas_hoje, cubo):
+    """
+    Gráfico e comparações de uma janela de dias terminando hoje
+
+    DECISÃO: Dias fechados vêm dos totais por dia do cubo de análise
+    Eles são guardados uma vez e só mudam com vendas offline de datas antigas
+    (somadas ao dia certo na atualização do cubo); nenhuma janela relê vendas.
+    Só o dia de hoje, ainda aberto, vem da consulta ao vivo (receita_hoje,
+    vendas_hoje): 365 dias custam o mesmo que 7. O cubo (carregar_cubo) é
+    lido uma vez por requisição e passado a todos os cards.
+    """
+    dia = hoje.date()
+    atual = totais_por_dia(dias, dia, cubo)
+    atual['receita'][-1] = receita_hoje
+    atual['vendas'][-1] = vendas_hoje
+    anterior = totais_por_dia(dias, dia - timedelta(days=dias), cubo)
+    ano_anterior = totais_por_dia(dias, _mesmo_dia_ano_anterior(dia), cubo)
+
+    receita_atual = float(atual['receita'].sum())
+    inicio = dia - timedelta(days=dias - 1)
+    return {
+        "dias": dias,
+        "grafico": [
+            {'data': f"{d.day:02d}/{d.month:02d}", 'valor': valor}
+            for d, valor in zip(
+                (inicio + timedelta(days=i) for i in range(dias)), atual['receita'].tolist()
+            )
+        ],
+        "atual": _resumo_periodo(receita_atual, int(atual['vendas'].sum())),
+        "anterior": _resumo_periodo(
+            float(anterior['receita'].sum()), int(anterior['vendas'].sum()), receita_atual
+        ),
+        "ano_anterior": _resumo_periodo(
+            float(ano_anterior['receita'].sum()), int(ano_anterior['vendas'].sum()), receita_atual
+        ),
+    }
+
+
+def _totais_fechados(cubo, inicio, fim):
+    """Receita e número de vendas de dias já fechados (datas inicio..fim), do cubo de análise"""
+    dias = (fim - inicio).days + 1
+    if dias <= 0:
+        return 0.0, 0
+    totais = totais_por_dia(dias, fim, cubo)
+    return float(totais['receita'].sum()), int(totais['vendas'].sum())
+
+
+def _montar_receita(receita_hoje, receita_mes, receita_mes_anterior):
+    """Monta os dados do card de receita com a variação percentual"""
+    # Calcula variação percentual
+    variacao_percentual = 0
+    if receita_mes_anterior > 0:
+        variacao_percentual = ((receita_mes - receita_mes_anterior) / receita_mes_anterior) * 100
+
+    return {
+        "receita_hoje": receita_hoje,
+        "receita_mes": receita_mes,
+        "receita_mes_anterior": receita_mes_anterior,
+        "variacao_percentual": variacao_percentual
+    }
+
+
+def _montar_ticket(receita_hoje, num_vendas_hoje, receita_mes, num_vendas_mes):
+    """Monta os dados do card de ticket médio"""
+    return {
+        "ticket_medio_hoje": receita_hoje / num_vendas_hoje if num_vendas_hoje > 0 else 0,
+        "ticket_medio_mes": receita_mes / num_vendas_mes if num_vendas_mes > 0 else 0
+    }
+
+
+def _calcular_receita_vendas(data_inicio, data_fim=None):
+    """
+    Calcula a receita total de vendas em um período
+
+    DECISÃO: Não engolir exceções retornando 0
+    Uma falha do Supabase mostrava R$ 0,00 no dashboard como se fosse real
+    O erro sobe para a função pública, que retorna success=False
+    """
+    response = execute_read(
+        _query_receita(supabase_client(), data_inicio, data_fim),
+        stale_key=_get_cache_key("_calcular_receita_vendas", data_inicio, data_fim)
+    )
+    return _parse_receita(response)
 
 
 def _get_cache_key(function_name, *args, **kwargs):
@@ -88,35 +340,52 @@ def _get_cache_key(function_name, *args, **kwargs):
     return ":".join(key_parts)
 
 
+def _get_cached(cache_key, ttl=_cache_ttl):
+    """Retorna o valor do cache se ainda válido, senão None"""
+    if cache_key in _dashboard_cache:
+        cached_value, cached_time = _dashboard_cache[cache_key]
+        if time.time() - cached_time < ttl:
+            return cached_value
+    return None
+
+
+def _set_cached(cache_key, result):
+    """
+    Armazena um resultado no cache
+
+    DECISÃO: Não guardar falhas no cache
+    Senão um erro transitório ficaria visível durante todo o TTL
+    """
+    if isinstance(result, dict) and not result.get('success', True):
+        return
+
+    _dashboard_cache[cache_key] = (result, time.time())
+
+    # Limpa cache antigo (mantém apenas últimos 100 itens)
+    if len(_dashboard_cache) > 100:
+        oldest_key = min(_dashboard_cache.keys(), key=lambda k: _dashboard_cache[k][1])
+        del _dashboard_cache[oldest_key]
+
+
 def _get_cached_or_compute(cache_key, compute_func, ttl=_cache_ttl):
     """
     Retorna valor do cache se válido, senão computa e armazena
-    
+
     Args:
         cache_key: Chave do cache
         compute_func: Função para computar o valor se não estiver em cache
         ttl: Tempo de vida do cache em segundos (padrão: 60)
-    
+
     Returns:
         Valor do cache ou resultado da função
     """
-    current_time = time.time()
-    
-    # Verifica se existe no cache e se ainda é válido
-    if cache_key in _dashboard_cache:
-        cached_value, cached_time = _dashboard_cache[cache_key]
-        if current_time - cached_time < ttl:
-            return cached_value
-    
+    cached = _get_cached(cache_key, ttl)
+    if cached is not None:
+        return cached
+
     # Computa novo valor
     result = compute_func()
-    _dashboard_cache[cache_key] = (result, current_time)
-    
-    # Limpa cache antigo (mantém apenas últimos 100 itens)
-    if len(_dashboard_cache) > 100:
-        oldest_key = min(_dashboard_cache.keys(), key=lambda k: _dashboard_cache[k][1])
-        del _dashboard_cache[oldest_key]
-    
+    _set_cached(cache_key, result)
     return result
 
 
@@ -127,35 +396,25 @@ def clear_dashboard_cache():
 
 
 def _contar_vendas(data_inicio, data_fim=None):
-    """Conta o número de vendas em um período"""
-    try:
-        query = (
-            supabase_client()
-            .table("vendas")
-            .select("id", count="exact")
-            .gte("data_venda", data_inicio.isoformat())
-        )
-        
-        if data_fim:
-            query = query.lte("data_venda", data_fim.isoformat())
-        
-        response = query.execute()
-        # Usa count se disponível, senão conta os dados
-        if hasattr(response, 'count') and response.count is not None:
-            return response.count
-        return len(response.data) if response.data else 0
-    except:
-        return 0
+    """Conta o número de vendas em um período (exceções sobem para o chamador)"""
+    response = execute_read(
+        _query_contagem(supabase_client(), data_inicio, data_fim),
+        stale_key=_get_cache_key("_contar_vendas", data_inicio, data_fim)
+    )
+    return _parse_contagem(response)
 
 
-def get_produtos_proximos_vencimento(dias=30, limit=50):
+def get_produtos_proximos_vencimento(dias=30, limit=None):
     """
     Busca produtos próximos do vencimento dentro do período especificado
-    
+
+    Lê a lista de vencimentos materializada do dia (estoque_service), que já
+    traz os dias restantes; não consulta o banco a cada carregamento.
+
     Args:
-        dias: Número de dias para verificar (padrão: 30)
-        limit: Limite de produtos a retornar (padrão: 50)
-    
+        dias: Número de dias para verificar (padrão: 30, o máximo da lista)
+        limit: Limite de produtos a retornar (padrão: todos)
+
     Returns:
         {
             'success': bool,
@@ -163,53 +422,24 @@ def get_produtos_proximos_vencimento(dias=30, limit=50):
             'error': str (se success=False)
         }
     """
-    try:
-        hoje = datetime.now()
-        data_limite = (hoje + timedelta(days=dias)).strftime('%Y-%m-%d')
-        data_atual = hoje.strftime('%Y-%m-%d')
-        
-        response = (
-            supabase_client()
-            .table("produtos")
-            .select("id, nome, validade_lote, quantidade, uni_medida")
-            .not_.is_("validade_lote", "null")
-            .gte("validade_lote", data_atual)
-            .lte("validade_lote", data_limite)
-            .gt("quantidade", 0)
-            .order("validade_lote", desc=False)
-            .limit(limit)
-            .execute()
-        )
-        
-        produtos = []
-        for produto in response.data:
-            validade_str = produto.get('validade_lote', '')
-            if validade_str:
-                try:
-                    data_validade = datetime.strptime(validade_str, '%Y-%m-%d')
-                    dias_para_vencer = (data_validade - hoje).days
-                    
-                    produtos.append({
-                        'id': produto.get('id'),
-                        'nome': produto.get('nome', ''),
-                        'validade_lote': data_validade.strftime('%d/%m/%Y'),
-                        'dias_para_vencer': dias_para_vencer,
-                        'quantidade': float(produto.get('quantidade', 0)),
-                        'uni_medida': produto.get('uni_medida', '')
-                    })
-                except (ValueError, TypeError):
-                    continue
-        
-        return {"success": True, "data": produtos}
-    except Exception as e:
-        return {"success": False, "error": str(e), "data": []}
+    result = get_vencimentos()
+    if not result['success']:
+        return {"success": False, "error": result['error'], "data": []}
+    # Faixas em ordem crescente de dias, cada uma ordenada por validade
+    produtos = [
+        dict(produto, validade_lote=format_date_br(produto['validade_lote']))
+        for faixa in result['data']['faixas'].values()
+        for produto in faixa
+        if produto['dias_para_vencer'] <= dias
+    ]
+    return {"success": True, "data": produtos[:limit] if limit else produtos}
 
 
 def get_produto_mais_vendido():
     """
     Busca o produto mais vendido (baseado na quantidade total vendida)
     Otimizado para evitar N+1 queries usando JOIN
-    
+
     Returns:
         {
             'success': bool,
@@ -218,66 +448,24 @@ def get_produto_mais_vendido():
         }
     """
     try:
-        # Usa JOIN para buscar dados do produto junto com itens_vendas
-        response = (
-            supabase_client()
-            .table("itens_vendas")
-            .select("id_produto, quantidade, produtos(nome)")
-            .execute()
+        response = execute_read(
+            _query_itens_vendidos(supabase_client()),
+            stale_key=_get_cache_key("_query_itens_vendidos")
         )
-        
-        if not response.data:
-            return {
-                "success": True,
-                "data": None,
-                "message": "Nenhuma venda encontrada"
-            }
-        
-        # Agrupa por produto e soma as quantidades
-        vendas_por_produto = {}
-        for item in response.data:
-            produto_id = item.get('id_produto')
-            quantidade = float(item.get('quantidade', 0))
-            
-            if produto_id:
-                if produto_id not in vendas_por_produto:
-                    # Extrai nome do produto do JOIN
-                    produto_info = item.get('produtos', {})
-                    produto_nome = produto_info.get('nome', 'Produto Desconhecido') if isinstance(produto_info, dict) else 'Produto Desconhecido'
-                    
-                    vendas_por_produto[produto_id] = {
-                        'id': produto_id,
-                        'nome': produto_nome,
-                        'quantidade_total': 0
-                    }
-                vendas_por_produto[produto_id]['quantidade_total'] += quantidade
-        
-        if not vendas_por_produto:
-            return {
-                "success": True,
-                "data": None,
-                "message": "Nenhuma venda encontrada"
-            }
-        
-        # Encontra o produto com maior quantidade vendida
-        produto_mais_vendido = max(
-            vendas_por_produto.values(),
-            key=lambda x: x['quantidade_total']
-        )
-        
-        return {"success": True, "data": produto_mais_vendido}
+        return _montar_produto_mais_vendido(response)
     except Exception as e:
         return {"success": False, "error": str(e), "data": None}
 
 
-def get_produtos_estoque_baixo(limite=10, max_results=50):
+def get_produtos_estoque_baixo(max_results=50):
     """
-    Busca produtos com estoque baixo (quantidade <= limite)
-    
+    Busca produtos com estoque baixo (quantidade <= estoque mínimo do produto)
+
+    Lê o conjunto mantido pelas vendas e edições (estoque_service), sem consultar o banco.
+
     Args:
-        limite: Quantidade máxima para considerar estoque baixo (padrão: 10)
         max_results: Número máximo de resultados a retornar (padrão: 50)
-    
+
     Returns:
         {
             'success': bool,
@@ -285,37 +473,17 @@ def get_produtos_estoque_baixo(limite=10, max_results=50):
             'error': str (se success=False)
         }
     """
-    try:
-        response = (
-            supabase_client()
-            .table("produtos")
-            .select("id, nome, quantidade, uni_medida")
-            .lte("quantidade", limite)
-            .order("quantidade", desc=False)
-            .limit(max_results)
-            .execute()
-        )
-        
-        produtos = [
-            {
-                'id': p.get('id'),
-                'nome': p.get('nome', ''),
-                'quantidade': float(p.get('quantidade', 0)),
-                'uni_medida': p.get('uni_medida', '')
-            }
-            for p in response.data
-        ]
-        
-        return {"success": True, "data": produtos}
-    except Exception as e:
-        return {"success": False, "error": str(e), "data": []}
+    return get_estoque_baixo(max_results)
 
 
-def get_receita_periodo():
+def get_receita_periodo(cubo=None):
     """
     Calcula a receita do dia e do mês atual
     Com cache para melhor performance
-    
+
+    Args:
+        cubo: Cubo de vendas já carregado na requisição (padrão: carregar_cubo)
+
     Returns:
         {
             'success': bool,
@@ -324,52 +492,42 @@ def get_receita_periodo():
         }
     """
     cache_key = _get_cache_key("get_receita_periodo")
-    
+
     def compute():
         try:
-            hoje = datetime.now()
-            inicio_dia = _get_inicio_dia(hoje)
-            inicio_mes = _get_inicio_mes(hoje)
-            inicio_mes_anterior = _get_inicio_mes(inicio_mes - timedelta(days=1))
-            fim_mes_anterior = inicio_mes - timedelta(seconds=1)
-            
-            receita_hoje = _calcular_receita_vendas(inicio_dia)
-            receita_mes = _calcular_receita_vendas(inicio_mes)
-            receita_mes_anterior = _calcular_receita_vendas(inicio_mes_anterior, fim_mes_anterior)
-            
-            # Calcula variação percentual
-            variacao_percentual = 0
-            if receita_mes_anterior > 0:
-                variacao_percentual = ((receita_mes - receita_mes_anterior) / receita_mes_anterior) * 100
-            
+            periodos = _get_periodos(now_local())
+
+            # Só o dia de hoje é consultado; dias fechados vêm do cubo de análise
+            dados = cubo if cubo is not None else carregar_cubo()
+            receita_hoje = _calcular_receita_vendas(periodos['inicio_dia'])
+            receita_mes = receita_hoje + _totais_fechados(
+                dados, periodos['inicio_mes'].date(), periodos['inicio_ontem'].date()
+            )[0]
+            receita_mes_anterior = _totais_fechados(
+                dados, periodos['inicio_mes_anterior'].date(), periodos['fim_mes_anterior'].date()
+            )[0]
+
             return {
                 "success": True,
-                "data": {
-                    "receita_hoje": receita_hoje,
-                    "receita_mes": receita_mes,
-                    "receita_mes_anterior": receita_mes_anterior,
-                    "variacao_percentual": variacao_percentual
-                }
+                "data": _montar_receita(receita_hoje, receita_mes, receita_mes_anterior)
             }
         except Exception as e:
             return {
                 "success": False,
                 "error": str(e),
-                "data": {
-                    "receita_hoje": 0,
-                    "receita_mes": 0,
-                    "receita_mes_anterior": 0,
-                    "variacao_percentual": 0
-                }
+                "data": _montar_receita(0, 0, 0)
             }
-    
-    return _get_cached_or_compute(cache_key, compute, ttl=30)  # Cache menor para receita (30s)
+
+    return _get_cached_or_compute(cache_key, compute, ttl=_receita_ttl)
 
 
-def get_vendas_dia():
+def get_vendas_dia(cubo=None):
     """
     Retorna quantidade de vendas do dia e comparação com ontem
-    
+
+    Args:
+        cubo: Cubo de vendas já carregado na requisição (padrão: carregar_cubo)
+
     Returns:
         {
             'success': bool,
@@ -378,17 +536,14 @@ def get_vendas_dia():
         }
     """
     try:
-        hoje = datetime.now()
-        ontem = hoje - timedelta(days=1)
-        
-        inicio_hoje = _get_inicio_dia(hoje)
-        fim_hoje = _get_fim_dia(hoje)
-        inicio_ontem = _get_inicio_dia(ontem)
-        fim_ontem = _get_fim_dia(ontem)
-        
-        vendas_hoje = _contar_vendas(inicio_hoje, fim_hoje)
-        vendas_ontem = _contar_vendas(inicio_ontem, fim_ontem)
-        
+        periodos = _get_periodos(now_local())
+
+        vendas_hoje = _contar_vendas(periodos['inicio_dia'], periodos['fim_dia'])
+        vendas_ontem = _totais_fechados(
+            cubo if cubo is not None else carregar_cubo(),
+            periodos['inicio_ontem'].date(), periodos['inicio_ontem'].date()
+        )[1]
+
         return {
             "success": True,
             "data": {
@@ -409,10 +564,10 @@ def get_top_produtos_vendidos(limit=5):
     """
     Retorna os top N produtos mais vendidos
     Otimizado para evitar N+1 queries usando JOIN
-    
+
     Args:
         limit: Número de produtos a retornar (padrão: 5)
-    
+
     Returns:
         {
             'success': bool,
@@ -421,51 +576,11 @@ def get_top_produtos_vendidos(limit=5):
         }
     """
     try:
-        # Usa JOIN para buscar dados do produto junto com itens_vendas
-        response = (
-            supabase_client()
-            .table("itens_vendas")
-            .select("id_produto, quantidade, preco_unitario, produtos(nome)")
-            .execute()
+        response = execute_read(
+            _query_itens_vendidos(supabase_client()),
+            stale_key=_get_cache_key("_query_itens_vendidos")
         )
-        
-        if not response.data:
-            return {
-                "success": True,
-                "data": [],
-                "message": "Nenhuma venda encontrada"
-            }
-        
-        # Agrupa por produto e soma as quantidades e receita
-        vendas_por_produto = {}
-        for item in response.data:
-            produto_id = item.get('id_produto')
-            quantidade = float(item.get('quantidade', 0))
-            preco_unitario = float(item.get('preco_unitario', 0))
-            
-            if produto_id:
-                if produto_id not in vendas_por_produto:
-                    # Extrai nome do produto do JOIN
-                    produto_info = item.get('produtos', {})
-                    produto_nome = produto_info.get('nome', 'Produto Desconhecido') if isinstance(produto_info, dict) else 'Produto Desconhecido'
-                    
-                    vendas_por_produto[produto_id] = {
-                        'id': produto_id,
-                        'nome': produto_nome,
-                        'quantidade_total': 0,
-                        'receita_total': 0
-                    }
-                vendas_por_produto[produto_id]['quantidade_total'] += quantidade
-                vendas_por_produto[produto_id]['receita_total'] += quantidade * preco_unitario
-        
-        # Ordena por quantidade total e pega os top N
-        produtos_ordenados = sorted(
-            vendas_por_produto.values(),
-            key=lambda x: x['quantidade_total'],
-            reverse=True
-        )[:limit]
-        
-        return {"success": True, "data": produtos_ordenados}
+        return _montar_top_produtos(response, limit)
     except Exception as e:
         return {"success": False, "error": str(e), "data": []}
 
@@ -473,8 +588,11 @@ def get_top_produtos_vendidos(limit=5):
 def get_valor_total_estoque():
     """
     Calcula o valor total do estoque (quantidade × preço de custo)
-    Com cache para melhor performance
-    
+
+    Lê o total mantido por variações (estoque_service); enquanto ele não
+    existe (primeiros segundos do worker ou desligado), soma todos os
+    produtos, com cache.
+
     Returns:
         {
             'success': bool,
@@ -482,98 +600,67 @@ def get_valor_total_estoque():
             'error': str (se success=False)
         }
     """
+    valor_total = get_valor_estoque_atual()
+    if valor_total is not None:
+        return {"success": True, "data": {"valor_total": valor_total}}
+
     cache_key = _get_cache_key("get_valor_total_estoque")
-    
+
     def compute():
         try:
-            response = (
-                supabase_client()
-                .table("produtos")
-                .select("quantidade, preco_custo")
-                .execute()
+            response = execute_read(
+                _query_valor_estoque(supabase_client()),
+                stale_key=_get_cache_key("get_valor_total_estoque")
             )
-            
-            valor_total = sum(
-                float(p.get('quantidade', 0) or 0) * float(p.get('preco_custo', 0) or 0)
-                for p in response.data
-            )
-            
             return {
                 "success": True,
-                "data": {"valor_total": valor_total}
+                "data": {"valor_total": _parse_valor_estoque(response)}
             }
         except Exception as e:
             return {"success": False, "error": str(e), "data": {"valor_total": 0}}
-    
-    return _get_cached_or_compute(cache_key, compute, ttl=120)  # Cache maior para estoque (2min)
+
+    return _get_cached_or_compute(cache_key, compute, ttl=_estoque_ttl)
 
 
-def get_vendas_ultimos_dias(dias=7):
+def get_vendas_periodo(dias=7, cubo=None):
     """
-    Retorna dados de vendas dos últimos N dias para gráfico
-    
+    Gráfico de receita dos últimos N dias e comparações da janela
+
     Args:
-        dias: Número de dias para buscar (padrão: 7)
-    
+        dias: Tamanho da janela em dias, terminando hoje (padrão: 7)
+        cubo: Cubo de vendas já carregado na requisição (padrão: carregar_cubo)
+
     Returns:
         {
             'success': bool,
-            'data': list de dicts com data e valor (se success=True),
+            'data': {
+                'dias': int,
+                'grafico': list de dicts com data e valor,
+                'atual': dict com receita, vendas, ticket_medio,
+                'anterior': mesmos totais dos N dias anteriores + variacao_percentual,
+                'ano_anterior': mesmos totais das mesmas datas um ano antes + variacao_percentual
+            } (se success=True),
             'error': str (se success=False)
         }
     """
     try:
-        hoje = datetime.now()
-        data_inicio = _get_inicio_dia(hoje - timedelta(days=dias-1))
-        
-        response = (
-            supabase_client()
-            .table("vendas")
-            .select("data_venda, valor_venda")
-            .gte("data_venda", data_inicio.isoformat())
-            .order("data_venda", desc=False)
-            .execute()
-        )
-        
-        # Agrupa por dia
-        vendas_por_dia = {}
-        for venda in response.data:
-            data_venda_str = venda.get('data_venda', '')
-            if data_venda_str:
-                try:
-                    if isinstance(data_venda_str, str):
-                        dt = datetime.fromisoformat(data_venda_str.replace('Z', '+00:00'))
-                    else:
-                        dt = data_venda_str
-                    
-                    data_key = dt.strftime('%Y-%m-%d')
-                    valor = float(venda.get('valor_venda', 0))
-                    
-                    vendas_por_dia[data_key] = vendas_por_dia.get(data_key, 0) + valor
-                except:
-                    continue
-        
-        # Preenche todos os dias do período (mesmo que não tenha venda)
-        dados_grafico = []
-        for i in range(dias):
-            data = _get_inicio_dia(hoje - timedelta(days=dias-1-i))
-            data_key = data.strftime('%Y-%m-%d')
-            data_formatada = data.strftime('%d/%m')
-            
-            dados_grafico.append({
-                'data': data_formatada,
-                'valor': vendas_por_dia.get(data_key, 0)
-            })
-        
-        return {"success": True, "data": dados_grafico}
+        hoje = now_local()
+        inicio_dia = _get_inicio_dia(hoje)
+        receita_hoje = _calcular_receita_vendas(inicio_dia)
+        vendas_hoje = _contar_vendas(inicio_dia)
+        dados = cubo if cubo is not None else carregar_cubo()
+        return {"success": True, "data": _montar_periodo(dias, hoje, receita_hoje, vendas_hoje, dados)}
     except Exception as e:
-        return {"success": False, "error": str(e), "data": []}
+        return {"success": False, "error": str(e), "data": {}}
 
 
-def get_ticket_medio():
+def get_ticket_medio(cubo=None):
     """
     Calcula o ticket médio (valor médio por venda) do dia e do mês
-    
+
+    Args:
+        cubo: Cubo de vendas já carregado na requisição (padrão: carregar_cubo)
+
     Returns:
         {
             'success': bool,
@@ -582,26 +669,21 @@ def get_ticket_medio():
         }
     """
     try:
-        hoje = datetime.now()
-        inicio_dia = _get_inicio_dia(hoje)
-        inicio_mes = _get_inicio_mes(hoje)
-        
-        # Ticket médio do dia
-        receita_hoje = _calcular_receita_vendas(inicio_dia)
-        num_vendas_hoje = _contar_vendas(inicio_dia)
-        ticket_medio_hoje = receita_hoje / num_vendas_hoje if num_vendas_hoje > 0 else 0
-        
-        # Ticket médio do mês
-        receita_mes = _calcular_receita_vendas(inicio_mes)
-        num_vendas_mes = _contar_vendas(inicio_mes)
-        ticket_medio_mes = receita_mes / num_vendas_mes if num_vendas_mes > 0 else 0
-        
+        periodos = _get_periodos(now_local())
+
+        # Ticket médio do dia e do mês
+        receita_hoje = _calcular_receita_vendas(periodos['inicio_dia'])
+        num_vendas_hoje = _contar_vendas(periodos['inicio_dia'])
+        receita_fechada, vendas_fechadas = _totais_fechados(
+            cubo if cubo is not None else carregar_cubo(),
+            periodos['inicio_mes'].date(), periodos['inicio_ontem'].date()
+        )
+        receita_mes = receita_hoje + receita_fechada
+        num_vendas_mes = num_vendas_hoje + vendas_fechadas
+
         return {
             "success": True,
-            "data": {
-                "ticket_medio_hoje": ticket_medio_hoje,
-                "ticket_medio_mes": ticket_medio_mes
-            }
+            "data": _montar_ticket(receita_hoje, num_vendas_hoje, receita_mes, num_vendas_mes)
         }
     except Exception as e:
         return {
@@ -609,3 +691,182 @@ def get_ticket_medio():
             "error": str(e),
             "data": {"ticket_medio_hoje": 0, "ticket_medio_mes": 0}
         }
+
+
+def get_dashboard_data(dias_grafico=7):
+    """
+    Busca os dados de todos os cards do dashboard (uma consulta após a outra)
+
+    Args:
+        dias_grafico: Número de dias do gráfico de vendas (um de JANELAS_GRAFICO, padrão: 7)
+
+    Returns:
+        Dicionário {nome_do_card: resultado no formato {'success', 'data', ...}}
+    """
+    # Um cubo para todos os cards; sem cubo, cada card tenta de novo e falha sozinho
+    try:
+        cubo = carregar_cubo()
+    except CuboIndisponivelError:
+        cubo = None
+    return {
+        'produtos_vencimento': get_produtos_proximos_vencimento(30),
+        'produto_mais_vendido': get_produto_mais_vendido(),
+        'produtos_estoque_baixo': get_produtos_estoque_baixo(),
+        'receita': get_receita_periodo(cubo),
+        'vendas': get_vendas_dia(cubo),
+        'top_produtos': get_top_produtos_vendidos(5),
+        'valor_estoque': get_valor_total_estoque(),
+        'vendas_periodo': get_vendas_periodo(dias_grafico, cubo),
+        'ticket_medio': get_ticket_medio(cubo),
+    }
+
+
+async def get_dashboard_data_async(dias_grafico=7):
+    """
+    Versão assíncrona de get_dashboard_data: todas as consultas em paralelo
+
+    DECISÃO: Consultas repetidas entre cards (receita do dia/mês, itens vendidos)
+    são disparadas uma única vez e compartilhadas
+    DECISÃO: Cada card falha de forma independente, como na versão sync
+
+    Args:
+        dias_grafico: Número de dias do gráfico de vendas (um de JANELAS_GRAFICO, padrão: 7)
+
+    Returns:
+        Mesmo formato de get_dashboard_data
+    """
+    client = await async_supabase_client()
+    hoje = now_local()
+    periodos = _get_periodos(hoje)
+    consultas = {}
+    # Totais dos dias fechados: o cubo é lido do disco uma vez para todos os cards
+    cubo_task = asyncio.ensure_future(asyncio.to_thread(carregar_cubo))
+
+    def consultar(stale_key, query_builder):
+        """Dispara a consulta uma vez e reaproveita a mesma task para a mesma chave"""
+        if stale_key not in consultas:
+            consultas[stale_key] = asyncio.ensure_future(
+                execute_read_async(query_builder(), stale_key=stale_key)
+            )
+        return consultas[stale_key]
+
+    async def receita(data_inicio, data_fim=None):
+        key = _get_cache_key("_calcular_receita_vendas", data_inicio, data_fim)
+        return _parse_receita(await consultar(key, lambda: _query_receita(client, data_inicio, data_fim)))
+
+    async def contagem(data_inicio, data_fim=None):
+        key = _get_cache_key("_contar_vendas", data_inicio, data_fim)
+        return _parse_contagem(await consultar(key, lambda: _query_contagem(client, data_inicio, data_fim)))
+
+    async def itens_vendidos():
+        return await consultar(_get_cache_key("_query_itens_vendidos"), lambda: _query_itens_vendidos(client))
+
+    async def card_vencimento():
+        # Lista materializada: lê um arquivo (refeita no banco uma vez por dia)
+        return await asyncio.to_thread(get_produtos_proximos_vencimento, 30)
+
+    async def card_estoque_baixo():
+        # Conjunto mantido pelas escritas: lê um arquivo
+        return await asyncio.to_thread(get_produtos_estoque_baixo)
+
+    async def card_receita():
+        cache_key = _get_cache_key("get_receita_periodo")
+        cached = _get_cached(cache_key, _receita_ttl)
+        if cached is not None:
+            return cached
+        # Só o dia de hoje é consultado; dias fechados vêm do cubo de análise
+        receita_hoje, cubo = await asyncio.gather(receita(periodos['inicio_dia']), cubo_task)
+        receita_fechada = _totais_fechados(cubo, periodos['inicio_mes'].date(), periodos['inicio_ontem'].date())[0]
+        receita_mes_anterior = _totais_fechados(
+            cubo, periodos['inicio_mes_anterior'].date(), periodos['fim_mes_anterior'].date()
+        )[0]
+        result = {
+            "success": True,
+            "data": _montar_receita(receita_hoje, receita_hoje + receita_fechada, receita_mes_anterior)
+        }
+        _set_cached(cache_key, result)
+        return result
+
+    async def card_vendas():
+        vendas_hoje, cubo = await asyncio.gather(contagem(periodos['inicio_dia'], periodos['fim_dia']), cubo_task)
+        vendas_ontem = _totais_fechados(cubo, periodos['inicio_ontem'].date(), periodos['inicio_ontem'].date())[1]
+        return {
+            "success": True,
+            "data": {
+                "vendas_hoje": vendas_hoje,
+                "vendas_ontem": vendas_ontem,
+                "variacao": vendas_hoje - vendas_ontem
+            }
+        }
+
+    async def card_valor_estoque():
+        valor_total = get_valor_estoque_atual()
+        if valor_total is not None:
+            return {"success": True, "data": {"valor_total": valor_total}}
+        cache_key = _get_cache_key("get_valor_total_estoque")
+        cached = _get_cached(cache_key, _estoque_ttl)
+        if cached is not None:
+            return cached
+        response = await consultar(cache_key, lambda: _query_valor_estoque(client))
+        result = {"success": True, "data": {"valor_total": _parse_valor_estoque(response)}}
+        _set_cached(cache_key, result)
+        return result
+
+    async def card_periodo():
+        receita_hoje, vendas_hoje, cubo = await asyncio.gather(
+            receita(periodos['inicio_dia']),
+            contagem(periodos['inicio_dia']),
+            cubo_task
+        )
+        return {
+            "success": True,
+            "data": _montar_periodo(dias_grafico, hoje, receita_hoje, vendas_hoje, cubo)
+        }
+
+    async def card_ticket():
+        receita_hoje, vendas_hoje, cubo = await asyncio.gather(
+            receita(periodos['inicio_dia']),
+            contagem(periodos['inicio_dia']),
+            cubo_task
+        )
+        receita_fechada, vendas_fechadas = _totais_fechados(
+            cubo, periodos['inicio_mes'].date(), periodos['inicio_ontem'].date()
+        )
+        return {
+            "success": True,
+            "data": _montar_ticket(
+                receita_hoje, vendas_hoje, receita_hoje + receita_fechada, vendas_hoje + vendas_fechadas
+            )
+        }
+
+    async def card_mais_vendido():
+        return _montar_produto_mais_vendido(await itens_vendidos())
+
+    async def card_top_produtos():
+        return _montar_top_produtos(await itens_vendidos(), 5)
+
+    # Valor padrão de cada card em caso de erro (mesmo da versão sync)
+    cards = {
+        'produtos_vencimento': (card_vencimento, []),
+        'produto_mais_vendido': (card_mais_vendido, None),
+        'produtos_estoque_baixo': (card_estoque_baixo, []),
+        'receita': (card_receita, _montar_receita(0, 0, 0)),
+        'vendas': (card_vendas, {"vendas_hoje": 0, "vendas_ontem": 0, "variacao": 0}),
+        'top_produtos': (card_top_produtos, []),
+        'valor_estoque': (card_valor_estoque, {"valor_total": 0}),
+        'vendas_periodo': (card_periodo, {}),
+        'ticket_medio': (card_ticket, {"ticket_medio_hoje": 0, "ticket_medio_mes": 0}),
+    }
+
+    resultados = await asyncio.gather(
+        *(card() for card, _ in cards.values()),
+        return_exceptions=True
+    )
+
+    dados = {}
+    for (nome, (_, padrao)), resultado in zip(cards.items(), resultados):
+        if isinstance(resultado, Exception):
+            dados[nome] = {"success": False, "error": str(resultado), "data": padrao}
+        else:
+            dados[nome] = resultado
+    return dados
@@ -0,0 +1,4 @@
+from .estoque_routes import estoque_bp
+from .estoque_service import init_estoque
+
+__all__ = ['estoque_bp', 'init_estoque']
@@ -0,0 +1,67 @@
+import click
+from flask import Blueprint, request, jsonify
+from src.features.auth.auth_decorators import login_required
+from src.features.estoque.estoque_service import (
+    get_posicao_estoque, get_movimentos_produto, criar_snapshot_estoque, get_vencimentos,
+    get_estoque_baixo, get_alertas_estoque
+)
+
+estoque_bp = Blueprint('estoque', __name__, url_prefix='/estoque')
+
+
+@estoque_bp.route('/posicao')
+@login_required
+def posicao():
+    """
+    Posição do estoque em uma data (JSON)
+
+    Query: ?em=2026-01-31 (fim do dia) ou ?em=2026-01-31T12:00 (padrão: agora)
+    """
+    result = get_posicao_estoque(request.args.get('em'))
+    return jsonify(result), 200 if result['success'] else 400
+
+
+@estoque_bp.route('/movimentos/<string:id>')
+@login_required
+def movimentos(id):
+    """Últimos movimentos de estoque de um produto (JSON)"""
+    limit = min(request.args.get('limit', 100, type=int), 1000)
+    result = get_movimentos_produto(id, limit)
+    return jsonify(result), 200 if result['success'] else 400
+
+
+@estoque_bp.route('/vencimentos')
+@login_required
+def vencimentos():
+    """
+    Produtos que vencem nos próximos 30 dias, por faixa de dias (JSON)
+
+    Query: ?faixa=0-7 | 8-15 | 16-30 (padrão: todas)
+    """
+    result = get_vencimentos(request.args.get('faixa'))
+    return jsonify(result), 200 if result['success'] else 400
+
+
+@estoque_bp.route('/baixo')
+@login_required
+def estoque_baixo():
+    """Produtos com quantidade <= estoque mínimo (JSON)"""
+    result = get_estoque_baixo()
+    return jsonify(result), 200 if result['success'] else 400
+
+
+@estoque_bp.route('/alertas')
+@login_required
+def alertas():
+    """Últimos produtos que entraram ou saíram do estoque baixo (JSON)"""
+    limit = min(request.args.get('limit', 50, type=int), 100)
+    return jsonify(get_alertas_estoque(limit))
+
+
+@estoque_bp.cli.command('snapshot')
+def snapshot_command():
+    """Grava o snapshot do estoque atual (rodar diariamente, ex: cron)"""
+    result = criar_snapshot_estoque()
+    if not result['success']:
+        raise click.ClickException(result['error'])
+    click.echo(f"Snapshot {result['data']['tirado_em']}: {result['data']['produtos']} produtos")
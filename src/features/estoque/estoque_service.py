@@ -0,0 +1,983 @@
+"""
+Histórico de estoque: movimentos (livro-razão) e snapshots periódicos
+
+produtos.quantidade guarda só o valor atual; quem o altera (venda, edição do
+produto, cadastro, exclusão) também grava um movimento em movimentos_estoque
+com a variação e o custo vigente. O livro-razão nunca é alterado, só acrescido.
+
+DECISÃO: Snapshots periódicos (estoque_snapshots) em vez de refazer o histórico
+A posição em uma data é o último snapshot até ela mais os movimentos entre os
+dois: o custo é O(produtos + movimentos recentes), não O(todo o histórico).
+Snapshots são criados pelo comando 'flask estoque snapshot' (cron diário).
+
+DECISÃO: Snapshot marca o último movimento (id), não só o horário
+A venda baixa produtos.quantidade antes de gravar o movimento, e ler todos os
+produtos leva tempo: comparar horários contaria duas vezes (ou nenhuma) as
+vendas gravadas durante a leitura. O snapshot guarda o id do último movimento
+já refletido nas quantidades (ultimo_movimento); produtos que mudaram durante
+a leitura são relidos até a marca estabilizar, e a posição aplica só os
+movimentos com id maior que a marca.
+
+DECISÃO: Falha ao gravar o movimento não desfaz a venda ou a edição
+A operação principal já foi confirmada. Os movimentos que falharam ficam em
+ESTOQUE_MOVIMENTOS_PENDENTES_ARQUIVO (compartilhado pelos workers da máquina)
+e são regravados na próxima gravação ou pela thread de reconciliação. Cada
+movimento tem uma chave única: regravar um insert que falhou depois de
+aplicado não duplica a linha. Em produção o arquivo é obrigatório e deve
+estar num volume persistente: em /tmp, um redeploy perderia os pendentes.
+Cada instância só vê o próprio arquivo: o snapshot confere os pendentes da
+instância em que roda, não os de outras réplicas.
+
+DECISÃO: Valor do estoque mantido por variações, reconciliado em segundo plano
+O card do dashboard somava quantidade × custo de todos os produtos a cada
+2 minutos por worker. Agora quem grava um movimento também soma a variação
+de valor a um total em ESTOQUE_VALOR_ARQUIVO (compartilhado pelos workers da
+máquina, ver core/shared_state.py), e ler o valor é ler esse arquivo. Uma thread por worker
+refaz a soma completa a cada ESTOQUE_VALOR_RECONCILIAR segundos (só um worker
+por período), corrigindo escritas feitas fora do app e movimentos perdidos.
+
+DECISÃO: Lista de vencimentos materializada uma vez por dia
+Os produtos com validade nos próximos 30 dias (todos, sem limite) ficam em
+ESTOQUE_VENCIMENTO_ARQUIVO. A primeira leitura do dia refaz a lista; cadastro,
+edição, exclusão e vendas atualizam só as linhas dos produtos alterados. Os
+dias restantes contam datas (validade - hoje), então valem o dia todo.
+
+DECISÃO: Conjunto de estoque baixo mantido por cruzamento de limite
+Cada produto tem seu estoque mínimo (produtos.estoque_minimo; vazio usa
+ESTOQUE_MINIMO_PADRAO), já que 10 kg, 10 L e 10 unidades não se comparam.
+O conjunto dos produtos com quantidade <= mínimo fica em ESTOQUE_BAIXO_ARQUIVO;
+vendas e edições só incluem ou removem os produtos que alteraram, e cada
+entrada/saída vira um evento (alertas recentes no arquivo e assinantes de
+assinar_alertas_estoque). A reconstrução completa corre junto com a do valor.
+"""
+import logging
+import os
+import tempfile
+import threading
+import time as _time
+import uuid
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+from src.core.database import supabase_client
+from src.core.resilience import PAGE_SIZE, execute_read, execute_read_all
+from src.core.shared_state import read_json, shared_lock, write_json
+from src.common.dates import STORE_TZ, now_local, parse_date_value
+
+logger = logging.getLogger(__name__)
+
+TIPOS_MOVIMENTO = ('venda', 'ajuste', 'importacao', 'devolucao', 'cadastro', 'exclusao')
+
+# Linhas por insert ao gravar um snapshot
+_LOTE_SNAPSHOT = 500
+
+# Segundos para vendas em andamento gravarem o movimento depois de baixar o
+# estoque, e releituras dos produtos alterados antes de desistir do snapshot
+_ESPERA_SNAPSHOT = 2
+_RELEITURAS_SNAPSHOT = 5
+
+# Faixas de dias até o vencimento: (nome, de, até)
+FAIXAS_VENCIMENTO = (('0-7', 0, 7), ('8-15', 8, 15), ('16-30', 16, 30))
+_HORIZONTE_VENCIMENTO = FAIXAS_VENCIMENTO[-1][2]
+
+# Estado configurado por init_estoque (services atualizam fora do contexto do app)
+_vencimento_state = {
+    'enabled': False,
+    'arquivo': os.path.join(tempfile.gettempdir(), 'mercadim_vencimentos.json'),
+}
+_estoque_baixo_state = {
+    'enabled': False,
+    'arquivo': os.path.join(tempfile.gettempdir(), 'mercadim_estoque_baixo.json'),
+    'minimo_padrao': 10.0,
+}
+
+# Eventos de cruzamento guardados para consulta (/estoque/alertas)
+_MAX_ALERTAS = 100
+
+# Funções chamadas a cada evento de estoque baixo (ver assinar_alertas_estoque)
+_assinantes_alertas = []
+
+_movimentos_state = {
+    'arquivo': os.path.join(tempfile.gettempdir(), 'mercadim_movimentos_pendentes.json'),
+}
+
+_valor_state = {
+    'enabled': False,
+    'arquivo': os.path.join(tempfile.gettempdir(), 'mercadim_valor_estoque.json'),
+    'intervalo': 600,
+    'pid': None,  # processo em que a thread de reconciliação está rodando
+}
+_reconciliacao_lock = threading.Lock()
+
+
+def condicao_quantidade(query, quantidade):
+    """
+    Acrescenta 'quantidade = valor lido' à escrita (compare-and-set do estoque)
+
+    Se outra escrita alterou a quantidade depois da leitura, nenhuma linha
+    muda e quem chamou relê e tenta de novo. Nulo precisa de IS NULL.
+    """
+    return query.is_("quantidade", "null") if quantidade is None else query.eq("quantidade", quantidade)
+
+
+def movimento_estoque(produto_id, tipo: str, quantidade: float,
+                      preco_custo: Optional[float] = None, venda_id=None) -> dict:
+    """
+    Monta uma linha de movimentos_estoque (com chave única para regravação)
+
+    Args:
+        produto_id: ID do produto
+        tipo: Um de TIPOS_MOVIMENTO
+        quantidade: Variação do estoque (negativa = saída)
+        preco_custo: Custo unitário vigente depois do movimento
+        venda_id: Venda que originou o movimento (tipo 'venda')
+    """
+    if tipo not in TIPOS_MOVIMENTO:
+        raise ValueError(f"Tipo de movimento inválido: {tipo}")
+    return {
+        'id_produto': produto_id,
+        'tipo': tipo,
+        'quantidade': round(float(quantidade or 0), 6),
+        'preco_custo': None if preco_custo is None else float(preco_custo),
+        'id_venda': venda_id,
+        'chave': uuid.uuid4().hex,
+    }
+
+
+def _inserir_movimentos(movimentos: list):
+    # Chave já gravada = insert anterior aplicado: a linha é ignorada
+    supabase_client().table("movimentos_estoque").upsert(
+        movimentos, on_conflict="chave", ignore_duplicates=True
+    ).execute()
+
+
+def _guardar_pendentes(movimentos: list):
+    """Guarda movimentos que não foram gravados, com o horário em que aconteceram"""
+    arquivo = _movimentos_state['arquivo']
+    agora = now_local().isoformat()
+    try:
+        with shared_lock(arquivo):
+            pendentes = read_json(arquivo) or []
+            pendentes.extend(dict(m, criado_em=m.get('criado_em') or agora) for m in movimentos)
+            write_json(arquivo, pendentes)
+    except OSError:
+        logger.exception("Falha ao guardar %d movimento(s) de estoque pendente(s)", len(movimentos))
+    _garantir_reconciliacao()
+
+
+def regravar_movimentos_pendentes() -> bool:
+    """
+    Regrava os movimentos que falharam antes
+
+    Returns:
+        True se não sobrou movimento pendente
+    """
+    arquivo = _movimentos_state['arquivo']
+    if not os.path.exists(arquivo):
+        return True
+    with shared_lock(arquivo):
+        pendentes = read_json(arquivo)
+        if pendentes:
+            try:
+                _inserir_movimentos(pendentes)
+            except Exception:
+                logger.warning("%d movimento(s) de estoque continuam pendentes", len(pendentes), exc_info=True)
+                return False
+            logger.info("%d movimento(s) de estoque pendente(s) regravado(s)", len(pendentes))
+        try:
+            os.remove(arquivo)
+        except OSError:
+            pass
+        return True
+
+
+def registrar_movimentos(movimentos: list) -> bool:
+    """
+    Grava movimentos de estoque (uma requisição para todos)
+
+    Se a gravação falha, os movimentos ficam pendentes e são regravados
+    depois (ver regravar_movimentos_pendentes).
+
+    Args:
+        movimentos: Linhas montadas com movimento_estoque
+
+    Returns:
+        True se gravou estes e os pendentes anteriores (ou não havia nada a gravar)
+    """
+    if movimentos:
+        try:
+            _inserir_movimentos(movimentos)
+        except Exception:
+            logger.exception("Falha ao registrar %d movimento(s) de estoque; ficam pendentes", len(movimentos))
+            _guardar_pendentes(movimentos)
+            return False
+    return regravar_movimentos_pendentes()
+
+
+def variacao_valor(movimentos: list) -> float:
+    """Variação do valor do estoque (quantidade × custo) de movimentos sem troca de custo"""
+    return sum(m['quantidade'] * (m['preco_custo'] or 0) for m in movimentos)
+
+
+def _ultimo_movimento() -> int:
+    """Id do movimento mais recente (0 se o livro-razão está vazio)"""
+    linhas = execute_read(
+        supabase_client().table("movimentos_estoque").select("id").order("id", desc=True).limit(1)
+    ).data
+    return int(linhas[0]['id']) if linhas else 0
+
+
+def _produtos_movimentados(desde: int, ate: int) -> set:
+    """Produtos com movimentos de id em (desde, ate]"""
+    linhas = execute_read_all(
+        lambda: supabase_client().table("movimentos_estoque")
+        .select("id_produto").gt("id", desde).lte("id", ate).order("id")
+    )
+    return {linha['id_produto'] for linha in linhas}
+
+
+def criar_snapshot_estoque():
+    """
+    Grava a posição atual (quantidade e custo) de todos os produtos
+
+    As quantidades valem até o movimento ultimo_movimento: produtos que
+    mudaram durante a leitura são relidos até não haver movimentos novos.
+
+    Returns:
+        {
+            'success': bool,
+            'data': {'tirado_em': str ISO, 'ultimo_movimento': int, 'produtos': int}
+                    (se success=True),
+            'error': str (se success=False)
+        }
+    """
+    try:
+        # Pendentes já estão nas quantidades: gravados depois, teriam id acima da marca
+        if not regravar_movimentos_pendentes():
+            return {"success": False, "error": "Há movimentos de estoque pendentes; tente de novo mais tarde"}
+        marca = _ultimo_movimento()
+        produtos = {
+            produto['id']: produto
+            for produto in execute_read_all(
+                lambda: supabase_client().table("produtos").select("id, quantidade, preco_custo").order("id")
+            )
+        }
+        for _ in range(_RELEITURAS_SNAPSHOT):
+            _time.sleep(_ESPERA_SNAPSHOT)
+            nova_marca = _ultimo_movimento()
+            alterados = _produtos_movimentados(marca, nova_marca) if nova_marca > marca else set()
+            marca = nova_marca
+            if not alterados:
+                break
+            # Relidos depois da espera, refletem todos os movimentos até a nova marca
+            ids = list(alterados)
+            relidos = {
+                produto['id']: produto
+                for inicio in range(0, len(ids), PAGE_SIZE)
+                for produto in execute_read(
+                    supabase_client().table("produtos").select("id, quantidade, preco_custo")
+                    .in_("id", ids[inicio:inicio + PAGE_SIZE])
+                ).data
+            }
+            for produto_id in alterados:
+                if produto_id in relidos:
+                    produtos[produto_id] = relidos[produto_id]
+                else:
+                    produtos.pop(produto_id, None)
+        else:
+            return {"success": False, "error": "Estoque em movimento durante o snapshot; tente de novo com menos vendas"}
+        # Só os pendentes desta instância: outras réplicas guardam os seus em arquivos próprios
+        if os.path.exists(_movimentos_state['arquivo']):
+            return {"success": False, "error": "Há movimentos de estoque pendentes; tente de novo mais tarde"}
+
+        tirado_em = now_local().isoformat()
+        linhas = [
+            {
+                'id_produto': produto.get('id'),
+                'quantidade': float(produto.get('quantidade') or 0),
+                'preco_custo': float(produto['preco_custo']) if produto.get('preco_custo') is not None else None,
+                'tirado_em': tirado_em,
+                'ultimo_movimento': marca,
+            }
+            for produto in produtos.values()
+        ]
+        for inicio in range(0, len(linhas), _LOTE_SNAPSHOT):
+            supabase_client().table("estoque_snapshots").insert(linhas[inicio:inicio + _LOTE_SNAPSHOT]).execute()
+        return {"success": True, "data": {"tirado_em": tirado_em, "ultimo_movimento": marca, "produtos": len(linhas)}}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def _momento(valor) -> datetime:
+    """Data (fim do dia na loja), datetime ou texto ISO -> datetime com fuso"""
+    if valor is None:
+        return now_local()
+    if isinstance(valor, str):
+        texto = valor.strip()
+        valor = None
+        if len(texto) > 10:
+            # Com hora e sem fuso é hora da loja, como um datetime sem fuso
+            # (parse_date_value leria como UTC, o formato dos timestamps do banco)
+            try:
+                valor = datetime.fromisoformat(texto.replace('Z', '+00:00'))
+            except ValueError:
+                pass
+        valor = valor or parse_date_value(texto)
+        if valor is None:
+            raise ValueError("Data inválida")
+    if isinstance(valor, datetime):
+        return valor if valor.tzinfo else valor.replace(tzinfo=STORE_TZ)
+    if isinstance(valor, date):
+        return datetime.combine(valor, time.max, tzinfo=STORE_TZ)
+    raise ValueError("Data inválida")
+
+
+def get_posicao_estoque(momento=None):
+    """
+    Quantidade e custo de cada produto em um momento (padrão: agora)
+
+    Args:
+        momento: date (fim do dia), datetime ou texto ISO/dd/mm/aaaa
+
+    Returns:
+        {
+            'success': bool,
+            'data': {
+                'momento': str ISO,
+                'snapshot': str ISO do snapshot usado,
+                'movimentos': int aplicados sobre o snapshot,
+                'produtos': {id: {'quantidade': float, 'preco_custo': float|None}},
+                'valor_total': float (quantidade × custo)
+            } (se success=True),
+            'error': str (se success=False)
+        }
+    """
+    try:
+        momento = _momento(momento)
+        limite = momento.isoformat()
+
+        ultimo = execute_read(
+            supabase_client()
+            .table("estoque_snapshots")
+            .select("tirado_em, ultimo_movimento")
+            .lte("tirado_em", limite)
+            .order("tirado_em", desc=True)
+            .limit(1)
+        ).data
+        if not ultimo:
+            return {"success": False, "error": "Não há snapshot de estoque até essa data"}
+        tirado_em = ultimo[0]['tirado_em']
+        marca = ultimo[0].get('ultimo_movimento')
+
+        snapshot = execute_read_all(
+            lambda: supabase_client().table("estoque_snapshots")
+            .select("id_produto, quantidade, preco_custo").eq("tirado_em", tirado_em).order("id")
+        )
+
+        def movimentos_seguintes():
+            query = supabase_client().table("movimentos_estoque").select("id_produto, tipo, quantidade, preco_custo")
+            # Snapshots antigos, sem marca, continuam comparando horários
+            query = query.gt("id", marca) if marca is not None else query.gt("criado_em", tirado_em)
+            return query.lte("criado_em", limite).order("id")
+
+        movimentos = execute_read_all(movimentos_seguintes)
+
+        produtos = {
+            linha['id_produto']: {
+                'quantidade': float(linha.get('quantidade') or 0),
+                'preco_custo': float(linha['preco_custo']) if linha.get('preco_custo') is not None else None,
+            }
+            for linha in snapshot
+        }
+        for movimento in movimentos:
+            produto_id = movimento['id_produto']
+            if movimento['tipo'] == 'exclusao':
+                produtos.pop(produto_id, None)
+                continue
+            posicao = produtos.setdefault(produto_id, {'quantidade': 0.0, 'preco_custo': None})
+            posicao['quantidade'] = round(posicao['quantidade'] + float(movimento.get('quantidade') or 0), 6)
+            if movimento.get('preco_custo') is not None:
+                posicao['preco_custo'] = float(movimento['preco_custo'])
+
+        valor_total = sum(p['quantidade'] * (p['preco_custo'] or 0) for p in produtos.values())
+        return {
+            "success": True,
+            "data": {
+                "momento": limite,
+                "snapshot": tirado_em,
+                "movimentos": len(movimentos),
+                "produtos": produtos,
+                "valor_total": valor_total,
+            }
+        }
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def get_movimentos_produto(produto_id, limit=100):
+    """
+    Últimos movimentos de estoque de um produto (mais recentes primeiro)
+
+    Returns:
+        {
+            'success': bool,
+            'data': list de movimentos (se success=True),
+            'error': str (se success=False)
+        }
+    """
+    try:
+        response = execute_read(
+            supabase_client()
+            .table("movimentos_estoque")
+            .select("id, tipo, quantidade, preco_custo, id_venda, criado_em")
+            .eq("id_produto", produto_id)
+            .order("id", desc=True)
+            .limit(limit)
+        )
+        return {"success": True, "data": response.data}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def init_estoque(app):
+    """
+    Configura os dados de estoque mantidos fora do banco (valor total e vencimentos)
+
+    Configurações:
+        ESTOQUE_VALOR_INCREMENTAL: Liga o total mantido por variações (padrão True)
+        ESTOQUE_VALOR_ARQUIVO: Arquivo com o total, compartilhado pelos workers
+        ESTOQUE_VALOR_RECONCILIAR: Segundos entre recálculos completos (padrão 600)
+        ESTOQUE_MOVIMENTOS_PENDENTES_ARQUIVO: Movimentos que falharam, a regravar
+            (obrigatório em produção, num volume persistente)
+        ESTOQUE_VENCIMENTO_ARQUIVO: Arquivo com a lista de vencimentos do dia
+        ESTOQUE_BAIXO_ARQUIVO: Arquivo com o conjunto de produtos com estoque baixo
+        ESTOQUE_MINIMO_PADRAO: Mínimo dos produtos sem estoque_minimo (padrão 10)
+    """
+    _valor_state['enabled'] = app.config.get('ESTOQUE_VALOR_INCREMENTAL', True)
+    _valor_state['arquivo'] = app.config.get('ESTOQUE_VALOR_ARQUIVO', _valor_state['arquivo'])
+    _valor_state['intervalo'] = app.config.get('ESTOQUE_VALOR_RECONCILIAR', 600)
+    if 'ESTOQUE_MOVIMENTOS_PENDENTES_ARQUIVO' in app.config and not app.config['ESTOQUE_MOVIMENTOS_PENDENTES_ARQUIVO']:
+        raise RuntimeError(
+            "Defina ESTOQUE_MOVIMENTOS_PENDENTES_ARQUIVO num volume persistente: "
+            "movimentos pendentes em /tmp se perdem no redeploy"
+        )
+    _movimentos_state['arquivo'] = app.config.get('ESTOQUE_MOVIMENTOS_PENDENTES_ARQUIVO', _movimentos_state['arquivo'])
+    _vencimento_state['enabled'] = True
+    _vencimento_state['arquivo'] = app.config.get('ESTOQUE_VENCIMENTO_ARQUIVO', _vencimento_state['arquivo'])
+    _estoque_baixo_state['enabled'] = True
+    _estoque_baixo_state['arquivo'] = app.config.get('ESTOQUE_BAIXO_ARQUIVO', _estoque_baixo_state['arquivo'])
+    _estoque_baixo_state['minimo_padrao'] = float(app.config.get('ESTOQUE_MINIMO_PADRAO', 10))
+    for arquivo in (_valor_state['arquivo'], _movimentos_state['arquivo'],
+                    _vencimento_state['arquivo'], _estoque_baixo_state['arquivo']):
+        os.makedirs(os.path.dirname(arquivo) or '.', exist_ok=True)
+
+
+def ajustar_valor_estoque(variacao: float):
+    """
+    Soma uma variação ao valor total do estoque
+
+    Chamado por quem altera quantidade ou custo (venda, cadastro, edição e
+    exclusão de produto), depois que a alteração foi gravada.
+    """
+    if not _valor_state['enabled'] or not variacao:
+        return
+    _garantir_reconciliacao()
+    try:
+        with shared_lock(_valor_state['arquivo']):
+            dados = read_json(_valor_state['arquivo'])
+            if dados is None:
+                # Sem total ainda: a primeira reconciliação calcula
+                return
+            # 'acumulado' nunca é zerado: a reconciliação usa para somar as
+            # variações que chegaram durante a soma completa
+            dados['acumulado'] = dados.get('acumulado', 0) + variacao
+            if dados.get('valor_total') is not None:
+                dados['valor_total'] += variacao
+            write_json(_valor_state['arquivo'], dados)
+    except OSError:
+        logger.exception("Falha ao atualizar o valor do estoque")
+
+
+def _somar_valor_produtos() -> float:
+    produtos = execute_read_all(
+        lambda: supabase_client().table("produtos").select("quantidade, preco_custo").order("id")
+    )
+    return sum(
+        float(p.get('quantidade') or 0) * float(p.get('preco_custo') or 0)
+        for p in produtos
+    )
+
+
+def reconciliar_valor_estoque(forcar: bool = False) -> Optional[float]:
+    """
+    Recalcula o valor do estoque somando todos os produtos
+
+    Args:
+        forcar: Recalcula mesmo que outro worker tenha reconciliado há pouco
+
+    Returns:
+        Valor total atual (None se o recálculo falhou e não há total salvo)
+    """
+    intervalo = _valor_state['intervalo']
+    with shared_lock(_valor_state['arquivo']):
+        dados = read_json(_valor_state['arquivo']) or {'valor_total': None, 'acumulado': 0, 'reconciliado_em': 0}
+        agora = _time.time()
+        recente = agora - dados.get('reconciliado_em', 0) < intervalo
+        em_andamento = agora - (dados.get('reconciliando_desde') or 0) < intervalo
+        if not forcar and (em_andamento or (recente and dados.get('valor_total') is not None)):
+            return dados.get('valor_total')
+        acumulado_inicio = dados.get('acumulado', 0)
+        dados['reconciliando_desde'] = agora
+        write_json(_valor_state['arquivo'], dados)
+
+    try:
+        soma = _somar_valor_produtos()
+    except Exception:
+        logger.exception("Falha ao reconciliar o valor do estoque")
+        with shared_lock(_valor_state['arquivo']):
+            dados = read_json(_valor_state['arquivo']) or dados
+            dados['reconciliando_desde'] = None
+            write_json(_valor_state['arquivo'], dados)
+        return dados.get('valor_total')
+
+    with shared_lock(_valor_state['arquivo']):
+        dados = read_json(_valor_state['arquivo']) or dados
+        # Variações gravadas durante a soma podem ou não estar nela; somá-las
+        # erra no máximo por essas poucas vendas, até a próxima reconciliação
+        dados['valor_total'] = soma + (dados.get('acumulado', 0) - acumulado_inicio)
+        dados['reconciliado_em'] = _time.time()
+        dados['reconciliando_desde'] = None
+        write_json(_valor_state['arquivo'], dados)
+        return dados['valor_total']
+
+
+def _loop_reconciliacao():
+    while True:
+        try:
+            regravar_movimentos_pendentes()
+        except Exception:
+            logger.exception("Falha ao regravar movimentos de estoque pendentes")
+        if _valor_state['enabled']:
+            try:
+                reconciliar_valor_estoque()
+            except Exception:
+                logger.exception("Falha ao reconciliar o valor do estoque")
+        if _estoque_baixo_state['enabled']:
+            try:
+                reconstruir_estoque_baixo()
+            except Exception:
+                logger.exception("Falha ao reconstruir o estoque baixo")
+        _time.sleep(_valor_state['intervalo'])
+
+
+def _reset_after_fork():
+    """Descarta a trava herdada do processo pai (a thread não sobrevive ao fork)"""
+    global _reconciliacao_lock
+    _reconciliacao_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _garantir_reconciliacao():
+    """Inicia a thread de reconciliação deste worker (uma vez por processo)"""
+    pid = os.getpid()
+    if _valor_state['pid'] == pid:
+        return
+    with _reconciliacao_lock:
+        if _valor_state['pid'] == pid:
+            return
+        _valor_state['pid'] = pid
+        threading.Thread(target=_loop_reconciliacao, name='mercadim-reconciliar-estoque', daemon=True).start()
+
+
+def get_valor_estoque_atual() -> Optional[float]:
+    """
+    Valor total do estoque mantido por variações (O(1): lê um arquivo)
+
+    Returns:
+        Valor total, ou None se desligado ou ainda não calculado
+    """
+    if not _valor_state['enabled']:
+        return None
+    _garantir_reconciliacao()
+    dados = read_json(_valor_state['arquivo'])
+    return None if dados is None else dados.get('valor_total')
+
+
+def _linha_vencimento(produto: dict) -> Optional[dict]:
+    """Campos guardados na lista de vencimentos (None se o produto não tem validade)"""
+    validade = parse_date_value(produto.get('validade_lote'))
+    if validade is None:
+        return None
+    if isinstance(validade, datetime):
+        validade = validade.date()
+    return {
+        'id': produto.get('id'),
+        'nome': produto.get('nome', ''),
+        'validade_lote': validade.isoformat(),
+        'quantidade': float(produto.get('quantidade') or 0),
+        'uni_medida': produto.get('uni_medida', ''),
+    }
+
+
+def _materializar_vencimentos(hoje: date) -> dict:
+    """Lê todos os produtos que vencem entre hoje e hoje + _HORIZONTE_VENCIMENTO dias"""
+    limite = hoje + timedelta(days=_HORIZONTE_VENCIMENTO)
+    produtos = execute_read_all(
+        lambda: supabase_client().table("produtos")
+        .select("id, nome, validade_lote, quantidade, uni_medida")
+        .gte("validade_lote", hoje.isoformat())
+        .lte("validade_lote", limite.isoformat())
+        .order("id")
+    )
+    linhas = {}
+    for produto in produtos:
+        linha = _linha_vencimento(produto)
+        if linha is not None:
+            linhas[str(linha['id'])] = linha
+    # Sem estoque também entra: uma venda ou edição pode mudar a quantidade depois
+    return {'data': hoje.isoformat(), 'produtos': linhas}
+
+
+def _vencimentos_do_dia() -> dict:
+    """Lista materializada de hoje, refeita na primeira leitura do dia"""
+    hoje = now_local().date()
+    arquivo = _vencimento_state['arquivo']
+    dados = read_json(arquivo)
+    if dados and dados.get('data') == hoje.isoformat():
+        return dados
+    with shared_lock(arquivo):
+        # Outro worker pode ter refeito enquanto esperávamos a trava
+        dados = read_json(arquivo)
+        if not dados or dados.get('data') != hoje.isoformat():
+            dados = _materializar_vencimentos(hoje)
+            write_json(arquivo, dados)
+    return dados
+
+
+def _na_janela(linha: Optional[dict], hoje: date) -> bool:
+    if linha is None:
+        return False
+    return hoje <= date.fromisoformat(linha['validade_lote']) <= hoje + timedelta(days=_HORIZONTE_VENCIMENTO)
+
+
+def _atualizar_vencimentos(produtos, removidos):
+    """Atualiza as linhas alteradas na lista de vencimentos do dia"""
+    if not _vencimento_state['enabled']:
+        return
+    arquivo = _vencimento_state['arquivo']
+    hoje = now_local().date()
+    dados = read_json(arquivo)
+    # Sem lista de hoje: a próxima leitura refaz do banco, já com esta escrita
+    if not dados or dados.get('data') != hoje.isoformat():
+        return
+    # Vendas de produtos fora da lista (a maioria) não regravam o arquivo
+    linhas = {str(p.get('id')): _linha_vencimento(p) for p in produtos}
+    if not any(i in dados['produtos'] or _na_janela(l, hoje) for i, l in linhas.items()) \
+            and not any(str(i) in dados['produtos'] for i in removidos):
+        return
+
+    try:
+        with shared_lock(arquivo):
+            dados = read_json(arquivo)
+            if not dados or dados.get('data') != hoje.isoformat():
+                return
+            lista = dados['produtos']
+            for produto_id, linha in linhas.items():
+                if _na_janela(linha, hoje):
+                    lista[produto_id] = linha
+                else:
+                    lista.pop(produto_id, None)
+            for produto_id in removidos:
+                lista.pop(str(produto_id), None)
+            write_json(arquivo, dados)
+    except OSError:
+        logger.exception("Falha ao atualizar a lista de vencimentos")
+
+
+def faixa_vencimento(dias: int) -> Optional[str]:
+    """Nome da faixa de FAIXAS_VENCIMENTO em que 'dias' cai (None se fora)"""
+    for nome, de, ate in FAIXAS_VENCIMENTO:
+        if de <= dias <= ate:
+            return nome
+    return None
+
+
+def get_vencimentos(faixa: Optional[str] = None):
+    """
+    Produtos com estoque que vencem nos próximos 30 dias, por faixa de dias
+
+    Args:
+        faixa: '0-7', '8-15' ou '16-30' (padrão: todas)
+
+    Returns:
+        {
+            'success': bool,
+            'data': {
+                'data': str ISO (dia de referência),
+                'faixas': {nome: list de produtos ordenados por validade}
+            } (se success=True),
+            'error': str (se success=False)
+        }
+        Cada produto: id, nome, validade_lote (ISO), dias_para_vencer, quantidade, uni_medida
+    """
+    nomes = [nome for nome, _de, _ate in FAIXAS_VENCIMENTO]
+    if faixa is not None and faixa not in nomes:
+        return {"success": False, "error": f"Faixa inválida (use {', '.join(nomes)})"}
+    try:
+        if _vencimento_state['enabled']:
+            dados = _vencimentos_do_dia()
+        else:
+            dados = _materializar_vencimentos(now_local().date())
+        hoje = date.fromisoformat(dados['data'])
+
+        faixas = {nome: [] for nome in nomes if faixa in (None, nome)}
+        for linha in sorted(dados['produtos'].values(), key=lambda l: (l['validade_lote'], l['nome'])):
+            if linha['quantidade'] <= 0:
+                continue
+            dias = (date.fromisoformat(linha['validade_lote']) - hoje).days
+            nome = faixa_vencimento(dias)
+            if nome in faixas:
+                faixas[nome].append(dict(linha, dias_para_vencer=dias))
+        return {"success": True, "data": {"data": dados['data'], "faixas": faixas}}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def _minimo(produto: dict) -> float:
+    minimo = produto.get('estoque_minimo')
+    return _estoque_baixo_state['minimo_padrao'] if minimo is None else float(minimo)
+
+
+def _linha_estoque_baixo(produto: dict) -> dict:
+    return {
+        'id': produto.get('id'),
+        'nome': produto.get('nome', ''),
+        'quantidade': float(produto.get('quantidade') or 0),
+        'estoque_minimo': _minimo(produto),
+        'uni_medida': produto.get('uni_medida', ''),
+    }
+
+
+def _evento_estoque(tipo: str, linha: dict, origem: str) -> dict:
+    return dict(linha, tipo=tipo, origem=origem, em=now_local().isoformat())
+
+
+def _publicar_alertas(dados: dict, eventos: list):
+    """Guarda os eventos no arquivo (chamado com a trava) e os registra no log"""
+    if not eventos:
+        return
+    dados['alertas'] = (dados.get('alertas', []) + eventos)[-_MAX_ALERTAS:]
+    for evento in eventos:
+        logger.info("Estoque baixo: %s %s (%s de mínimo %s)", evento['tipo'], evento['nome'],
+                    evento['quantidade'], evento['estoque_minimo'])
+
+
+def _notificar_assinantes(eventos: list):
+    """Chama os assinantes fora da trava (podem demorar: e-mail, webhook)"""
+    for evento in eventos:
+        for callback in list(_assinantes_alertas):
+            try:
+                callback(evento)
+            except Exception:
+                logger.exception("Falha ao notificar alerta de estoque baixo")
+
+
+def assinar_alertas_estoque(callback):
+    """
+    Registra uma função chamada a cada produto que entra ou sai do estoque baixo
+
+    O evento é um dict com id, nome, quantidade, estoque_minimo, uni_medida,
+    tipo ('entrou' ou 'saiu'), origem ('escrita' ou 'reconstrucao') e em (ISO).
+    Roda no worker que detectou o cruzamento, depois que a escrita foi gravada.
+    """
+    _assinantes_alertas.append(callback)
+    return callback
+
+
+def _ler_estoque_baixo() -> dict:
+    """Lê todos os produtos e devolve os com quantidade <= mínimo, por ID (str)"""
+    produtos = execute_read_all(
+        lambda: supabase_client().table("produtos")
+        .select("id, nome, quantidade, uni_medida, estoque_minimo").order("id")
+    )
+    return {
+        str(p.get('id')): _linha_estoque_baixo(p)
+        for p in produtos
+        if float(p.get('quantidade') or 0) <= _minimo(p)
+    }
+
+
+def reconstruir_estoque_baixo(forcar: bool = False) -> Optional[dict]:
+    """
+    Refaz o conjunto de estoque baixo lendo todos os produtos
+
+    Produtos alterados pelas escritas enquanto a leitura corria mantêm a
+    versão das escritas (mais nova). Diferenças com o conjunto anterior
+    (alterações feitas fora do app) também geram eventos.
+
+    Args:
+        forcar: Refaz mesmo que outro worker tenha refeito há pouco
+
+    Returns:
+        Dados do arquivo, ou None se outro worker está refazendo
+    """
+    arquivo = _estoque_baixo_state['arquivo']
+    intervalo = _valor_state['intervalo']
+    with shared_lock(arquivo):
+        dados = read_json(arquivo)
+        agora = _time.time()
+        if dados is not None and not forcar:
+            if agora - dados.get('reconstruido_em', 0) < intervalo:
+                return dados
+            if dados.get('reconstruindo') and agora - dados['reconstruindo']['desde'] < intervalo:
+                return None
+        if dados is None:
+            # Primeira construção: o arquivo marcado faz os outros workers
+            # esperarem por ela em vez de também lerem todos os produtos
+            dados = {'produtos': {}, 'alertas': [], 'reconstruido_em': 0, 'primeira': True}
+        dados['reconstruindo'] = {'desde': agora, 'ids': []}
+        write_json(arquivo, dados)
+
+    try:
+        lidos = _ler_estoque_baixo()
+    except Exception:
+        with shared_lock(arquivo):
+            dados = read_json(arquivo) or dados
+            dados.pop('reconstruindo', None)
+            write_json(arquivo, dados)
+        raise
+    with shared_lock(arquivo):
+        atual = read_json(arquivo)
+        eventos = []
+        if atual is None:
+            atual = {'produtos': lidos, 'alertas': []}
+        else:
+            alterados = set((atual.get('reconstruindo') or {}).get('ids', []))
+            novo = {i: l for i, l in lidos.items() if i not in alterados}
+            novo.update({i: l for i, l in atual['produtos'].items() if i in alterados})
+            if not atual.pop('primeira', None):
+                # Na primeira construção não há conjunto anterior para comparar
+                eventos = [
+                    _evento_estoque('entrou', linha, 'reconstrucao')
+                    for i, linha in novo.items() if i not in atual['produtos']
+                ] + [
+                    _evento_estoque('saiu', linha, 'reconstrucao')
+                    for i, linha in atual['produtos'].items() if i not in novo and i not in alterados
+                ]
+            atual['produtos'] = novo
+            _publicar_alertas(atual, eventos)
+        atual.pop('reconstruindo', None)
+        atual['reconstruido_em'] = _time.time()
+        write_json(arquivo, atual)
+    _notificar_assinantes(eventos)
+    return atual
+
+
+def _atualizar_estoque_baixo(produtos, removidos):
+    """Inclui/remove do conjunto os produtos alterados, publicando os cruzamentos"""
+    if not _estoque_baixo_state['enabled']:
+        return
+    arquivo = _estoque_baixo_state['arquivo']
+    dados = read_json(arquivo)
+    if dados is None:
+        # Ainda não construído: a construção lê o banco, já com esta escrita
+        _garantir_reconciliacao()
+        return
+    linhas = {str(p.get('id')): _linha_estoque_baixo(p) for p in produtos}
+    # Produto fora do conjunto que continua acima do mínimo: nada a gravar
+    if not any(i in dados['produtos'] or l['quantidade'] <= l['estoque_minimo'] for i, l in linhas.items()) \
+            and not any(str(i) in dados['produtos'] for i in removidos):
+        return
+
+    eventos = []
+    try:
+        with shared_lock(arquivo):
+            dados = read_json(arquivo)
+            if dados is None:
+                return
+            conjunto = dados['produtos']
+            for produto_id, linha in linhas.items():
+                baixo = linha['quantidade'] <= linha['estoque_minimo']
+                if dados.get('primeira'):
+                    # Conjunto ainda em construção: sem estado anterior, não há cruzamento
+                    pass
+                elif baixo and produto_id not in conjunto:
+                    eventos.append(_evento_estoque('entrou', linha, 'escrita'))
+                elif not baixo and produto_id in conjunto:
+                    eventos.append(_evento_estoque('saiu', linha, 'escrita'))
+                if baixo:
+                    conjunto[produto_id] = linha
+                else:
+                    conjunto.pop(produto_id, None)
+            for produto_id in removidos:
+                conjunto.pop(str(produto_id), None)
+            if dados.get('reconstruindo'):
+                dados['reconstruindo']['ids'].extend(list(linhas) + [str(i) for i in removidos])
+            _publicar_alertas(dados, eventos)
+            write_json(arquivo, dados)
+    except OSError:
+        logger.exception("Falha ao atualizar o estoque baixo")
+    _notificar_assinantes(eventos)
+
+
+def produtos_alterados(produtos=(), removidos=()):
+    """
+    Atualiza as listas mantidas fora do banco (vencimentos e estoque baixo)
+
+    Chamado depois que a escrita em produtos foi gravada.
+
+    Args:
+        produtos: Linhas de produtos criados, editados ou vendidos, com a
+            quantidade já atualizada (todas as colunas, como o banco devolve)
+        removidos: IDs de produtos excluídos
+    """
+    _atualizar_vencimentos(produtos, removidos)
+    _atualizar_estoque_baixo(produtos, removidos)
+
+
+def get_estoque_baixo(max_results: Optional[int] = None):
+    """
+    Produtos com quantidade <= estoque mínimo (menor quantidade primeiro)
+
+    Returns:
+        {
+            'success': bool,
+            'data': list de dicts com id, nome, quantidade, estoque_minimo, uni_medida
+                    (se success=True),
+            'error': str (se success=False)
+        }
+    """
+    try:
+        if _estoque_baixo_state['enabled']:
+            _garantir_reconciliacao()
+            dados = read_json(_estoque_baixo_state['arquivo'])
+            if dados is None or dados.get('primeira'):
+                # Só um worker constrói; os demais respondem sem esperar a leitura completa
+                dados = reconstruir_estoque_baixo()
+                if dados is None:
+                    return {"success": False, "error": "Estoque baixo ainda em cálculo; tente de novo em instantes", "data": []}
+            conjunto = dados['produtos']
+        else:
+            conjunto = _ler_estoque_baixo()
+        produtos = sorted(conjunto.values(), key=lambda p: (p['quantidade'], p['nome']))
+        return {"success": True, "data": produtos[:max_results] if max_results else produtos}
+    except Exception as e:
+        return {"success": False, "error": str(e), "data": []}
+
+
+def get_alertas_estoque(limit: int = 50):
+    """
+    Últimos eventos de entrada/saída do estoque baixo (mais recentes primeiro)
+
+    Returns:
+        {
+            'success': bool,
+            'data': list de eventos (ver assinar_alertas_estoque) (se success=True),
+            'error': str (se success=False)
+        }
+    """
+    dados = read_json(_estoque_baixo_state['arquivo']) or {}
+    return {"success": True, "data": list(reversed(dados.get('alertas', [])))[:limit]}
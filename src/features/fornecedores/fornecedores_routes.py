@@ -5,11 +5,25 @@ from src.features.fornecedores.fornecedores_service import (
     create_fornecedor as create_fornecedor_service, 
     get_fornecedor_by_id, 
     update_fornecedor, 
-    delete_fornecedor as delete_fornecedor_service
+    delete_fornecedor as delete_fornecedor_service,
+    FornecedorRow
 )
+from src.common.view_models import columns_for
+from src.core.conditional import conditional_get
 
 fornecedores_bp = Blueprint('fornecedores', __name__, url_prefix='/fornecedores')
 
+# Colunas da listagem (formatação aplicada no template)
+COLUNAS = columns_for(FornecedorRow, [
+    ("Nome Fantasia", 'nome_fantasia'),
+    ("Email", 'email'),
+    ("Telefone", 'telefone'),
+    ("Cidade", 'cidade'),
+    ("Estado", 'estado'),
+    ("Status", 'status', 'status'),
+])
+
+
 
 def get_form_fields(fornecedor_data=None):
     """
@@ -96,9 +110,19 @@ def get_form_fields(fornecedor_data=None):
             'label': 'Frete',
             'placeholder': '0.00',
             'required': False,
-            'cols': 6,
+            'cols': 3,
             'step': '0.01'
         },
+        {
+            'name': 'prazo_entrega',
+            'id': 'prazo_entrega',
+            'type': 'number',
+            'label': 'Prazo de Entrega (dias)',
+            'placeholder': '7',
+            'required': False,
+            'cols': 3,
+            'step': '1'
+        },
         {
             'name': 'status',
             'id': 'status',
@@ -144,12 +168,14 @@ def collect_form_data():
         'bairro': request.form.get('bairro', '').strip() or None,
         'cep': request.form.get('cep', '').strip() or None,
         'frete': request.form.get('frete', '').strip() or None,
+        'prazo_entrega': request.form.get('prazo_entrega', '').strip() or None,
         'status': request.form.get('status') == 'on' or request.form.get('status') == 'true'
     }
 
 
 @fornecedores_bp.route('/')
 @login_required
+@conditional_get(resources=('fornecedores',))
 def fornecedores_view():
     """Rota para listar todos os fornecedores"""
     logged_user = session.get('user', {})
@@ -160,13 +186,12 @@ def fornecedores_view():
         flash(f'Erro ao carregar fornecedores: {fornecedores_data.get("error", "Erro desconhecido")}', 'error')
         fornecedores_data['data'] = []
 
-    headers = ["Nome Fantasia", "Email", "Telefone", "Cidade", "Estado", "Status"]
     rows = fornecedores_data['data']
     
     return render_template(
         'fornecedores/list_fornecedores.html',
         title="Lista de Fornecedores",
-        headers=headers,
+        columns=COLUNAS,
         rows=rows,
         add_url=url_for('fornecedores.create_fornecedor'),
         edit_url='fornecedores.edit_fornecedor',
@@ -1,4 +1,7 @@
 from src.core.database import supabase_client
+from src.core.resilience import execute_read
+from src.core.conditional import bump_data_version
+from typing import Any, NamedTuple
 
 
 def prepare_data(fornecedor_data: dict, is_update=False):
@@ -48,6 +51,17 @@ def prepare_data(fornecedor_data: dict, is_update=False):
             # Em update, se foi enviado vazio, pode ser None
             prepared['frete'] = None
     
+    # Campo inteiro: prazo_entrega (dias entre o pedido e a chegada)
+    if 'prazo_entrega' in fornecedor_data:
+        prazo_value = fornecedor_data.get('prazo_entrega')
+        if prazo_value is not None and str(prazo_value).strip():
+            try:
+                prepared['prazo_entrega'] = int(float(str(prazo_value).strip()))
+            except (ValueError, TypeError):
+                pass  # Ignora se não for número válido
+        elif is_update:
+            prepared['prazo_entrega'] = None
+    
     # Campo booleano: status
     if 'status' in fornecedor_data:
         prepared['status'] = bool(fornecedor_data.get('status'))
@@ -58,6 +72,17 @@ def prepare_data(fornecedor_data: dict, is_update=False):
     return prepared
 
 
+class FornecedorRow(NamedTuple):
+    """Linha da listagem de fornecedores (valores crus; formatação no template)"""
+    id: Any
+    nome_fantasia: str
+    email: str
+    telefone: str
+    cidade: str
+    estado: str
+    status: bool
+
+
 def list_fornecedores():
     """
     Lista todos os fornecedores da tabela fornecedores
@@ -65,30 +90,30 @@ def list_fornecedores():
     Returns:
         {
             'success': bool,
-            'data': list de listas com dados dos fornecedores (se success=True),
+            'data': list de FornecedorRow (se success=True),
             'error': str (se success=False)
         }
     """
     try:
-        response = (
+        response = execute_read(
             supabase_client()
             .table("fornecedores")
-            .select("*")
-            .execute()
+            .select("*"),
+            stale_key="list_fornecedores"
         )
 
-        fornecedores_data = []
-        for fornecedor in response.data:
-            # O primeiro elemento é o ID - será usado nas ações mas não exibido na tabela
-            fornecedores_data.append([
-                fornecedor.get('id', ''),  # ID - não será exibido
+        fornecedores_data = [
+            FornecedorRow(
+                fornecedor.get('id', ''),
                 fornecedor.get('nome_fantasia', ''),
                 fornecedor.get('email', ''),
                 fornecedor.get('telefone', ''),
                 fornecedor.get('cidade', ''),
                 fornecedor.get('estado', ''),
-                'Ativo' if fornecedor.get('status', False) else 'Inativo'
-            ])
+                bool(fornecedor.get('status', False))
+            )
+            for fornecedor in response.data
+        ]
 
         return {"success": True, "data": fornecedores_data}
     except Exception as e:
@@ -110,12 +135,11 @@ def get_fornecedor_by_id(fornecedor_id: str):
         }
     """
     try:
-        response = (
+        response = execute_read(
             supabase_client()
             .table("fornecedores")
             .select("*")
             .eq("id", fornecedor_id)
-            .execute()
         )
         
         if response.data and len(response.data) > 0:
@@ -164,6 +188,7 @@ def create_fornecedor(fornecedor_data: dict):
             .insert(insert_data)
             .execute()
         )
+        bump_data_version('fornecedores')
         
         if response.data and len(response.data) > 0:
             return {
@@ -214,6 +239,7 @@ def update_fornecedor(fornecedor_id: str, fornecedor_data: dict):
             .eq("id", fornecedor_id)
             .execute()
         )
+        bump_data_version('fornecedores')
         
         if response.data and len(response.data) > 0:
             return {
@@ -253,6 +279,7 @@ def delete_fornecedor(fornecedor_id: str):
             .eq("id", fornecedor_id)
             .execute()
         )
+        bump_data_version('fornecedores')
         
         # Verifica se deletou algo
         if response.data and len(response.data) > 0:
@@ -2,15 +2,32 @@ from flask import Blueprint, render_template, session, request, redirect, url_fo
 from src.features.auth.auth_decorators import login_required
 from src.features.produtos.produtos_service import (
     list_produtos, 
+    list_produtos_async,
     create_produto as create_produto_service, 
     get_produto_by_id, 
     update_produto, 
     delete_produto as delete_produto_service,
-    get_fornecedores_for_select
+    get_fornecedores_for_select,
+    ProdutoRow
 )
+from src.common.view_models import columns_for
+from src.core.conditional import conditional_get
+from src.core.async_database import run_async, use_async_services
 
 produtos_bp = Blueprint('produtos', __name__, url_prefix='/produtos')
 
+# Colunas da listagem (formatação aplicada no template)
+COLUNAS = columns_for(ProdutoRow, [
+    ("Nome", 'nome'),
+    ("Preço Custo", 'preco_custo', 'currency'),
+    ("Preço Venda", 'preco_venda', 'currency'),
+    ("Quantidade", 'quantidade', 'quantity', 'uni_medida'),
+    ("Validade", 'validade_lote', 'date'),
+    ("Código de Barras", 'codigo_barra'),
+    ("Fornecedor", 'fornecedor'),
+])
+
+
 
 def get_form_fields(produto_data=None, fornecedores=None):
     """
@@ -74,7 +91,17 @@ def get_form_fields(produto_data=None, fornecedores=None):
                 {'value': 'L', 'label': 'Litros'}
             ],
             'required': False,
-            'cols': 6
+            'cols': 4
+        },
+        {
+            'name': 'estoque_minimo',
+            'id': 'estoque_minimo',
+            'type': 'number',
+            'label': 'Estoque Mínimo',
+            'placeholder': 'Padrão: 10',
+            'required': False,
+            'cols': 4,
+            'step': '0.01'
         },
         {
             'name': 'validade_lote',
@@ -83,7 +110,7 @@ def get_form_fields(produto_data=None, fornecedores=None):
             'label': 'Validade do Lote',
             'placeholder': '',
             'required': False,
-            'cols': 6
+            'cols': 4
         },
         {
             'name': 'codigo_barra',
@@ -121,6 +148,14 @@ def get_form_fields(produto_data=None, fornecedores=None):
                 field['value'] = validade
             else:
                 field['value'] = produto_data.get(field_name, '')
+        # Quantidade do formulário aberto: a edição só grava se o estoque ainda for este
+        fields.append({
+            'name': 'quantidade_lida',
+            'id': 'quantidade_lida',
+            'type': 'hidden',
+            'value': produto_data.get('quantidade', ''),
+            'cols': 12
+        })
     
     return fields
 
@@ -132,6 +167,8 @@ def collect_form_data():
         'preco_custo': request.form.get('preco_custo', '').strip() or None,
         'preco_venda': request.form.get('preco_venda', '').strip() or None,
         'quantidade': request.form.get('quantidade', '').strip() or None,
+        'quantidade_lida': request.form.get('quantidade_lida'),
+        'estoque_minimo': request.form.get('estoque_minimo', '').strip() or None,
         'validade_lote': request.form.get('validade_lote', '').strip() or None,
         'codigo_barra': request.form.get('codigo_barra', '').strip() or None,
         'id_fornecedor': request.form.get('id_fornecedor', '').strip() or None,
@@ -141,23 +178,23 @@ def collect_form_data():
 
 @produtos_bp.route('/')
 @login_required
+@conditional_get(resources=('produtos', 'fornecedores'))
 def produtos_view():
     """Rota para listar todos os produtos"""
     logged_user = session.get('user', {})
 
-    produtos_data = list_produtos()
+    produtos_data = run_async(list_produtos_async()) if use_async_services() else list_produtos()
 
     if not produtos_data['success']:
         flash(f'Erro ao carregar produtos: {produtos_data.get("error", "Erro desconhecido")}', 'error')
         produtos_data['data'] = []
 
-    headers = ["Nome", "Preço Custo", "Preço Venda", "Quantidade", "Validade", "Código de Barras", "Fornecedor"]
     rows = produtos_data['data']
     
     return render_template(
         'produtos/list_produtos.html',
         title="Lista de Produtos",
-        headers=headers,
+        columns=COLUNAS,
         rows=rows,
         add_url=url_for('produtos.create_produto'),
         edit_url='produtos.edit_produto',
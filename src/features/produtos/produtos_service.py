@@ -1,4 +1,14 @@
 from src.core.database import supabase_client
+from src.core.resilience import execute_read, execute_read_async
+from src.core.async_database import async_supabase_client
+from src.core.conditional import bump_data_version
+from src.common.dates import parse_date_column
+from src.features.estoque.estoque_service import (
+    condicao_quantidade, movimento_estoque, registrar_movimentos, ajustar_valor_estoque, variacao_valor,
+    produtos_alterados
+)
+from datetime import date
+from typing import Any, NamedTuple, Optional
 
 
 def prepare_data(produto_data: dict, is_update=False):
@@ -24,6 +34,7 @@ def prepare_data(produto_data: dict, is_update=False):
         'preco_custo': None,
         'preco_venda': 255,  # Valor padrão
         'quantidade': None,
+        'estoque_minimo': None,
         'codigo_barra': None
     }
     
@@ -66,12 +77,77 @@ def prepare_data(produto_data: dict, is_update=False):
                 prepared[field] = None
     
     # Remove campos vazios (exceto valores numéricos que podem ser 0)
-    numeric_field_names = ['preco_custo', 'preco_venda', 'quantidade', 'codigo_barra', 'id_fornecedor']
+    numeric_field_names = ['preco_custo', 'preco_venda', 'quantidade', 'estoque_minimo', 'codigo_barra', 'id_fornecedor']
     prepared = {k: v for k, v in prepared.items() if v != '' or k in numeric_field_names}
     
     return prepared
 
 
+def _query_produtos(client, limit, offset):
+    """Consulta uma página de produtos com o nome do fornecedor"""
+    return (
+        client
+        .table("produtos")
+        .select("*, fornecedores(nome_fantasia)", count="exact")
+        .order("id", desc=True)
+        .range(offset, offset + limit - 1)
+    )
+
+
+class ProdutoRow(NamedTuple):
+    """Linha da listagem de produtos (valores crus; formatação no template)"""
+    id: Any
+    nome: str
+    preco_custo: Optional[float]
+    preco_venda: Optional[float]
+    quantidade: Optional[float]
+    validade_lote: Optional[date]
+    codigo_barra: Optional[int]
+    fornecedor: str
+    uni_medida: str
+
+
+def _produto_row(produto, validade):
+    """Monta a linha da listagem a partir do registro do banco"""
+    # Extrai nome do fornecedor
+    fornecedor = produto.get('fornecedores', {})
+    fornecedor_nome = fornecedor.get('nome_fantasia', '') if isinstance(fornecedor, dict) else ''
+
+    # Código de barras (numérico no banco)
+    codigo_barra = produto.get('codigo_barra')
+
+    return ProdutoRow(
+        produto.get('id', ''),
+        produto.get('nome', ''),
+        produto.get('preco_custo'),
+        produto.get('preco_venda'),
+        produto.get('quantidade'),
+        validade,
+        int(codigo_barra) if codigo_barra else None,
+        fornecedor_nome,
+        produto.get('uni_medida') or ''
+    )
+
+
+def _montar_lista_produtos(response):
+    """
+    Monta o resultado da listagem com total (se disponível)
+
+    DECISÃO: Linhas com valores crus (ver src/common/view_models.py)
+    Validades são convertidas por coluna (formato detectado uma vez, memoizado)
+    """
+    produtos = response.data
+    validades = parse_date_column([p.get('validade_lote') for p in produtos])
+
+    result = {
+        "success": True,
+        "data": [_produto_row(p, validade) for p, validade in zip(produtos, validades)]
+    }
+    if hasattr(response, 'count') and response.count is not None:
+        result['total'] = response.count
+    return result
+
+
 def list_produtos(limit=100, offset=0):
     """
     Lista produtos da tabela produtos com informações do fornecedor
@@ -84,70 +160,31 @@ def list_produtos(limit=100, offset=0):
     Returns:
         {
             'success': bool,
-            'data': list de listas com dados dos produtos (se success=True),
+            'data': list de ProdutoRow (se success=True),
             'error': str (se success=False),
             'total': int (total de produtos, se disponível)
         }
     """
     try:
         # Busca produtos com join no fornecedor, com limite e offset
-        response = (
-            supabase_client()
-            .table("produtos")
-            .select("*, fornecedores(nome_fantasia)", count="exact")
-            .order("id", desc=True)
-            .range(offset, offset + limit - 1)
-            .execute()
+        response = execute_read(
+            _query_produtos(supabase_client(), limit, offset),
+            stale_key=f"list_produtos:{limit}:{offset}"
         )
+        return _montar_lista_produtos(response)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
 
-        produtos_data = []
-        for produto in response.data:
-            # Extrai nome do fornecedor
-            fornecedor = produto.get('fornecedores', {})
-            fornecedor_nome = fornecedor.get('nome_fantasia', '') if isinstance(fornecedor, dict) else ''
-            
-            # Formatação de preços
-            preco_custo = produto.get('preco_custo')
-            preco_custo_str = f"R$ {float(preco_custo):.2f}".replace('.', ',') if preco_custo is not None else 'R$ 0,00'
-            
-            preco_venda = produto.get('preco_venda')
-            preco_venda_str = f"R$ {float(preco_venda):.2f}".replace('.', ',') if preco_venda is not None else 'R$ 0,00'
-            
-            # Formatação de quantidade
-            quantidade = produto.get('quantidade')
-            uni_medida = produto.get('uni_medida', '')
-            quantidade_str = f"{float(quantidade):.2f} {uni_medida}".replace('.', ',') if quantidade is not None else f"0 {uni_medida}"
-            
-            # Validade
-            validade = produto.get('validade_lote', '') or ''
-            if validade:
-                try:
-                    from datetime import datetime
-                    if isinstance(validade, str):
-                        validade = datetime.strptime(validade, '%Y-%m-%d').strftime('%d/%m/%Y')
-                except:
-                    pass
-            
-            # Código de barras
-            codigo_barra = produto.get('codigo_barra', '') or ''
-            codigo_barra_str = str(int(codigo_barra)) if codigo_barra else ''
-            
-            produtos_data.append([
-                produto.get('id', ''),  # ID - não será exibido
-                produto.get('nome', ''),
-                preco_custo_str,
-                preco_venda_str,
-                quantidade_str,
-                validade,
-                codigo_barra_str,
-                fornecedor_nome
-            ])
-
-        # Retorna dados com total (se disponível)
-        result = {"success": True, "data": produtos_data}
-        if hasattr(response, 'count') and response.count is not None:
-            result['total'] = response.count
-        return result
+
+async def list_produtos_async(limit=100, offset=0):
+    """Versão assíncrona de list_produtos (mesmo retorno)"""
+    try:
+        client = await async_supabase_client()
+        response = await execute_read_async(
+            _query_produtos(client, limit, offset),
+            stale_key=f"list_produtos:{limit}:{offset}"
+        )
+        return _montar_lista_produtos(response)
     except Exception as e:
         return {"success": False, "error": str(e)}
 
@@ -167,12 +204,11 @@ def get_produto_by_id(produto_id: str):
         }
     """
     try:
-        response = (
+        response = execute_read(
             supabase_client()
             .table("produtos")
             .select("*, fornecedores(nome_fantasia)")
             .eq("id", produto_id)
-            .execute()
         )
         
         if response.data and len(response.data) > 0:
@@ -201,12 +237,12 @@ def get_fornecedores_for_select():
         }
     """
     try:
-        response = (
+        response = execute_read(
             supabase_client()
             .table("fornecedores")
             .select("id, nome_fantasia")
-            .eq("status", True)  # Apenas fornecedores ativos
-            .execute()
+            .eq("status", True),  # Apenas fornecedores ativos
+            stale_key="get_fornecedores_for_select"
         )
         
         fornecedores = []
@@ -253,8 +289,17 @@ def create_produto(produto_data: dict):
             .insert(insert_data)
             .execute()
         )
+        bump_data_version('produtos')
         
         if response.data and len(response.data) > 0:
+            produto = response.data[0]
+            # Estoque inicial (e custo) entram no livro-razão
+            movimentos = [movimento_estoque(
+                produto.get('id'), 'cadastro', produto.get('quantidade') or 0, produto.get('preco_custo')
+            )]
+            registrar_movimentos(movimentos)
+            ajustar_valor_estoque(variacao_valor(movimentos))
+            produtos_alterados(produtos=[produto])
             return {
                 "success": True,
                 "data": response.data[0],
@@ -270,6 +315,75 @@ def create_produto(produto_data: dict):
         return {"success": False, "error": str(e)}
 
 
+# Tentativas da edição de estoque quando uma venda altera o produto ao mesmo tempo
+_TENTATIVAS_ESTOQUE = 20
+
+# _update_com_movimento sem quantidade_lida: compara com a quantidade relida agora
+_RELER = object()
+
+
+def _mesma_quantidade(a, b) -> bool:
+    """Quantidades iguais (vazio conta como zero, como no formulário)"""
+    return round(float(a or 0), 6) == round(float(b or 0), 6)
+
+
+def _update_com_movimento(produto_id, update_data, quantidade_lida=_RELER):
+    """
+    Atualiza o produto e registra a mudança de estoque/custo no livro-razão
+
+    DECISÃO: A quantidade digitada é uma contagem (valor absoluto), gravada
+    só se o estoque ainda for o lido (compare-and-set, como na venda). Assim
+    a variação registrada é exatamente a que a edição aplicou, mesmo com
+    vendas acontecendo ao mesmo tempo.
+    DECISÃO: A edição pela tela compara com a quantidade do formulário aberto
+    Comparar com a quantidade relida no envio gravaria a contagem velha por
+    cima das vendas feitas enquanto o formulário estava aberto (e um 'ajuste'
+    falso no livro-razão). Se o estoque mudou desde quantidade_lida, a edição
+    falha e o usuário confere a contagem.
+
+    Args:
+        produto_id: ID do produto
+        update_data: Campos a gravar (prepare_data)
+        quantidade_lida: Quantidade mostrada no formulário (padrão: relida agora)
+    """
+    for _tentativa in range(_TENTATIVAS_ESTOQUE):
+        atual = (
+            supabase_client()
+            .table("produtos")
+            .select("quantidade, preco_custo")
+            .eq("id", produto_id)
+            .execute()
+        )
+        if not atual.data:
+            return atual
+        anterior = atual.data[0]
+        if quantidade_lida is not _RELER and not _mesma_quantidade(anterior.get('quantidade'), quantidade_lida):
+            raise ValueError(
+                f"O estoque mudou enquanto o formulário estava aberto (agora: {anterior.get('quantidade')}); "
+                "confira a quantidade e salve de novo"
+            )
+
+        response = condicao_quantidade(
+            supabase_client().table("produtos").update(update_data).eq("id", produto_id),
+            anterior.get('quantidade')
+        ).execute()
+        if response.data:
+            break
+    else:
+        raise RuntimeError("Estoque alterado por vendas ao mesmo tempo; tente novamente")
+
+    produto = response.data[0]
+    variacao = float(produto.get('quantidade') or 0) - float(anterior.get('quantidade') or 0)
+    if variacao or produto.get('preco_custo') != anterior.get('preco_custo'):
+        registrar_movimentos([movimento_estoque(produto.get('id'), 'ajuste', variacao, produto.get('preco_custo'))])
+        # Troca de custo reavalia todo o estoque do produto, não só a variação
+        ajustar_valor_estoque(
+            float(produto.get('quantidade') or 0) * float(produto.get('preco_custo') or 0)
+            - float(anterior.get('quantidade') or 0) * float(anterior.get('preco_custo') or 0)
+        )
+    return response
+
+
 def update_produto(produto_id: str, produto_data: dict):
     """
     Atualiza um produto existente
@@ -295,16 +409,31 @@ def update_produto(produto_id: str, produto_data: dict):
                 "error": "Nenhum dado para atualizar"
             }
         
-        # Atualiza o produto
-        response = (
-            supabase_client()
-            .table("produtos")
-            .update(update_data)
-            .eq("id", produto_id)
-            .execute()
-        )
+        # Formulário de edição: quantidade mostrada quando foi aberto ('' = vazio)
+        quantidade_lida = _RELER
+        if produto_data.get('quantidade_lida') is not None:
+            quantidade_lida = float(produto_data['quantidade_lida'].strip() or 0)
+            if 'quantidade' in update_data and _mesma_quantidade(update_data['quantidade'], quantidade_lida):
+                # Quantidade não foi alterada: vendas feitas com o formulário aberto continuam valendo
+                del update_data['quantidade']
+
+        if 'quantidade' in update_data or 'preco_custo' in update_data:
+            response = _update_com_movimento(
+                produto_id, update_data, quantidade_lida if 'quantidade' in update_data else _RELER
+            )
+        else:
+            # Atualiza o produto
+            response = (
+                supabase_client()
+                .table("produtos")
+                .update(update_data)
+                .eq("id", produto_id)
+                .execute()
+            )
+        bump_data_version('produtos')
         
         if response.data and len(response.data) > 0:
+            produtos_alterados(produtos=[response.data[0]])
             return {
                 "success": True,
                 "data": response.data[0],
@@ -342,9 +471,18 @@ def delete_produto(produto_id: str):
             .eq("id", produto_id)
             .execute()
         )
+        bump_data_version('produtos')
         
         # Verifica se deletou algo
         if response.data and len(response.data) > 0:
+            # O estoque que sai com o produto fecha o histórico dele
+            produto = response.data[0]
+            movimentos = [movimento_estoque(
+                produto.get('id'), 'exclusao', -float(produto.get('quantidade') or 0), produto.get('preco_custo')
+            )]
+            registrar_movimentos(movimentos)
+            ajustar_valor_estoque(variacao_valor(movimentos))
+            produtos_alterados(removidos=[produto.get('id')])
             return {
                 "success": True,
                 "message": "Produto deletado com sucesso"
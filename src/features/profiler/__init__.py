@@ -0,0 +1,3 @@
+from .profiler_routes import profiler_bp
+
+__all__ = ['profiler_bp']
@@ -0,0 +1,56 @@
+from flask import Blueprint, render_template, session, flash, send_from_directory, current_app, jsonify
+from src.core import get_pool_stats, get_resilience_stats
+from src.features.auth.auth_decorators import admin_required
+from src.features.profiler.profiler_service import list_profiles, get_profile_dir
+
+profiler_bp = Blueprint('profiler', __name__, url_prefix='/profiler')
+
+
+@profiler_bp.route('/')
+@admin_required
+def list_profiles_view():
+    """Rota para listar os perfis de requisições gravados"""
+    logged_user = session.get('user', {})
+
+    profiles_data = list_profiles()
+
+    if not profiles_data['success']:
+        flash(f'Erro ao carregar perfis: {profiles_data.get("error", "Erro desconhecido")}', 'error')
+        profiles_data['data'] = []
+
+    if not current_app.config.get('PROFILER_ENABLED'):
+        flash('Profiler desativado. Defina PROFILER_ENABLED=true para gravar novos perfis.', 'warning')
+
+    headers = ["Data/Hora", "Método", "Caminho", "Duração"]
+    rows = profiles_data['data']
+
+    return render_template(
+        'profiler/list_profiles.html',
+        title="Perfis de Requisições",
+        headers=headers,
+        rows=rows,
+        view_url='profiler.download_profile',
+        user=logged_user
+    )
+
+
+@profiler_bp.route('/download/<path:id>')
+@admin_required
+def download_profile(id):
+    """Rota para baixar um perfil no formato folded (flamegraph)"""
+    # DECISÃO: send_from_directory impede acesso a arquivos fora do diretório
+    return send_from_directory(get_profile_dir(), id, mimetype='text/plain', as_attachment=True)
+
+
+@profiler_bp.route('/pool')
+@admin_required
+def pool_stats():
+    """Rota com métricas do pool de conexões do Supabase (worker atual)"""
+    return jsonify(get_pool_stats())
+
+
+@profiler_bp.route('/resilience')
+@admin_required
+def resilience_stats():
+    """Rota com o estado dos circuit breakers do Supabase (worker atual)"""
+    return jsonify(get_resilience_stats())
@@ -0,0 +1,56 @@
+import os
+from flask import current_app
+from src.core.profiler import PROFILE_EXTENSION
+
+
+def list_profiles(limit=100):
+    """
+    Lista os perfis gravados mais recentes
+
+    Args:
+        limit: Número máximo de perfis a retornar (padrão: 100)
+
+    Returns:
+        {
+            'success': bool,
+            'data': list de listas com dados dos perfis (se success=True),
+            'error': str (se success=False)
+        }
+    """
+    try:
+        profile_dir = current_app.config.get('PROFILER_DIR')
+        if not profile_dir or not os.path.isdir(profile_dir):
+            return {"success": True, "data": []}
+
+        files = sorted(
+            (f for f in os.listdir(profile_dir) if f.endswith(PROFILE_EXTENSION)),
+            reverse=True
+        )[:limit]
+
+        profiles_data = []
+        for filename in files:
+            # Formato: timestamp__METODO__caminho__duracaoms.folded
+            partes = filename[:-len(PROFILE_EXTENSION)].split('__')
+            if len(partes) != 4:
+                continue
+            timestamp, method, slug, duration = partes
+
+            data_str = f"{timestamp[6:8]}/{timestamp[4:6]}/{timestamp[0:4]} {timestamp[9:11]}:{timestamp[11:13]}:{timestamp[13:15]}"
+
+            # O primeiro elemento é o nome do arquivo - será usado nas ações mas não exibido na tabela
+            profiles_data.append([
+                filename,
+                data_str,
+                method,
+                '/' + slug.replace('.', '/') if slug != 'index' else '/',
+                duration.replace('ms', ' ms')
+            ])
+
+        return {"success": True, "data": profiles_data}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def get_profile_dir():
+    """Retorna o diretório onde os perfis são gravados"""
+    return current_app.config.get('PROFILER_DIR')
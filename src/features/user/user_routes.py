@@ -5,11 +5,23 @@ from src.features.user.user_service import (
     create_user as create_user_service, 
     get_user_by_id, 
     update_user, 
-    delete_user as delete_user_service
+    delete_user as delete_user_service,
+    UserRow
 )
+from src.common.view_models import columns_for
 
 user_bp = Blueprint('user', __name__, url_prefix='/user')
 
+# Colunas da listagem
+COLUNAS = columns_for(UserRow, [
+    ("Primeiro Nome", 'first_name'),
+    ("Último Nome", 'last_name'),
+    ("Email", 'email'),
+    ("Role", 'role'),
+    ("Telefone", 'phone'),
+])
+
+
 
 def get_form_fields(user_data=None, is_edit=False):
     """
@@ -168,14 +180,13 @@ def user_view():
         flash(f'Erro ao carregar usuários: {users_data.get("error", "Erro desconhecido")}', 'error')
         users_data['data'] = []
 
-    headers = ["Primeiro Nome", "Último Nome", "Email", "Role", "Telefone"]
     # Garante que rows é sempre uma lista
     rows = users_data.get('data', []) if isinstance(users_data.get('data'), list) else []
     
     return render_template(
         'user/list_user.html',
         title="Lista de Usuários",
-        headers=headers,
+        columns=COLUNAS,
         rows=rows,
         add_url=url_for('user.create_user'),
         edit_url='user.edit_user',
@@ -1,5 +1,17 @@
 import time
 from src.core.database import supabase_client
+from typing import Any, NamedTuple
+
+
+class UserRow(NamedTuple):
+    """Linha da listagem de usuários"""
+    id: Any
+    first_name: str
+    last_name: str
+    email: str
+    role: str
+    phone: str
+
 
 def list_users():
     """
@@ -47,16 +59,15 @@ def list_users():
                     # e deixa email, role e phone vazios (já inicializados acima)
                     pass
                 
-                # O primeiro elemento é o ID (UUID) - será usado nas ações mas não exibido na tabela
-                # O template usa row[1:] para pular o ID ao exibir as células
-                users_data.append([
-                    user_id,  # ID (UUID) - não será exibido
+                # O primeiro campo é o ID (UUID) - usado nas ações mas não exibido na tabela
+                users_data.append(UserRow(
+                    user_id,
                     profile.get('first_name', '') or '',
                     profile.get('last_name', '') or '',
                     email,
                     role,
                     phone or ''
-                ])
+                ))
 
         # Sempre retorna success=True com os dados (mesmo que vazio)
         return {"success": True, "data": users_data}
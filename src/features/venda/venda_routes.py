@@ -1,10 +1,27 @@
-from flask import Blueprint, render_template, session, request, redirect, url_for, flash, jsonify
+from flask import (
+    Blueprint, render_template, session, request, redirect, url_for, flash, jsonify,
+    current_app, send_from_directory
+)
 from src.features.auth.auth_decorators import login_required
-from src.features.venda.venda_service import list_produtos_disponiveis, salvar_venda, list_vendas, get_venda_by_id
+from src.features.venda.venda_service import (
+    list_produtos_disponiveis, salvar_venda, salvar_vendas_lote, sincronizar_vendas, list_vendas, get_venda_by_id,
+    list_produtos_disponiveis_async, list_vendas_async, get_venda_by_id_async, VendaRow
+)
+from src.common.view_models import columns_for
+from src.core.conditional import conditional_get
+from src.core.async_database import run_async, use_async_services
 import json
 
 venda_bp = Blueprint('venda', __name__, url_prefix='/venda')
 
+# Colunas da listagem (formatação aplicada no template)
+COLUNAS = columns_for(VendaRow, [
+    ("Data/Hora", 'data_venda', 'datetime'),
+    ("Valor Total", 'valor_venda', 'currency'),
+    ("Método de Pagamento", 'metodo_pagamento', 'capitalize'),
+])
+
+
 @venda_bp.route('/')
 @login_required
 def venda_view():
@@ -12,7 +29,7 @@ def venda_view():
     Página principal de vendas
     O carrinho é gerenciado no cliente via JavaScript
     """
-    produtos_data = list_produtos_disponiveis()
+    produtos_data = run_async(list_produtos_disponiveis_async()) if use_async_services() else list_produtos_disponiveis()
     
     # Verifica se a busca foi bem-sucedida
     if produtos_data.get('success'):
@@ -22,7 +39,12 @@ def venda_view():
         error_message = produtos_data.get('error', 'Erro ao carregar produtos')
         flash(f'Erro ao carregar produtos: {error_message}', 'error')
     
-    return render_template('venda/venda_view.html', produtos=produtos)
+    return render_template(
+        'venda/venda_view.html',
+        produtos=produtos,
+        offline_enabled=current_app.config.get('VENDA_OFFLINE_ENABLED', False),
+        sync_max_batch=current_app.config.get('VENDA_SYNC_MAX_BATCH', 50)
+    )
 
 
 @venda_bp.route('/finalizar', methods=['POST'])
@@ -78,6 +100,68 @@ def finalizar():
         return redirect(url_for('venda.venda_view'))
 
 
+@venda_bp.route('/sync', methods=['POST'])
+@login_required
+def sincronizar():
+    """
+    Recebe a fila de vendas do PDV offline em lote (JSON)
+
+    Corpo: {"vendas": [{idempotency_key, carrinho, pagamento, data_venda}]}
+    Resposta: {"success": true, "data": [resultado por venda]} (ver sincronizar_vendas)
+    """
+    payload = request.get_json(silent=True)
+    vendas = payload.get('vendas') if isinstance(payload, dict) else None
+    if not isinstance(vendas, list):
+        return jsonify({'success': False, 'error': 'Envie {"vendas": [...]}'}), 400
+
+    max_batch = current_app.config.get('VENDA_SYNC_MAX_BATCH', 50)
+    if len(vendas) > max_batch:
+        return jsonify({'success': False, 'error': f'Máximo de {max_batch} vendas por lote'}), 413
+
+    user_id = session.get('user', {}).get('id')
+    result = sincronizar_vendas(vendas, user_id)
+    return jsonify(result), 200 if result.get('success') else 400
+
+
+@venda_bp.route('/lote', methods=['POST'])
+@login_required
+def registrar_lote():
+    """
+    Registra várias vendas concluídas em uma requisição (JSON)
+
+    Corpo: {"vendas": [{carrinho, pagamento, data_venda?, idempotency_key?}],
+            "forcar_estoque": false}
+    Resposta: {"success": true, "data": [resultado por venda]} (ver salvar_vendas_lote)
+    """
+    payload = request.get_json(silent=True)
+    vendas = payload.get('vendas') if isinstance(payload, dict) else None
+    if not isinstance(vendas, list):
+        return jsonify({'success': False, 'error': 'Envie {"vendas": [...]}'}), 400
+
+    max_batch = current_app.config.get('VENDA_SYNC_MAX_BATCH', 50)
+    if len(vendas) > max_batch:
+        return jsonify({'success': False, 'error': f'Máximo de {max_batch} vendas por lote'}), 413
+
+    user_id = session.get('user', {}).get('id')
+    result = salvar_vendas_lote(vendas, user_id, forcar_estoque=payload.get('forcar_estoque') is True)
+    return jsonify(result), 200 if result.get('success') else 400
+
+
+@venda_bp.route('/sw.js')
+def service_worker():
+    """
+    Service worker do PDV offline
+
+    DECISÃO: Servido em /venda/ (e não em /static/) para que o escopo padrão
+    do service worker cubra a página de venda
+    """
+    response = send_from_directory(
+        current_app.static_folder, 'js/venda_sw.js', mimetype='application/javascript', max_age=0
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
 @venda_bp.route('/cancelar')
 @login_required
 def cancelar():
@@ -88,23 +172,23 @@ def cancelar():
 
 @venda_bp.route('/list')
 @login_required
+@conditional_get(resources=('vendas',))
 def list_vendas_view():
     """Rota para listar todas as vendas"""
     logged_user = session.get('user', {})
 
-    vendas_data = list_vendas()
+    vendas_data = run_async(list_vendas_async()) if use_async_services() else list_vendas()
 
     if not vendas_data['success']:
         flash(f'Erro ao carregar vendas: {vendas_data.get("error", "Erro desconhecido")}', 'error')
         vendas_data['data'] = []
 
-    headers = ["Data/Hora", "Valor Total", "Método de Pagamento"]
     rows = vendas_data['data']
     
     return render_template(
         'venda/list_vendas.html',
         title="Histórico de Vendas",
-        headers=headers,
+        columns=COLUNAS,
         rows=rows,
         view_url='venda.view_venda',
         user=logged_user
@@ -113,11 +197,12 @@ def list_vendas_view():
 
 @venda_bp.route('/view/<string:id>')
 @login_required
+@conditional_get(key=lambda id: f'venda:{id}')
 def view_venda(id):
     """Rota para visualizar os detalhes de uma venda"""
     logged_user = session.get('user', {})
     
-    result = get_venda_by_id(id)
+    result = run_async(get_venda_by_id_async(id)) if use_async_services() else get_venda_by_id(id)
     
     if not result['success']:
         flash(f'Venda não encontrada: {result.get("error", "Erro desconhecido")}', 'error')
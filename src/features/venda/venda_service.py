@@ -1,4 +1,91 @@
 from src.core.database import supabase_client
+from src.core.resilience import execute_read, execute_read_async
+from src.core.async_database import async_supabase_client
+from src.core.conditional import bump_data_version
+from src.core.idempotency import (
+    DONE, IN_PROGRESS, claim_idempotency_key, complete_idempotency_key,
+    is_valid_idempotency_key, release_idempotency_key
+)
+from src.common.dates import format_datetime_br, now_local, parse_date_column
+from src.features.estoque.estoque_service import (
+    condicao_quantidade, movimento_estoque, registrar_movimentos, ajustar_valor_estoque, variacao_valor,
+    produtos_alterados
+)
+from datetime import datetime
+from typing import Any, NamedTuple, Optional
+import asyncio
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# DECISÃO: Cache dos detalhes de venda montados (venda + itens formatados)
+# Venda finalizada não muda: sem TTL, só limite de tamanho (LRU por worker).
+# Preenchido por salvar_venda (que já tem todos os dados) e na leitura.
+# Os dicts retornados são compartilhados: quem usa não deve modificá-los.
+_venda_cache = {}
+_venda_cache_max = 500
+_venda_cache_lock = threading.Lock()
+
+
+def _get_venda_cached(venda_id):
+    """Retorna o detalhe da venda do cache (e marca como recente) ou None"""
+    key = str(venda_id)
+    with _venda_cache_lock:
+        venda = _venda_cache.pop(key, None)
+        if venda is not None:
+            _venda_cache[key] = venda
+        return venda
+
+
+def _set_venda_cached(venda_id, venda):
+    """Guarda o detalhe da venda, descartando a menos usada se cheio"""
+    key = str(venda_id)
+    with _venda_cache_lock:
+        _venda_cache.pop(key, None)
+        if len(_venda_cache) >= _venda_cache_max:
+            _venda_cache.pop(next(iter(_venda_cache)))
+        _venda_cache[key] = venda
+
+
+def _drop_venda_cached(venda_ids):
+    """Remove vendas do cache (vendas apagadas)"""
+    with _venda_cache_lock:
+        for venda_id in venda_ids:
+            _venda_cache.pop(str(venda_id), None)
+
+
+def clear_venda_cache():
+    """Limpa o cache de detalhes de venda"""
+    with _venda_cache_lock:
+        _venda_cache.clear()
+
+
+def _query_produtos_disponiveis(client, limit):
+    """Consulta produtos com quantidade > 0 (cliente sync ou async)"""
+    return (
+        client
+        .table("produtos")
+        .select("id, nome, preco_venda, quantidade, uni_medida, codigo_barra")
+        .gt("quantidade", 0)
+        .order("nome", desc=False)
+        .limit(limit)
+    )
+
+
+def _format_produto_disponivel(produto):
+    """Formata um produto para a tela de venda"""
+    return {
+        'id': produto.get('id'),
+        'nome': produto.get('nome', ''),
+        'preco_venda': float(produto.get('preco_venda', 0)) if produto.get('preco_venda') else 0,
+        'quantidade': float(produto.get('quantidade', 0)) if produto.get('quantidade') else 0,
+        'uni_medida': produto.get('uni_medida', ''),
+        'codigo_barra': str(int(produto.get('codigo_barra'))) if produto.get('codigo_barra') else ''
+    }
+
 
 def list_produtos_disponiveis(limit=500):
     """
@@ -17,32 +104,32 @@ def list_produtos_disponiveis(limit=500):
     """
     try:
         # Busca produtos diretamente do banco, com limite
-        response = (
-            supabase_client()
-            .table("produtos")
-            .select("id, nome, preco_venda, quantidade, uni_medida, codigo_barra")
-            .gt("quantidade", 0)
-            .order("nome", desc=False)
-            .limit(limit)
-            .execute()
+        response = execute_read(
+            _query_produtos_disponiveis(supabase_client(), limit),
+            stale_key=f"list_produtos_disponiveis:{limit}"
         )
 
-        produtos_disponiveis = []
-        for produto in response.data:
-            produtos_disponiveis.append({
-                'id': produto.get('id'),
-                'nome': produto.get('nome', ''),
-                'preco_venda': float(produto.get('preco_venda', 0)) if produto.get('preco_venda') else 0,
-                'quantidade': float(produto.get('quantidade', 0)) if produto.get('quantidade') else 0,
-                'uni_medida': produto.get('uni_medida', ''),
-                'codigo_barra': str(int(produto.get('codigo_barra'))) if produto.get('codigo_barra') else ''
-            })
-
-        return {"success": True, "data": produtos_disponiveis}
+        return {"success": True, "data": [_format_produto_disponivel(p) for p in response.data]}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
-def salvar_venda(carrinho: list, forma_pagamento: str, user_id: int):
+
+async def list_produtos_disponiveis_async(limit=500):
+    """Versão assíncrona de list_produtos_disponiveis (mesmo retorno)"""
+    try:
+        client = await async_supabase_client()
+        response = await execute_read_async(
+            _query_produtos_disponiveis(client, limit),
+            stale_key=f"list_produtos_disponiveis:{limit}"
+        )
+
+        return {"success": True, "data": [_format_produto_disponivel(p) for p in response.data]}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def salvar_venda(carrinho: list, forma_pagamento: str, user_id: int,
+                 data_venda: Optional[str] = None, forcar_estoque: bool = False):
     """
     Salva uma venda no banco de dados
     
@@ -50,119 +137,578 @@ def salvar_venda(carrinho: list, forma_pagamento: str, user_id: int):
         carrinho: Lista de itens do carrinho [{id, nome, preco_venda, quantidade, uni_medida}]
         forma_pagamento: Forma de pagamento (dinheiro, cartao, pix)
         user_id: ID do usuário que está realizando a venda (não é salvo no banco, apenas para validação)
+        data_venda: Data/hora ISO da venda (padrão: agora; vendas offline trazem a hora do caixa)
+        forcar_estoque: Registra mesmo com estoque insuficiente (venda offline já
+                        aconteceu): o estoque vai a zero e o produto entra em 'conflitos'
     
     Returns:
         {
             'success': bool,
             'message': str (se success=True),
+            'venda_id': ID da venda criada (se success=True),
+            'conflitos': list de nomes de produtos sem estoque suficiente (se success=True),
             'error': str (se success=False)
         }
     """
+    if not user_id:
+        return {"success": False, "error": "ID do usuário é obrigatório"}
+
+    if not carrinho or len(carrinho) == 0:
+        return {"success": False, "error": "Carrinho vazio"}
+
+    # Uma venda é um lote de uma venda (mesma validação e gravação)
+    response = salvar_vendas_lote(
+        [{'carrinho': carrinho, 'pagamento': forma_pagamento, 'data_venda': data_venda}],
+        user_id,
+        forcar_estoque=forcar_estoque
+    )
+    resultado = response['data'][0]
+    if resultado['status'] not in STATUS_GRAVADA:
+        return {"success": False, "error": resultado.get('error', 'Erro ao salvar venda')}
+
+    return {
+        "success": True,
+        "message": "Venda finalizada com sucesso",
+        "venda_id": resultado['venda_id'],
+        "conflitos": resultado['conflitos']
+    }
+
+
+FORMAS_PAGAMENTO = ('dinheiro', 'cartao', 'pix')
+
+# Status de salvar_vendas_lote em que a venda está no banco
+STATUS_GRAVADA = ('registrada', 'conflito', 'duplicada')
+
+# Código do Postgres para unique violation (vendas.idempotency_key repetida)
+_VIOLACAO_UNICIDADE = '23505'
+
+
+def _validar_venda(venda):
+    """Valida uma venda do lote; retorna a mensagem de erro ou None"""
+    carrinho = venda.get('carrinho')
+    if not isinstance(carrinho, list) or not carrinho:
+        return "Carrinho vazio"
+    for item in carrinho:
+        if not isinstance(item, dict) or item.get('id') is None:
+            return "Item do carrinho inválido"
+        try:
+            if float(item.get('quantidade', 0)) <= 0 or float(item.get('preco_venda', 0)) < 0:
+                return f"Quantidade ou preço inválido para o produto {item.get('nome', '')}"
+        except (TypeError, ValueError):
+            return f"Quantidade ou preço inválido para o produto {item.get('nome', '')}"
+    if venda.get('pagamento') not in FORMAS_PAGAMENTO:
+        return "Forma de pagamento inválida"
+    data_venda = venda.get('data_venda')
+    if data_venda is not None:
+        try:
+            datetime.fromisoformat(str(data_venda).replace('Z', '+00:00'))
+        except ValueError:
+            return "Data da venda inválida"
+    return None
+
+
+def _agrupar_itens(carrinho):
+    """Quantidade total por produto (o mesmo produto pode aparecer em mais de uma linha)"""
+    quantidades = {}
+    for item in carrinho:
+        produto_id = str(item.get('id'))
+        quantidades[produto_id] = quantidades.get(produto_id, 0) + float(item.get('quantidade', 0))
+    return quantidades
+
+
+def _alocar_estoque(candidatas, produtos, resultados, forcar_estoque):
+    """
+    Confere o estoque das vendas em ordem, descontando do saldo do lote
+
+    Args:
+        candidatas: [(indice, venda, chave)] já validadas
+        produtos: Linhas atuais dos produtos do lote, por ID (str)
+        resultados: Resultados por índice (recusadas são preenchidas aqui)
+        forcar_estoque: Aceita vendas sem estoque (saldo vai a zero)
+
+    Returns:
+        (aceitas [(indice, venda, chave, conflitos, baixado por produto)],
+         saldo final por produto, índices recusados por falta de estoque)
+    """
+    saldo = {produto_id: float(p.get('quantidade') or 0) for produto_id, p in produtos.items()}
+    aceitas = []
+    sem_estoque = set()
+    for indice, venda, chave in candidatas:
+        quantidades = _agrupar_itens(venda['carrinho'])
+        nomes = {str(item.get('id')): item.get('nome', '') for item in venda['carrinho']}
+
+        faltando = [produto_id for produto_id in quantidades if produto_id not in produtos]
+        if faltando:
+            resultados[indice].update(status="rejeitada", error=f"Produto {faltando[0]} não encontrado")
+            continue
+
+        insuficientes = [
+            nomes.get(produto_id) or produtos[produto_id].get('nome', '')
+            for produto_id, quantidade in quantidades.items()
+            if saldo[produto_id] < quantidade
+        ]
+        if insuficientes and not forcar_estoque:
+            resultados[indice].update(status="rejeitada", error=f"Estoque insuficiente para o produto {insuficientes[0]}")
+            sem_estoque.add(indice)
+            continue
+
+        baixado = {}
+        for produto_id, quantidade in quantidades.items():
+            # Arredonda para não acumular resíduo de ponto flutuante (0.1 kg...)
+            novo = round(max(saldo[produto_id] - quantidade, 0), 6)
+            baixado[produto_id] = saldo[produto_id] - novo
+            saldo[produto_id] = novo
+        aceitas.append((indice, venda, chave, insuficientes, baixado))
+    return aceitas, saldo, sem_estoque
+
+
+def _desfazer_vendas(client, venda_ids):
+    """Remove itens e vendas gravados por um lote que falhou no meio"""
+    # Uma tela de detalhe aberta nesse meio tempo pode ter guardado a venda
+    _drop_venda_cached(venda_ids)
     try:
-        from datetime import datetime
-        
-        if not user_id:
-            return {"success": False, "error": "ID do usuário é obrigatório"}
-        
-        if not carrinho or len(carrinho) == 0:
-            return {"success": False, "error": "Carrinho vazio"}
-        
-        # Calcula o valor total da venda
-        valor_venda = sum(item.get('preco_venda', 0) * item.get('quantidade', 0) for item in carrinho)
-        
-        # Cria o registro da venda conforme schema do banco
-        # Tabela: vendas
-        # Campos: id (auto), data_venda, valor_venda, metodo_pagamento
-        venda_data = {
-            'valor_venda': float(valor_venda),
-            'metodo_pagamento': forma_pagamento,
-            'data_venda': datetime.now().isoformat()  # Supabase converte ISO para timestamp
+        client.table("itens_vendas").delete().in_("id_vendas", venda_ids).execute()
+        client.table("vendas").delete().in_("id", venda_ids).execute()
+    except Exception:
+        pass  # A falha original é a que importa
+
+
+# Tentativas de baixar o estoque quando outro caixa altera os mesmos produtos
+_TENTATIVAS_ESTOQUE = 50
+
+
+def _gravar_quantidade(client, produto_id, lido, novo) -> bool:
+    """
+    Grava quantidade = novo se o produto ainda tem a quantidade lida (compare-and-set)
+
+    DECISÃO: Escrita que levanta exceção é conferida relendo a linha
+    Timeout ou conexão perdida não dizem se o PostgREST aplicou o UPDATE.
+    Se a quantidade relida é a que escrevemos, a escrita valeu (e precisa ser
+    desfeita se o lote falhar); senão a exceção original sobe.
+
+    Returns:
+        True se gravou, False se a quantidade mudou antes (outro caixa)
+    """
+    query = client.table("produtos").update({"quantidade": novo}).eq("id", produto_id)
+    try:
+        return bool(condicao_quantidade(query, lido).execute().data)
+    except Exception:
+        atual = execute_read(client.table("produtos").select("quantidade").eq("id", produto_id)).data
+        if atual and round(float(atual[0].get('quantidade') or 0), 6) == round(float(novo), 6):
+            return True
+        raise
+
+
+def _devolver_estoque(client, devolucoes):
+    """
+    Devolve quantidades já baixadas (lote que falhou depois da baixa)
+
+    Também condicional: soma sobre o valor atual, sem sobrescrever
+    vendas de outros caixas feitas nesse meio tempo. Devolução que não
+    consegue ser gravada fica no log (o estoque ficou abaixo do real).
+    """
+    for produto_id, quantidade in devolucoes.items():
+        if quantidade <= 0:
+            continue
+        erro = None
+        for tentativa in range(_TENTATIVAS_ESTOQUE):
+            try:
+                atual = client.table("produtos").select("quantidade").eq("id", produto_id).execute().data
+                if not atual:
+                    logger.warning("Produto %s não existe mais: devolução de %s ao estoque descartada",
+                                   produto_id, quantidade)
+                    break
+                lido = atual[0].get('quantidade')
+                if _gravar_quantidade(client, produto_id, lido, round(float(lido or 0) + quantidade, 6)):
+                    break
+            except Exception as e:
+                erro = e
+            time.sleep(random.uniform(0, 0.005 * (tentativa + 1)))
+        else:
+            logger.error("Devolução de estoque abandonada após %d tentativas: produto %s, quantidade %s",
+                         _TENTATIVAS_ESTOQUE, produto_id, quantidade, exc_info=erro)
+
+
+def _reservar_estoque(client, candidatas, resultados, forcar_estoque):
+    """
+    Lê o estoque, confere as vendas e baixa o estoque dos produtos do lote
+
+    DECISÃO: Baixa condicional por produto (compare-and-set)
+    UPDATE produtos SET quantidade = saldo WHERE id = X AND quantidade = lido
+    Se outro caixa vendeu o mesmo produto entre a leitura e a escrita, nenhuma
+    linha muda: o que esta tentativa já baixou é devolvido e o lote é conferido
+    de novo com o estoque atual. Nenhuma baixa se perde e o estoque nunca fica
+    abaixo do que foi vendido. (Um 'quantidade = quantidade - x' exigiria uma
+    função no banco; o PostgREST só filtra e grava valores.)
+
+    Returns:
+        (aceitas, produtos por ID, quantidade baixada por produto, recusadas por estoque)
+    """
+    ids = sorted({str(item.get('id')) for _indice, venda, _chave in candidatas for item in venda['carrinho']})
+    for tentativa in range(_TENTATIVAS_ESTOQUE):
+        # Recusas da tentativa anterior foram decididas com estoque velho
+        for indice, _venda, _chave in candidatas:
+            resultados[indice].pop('status', None)
+            resultados[indice].pop('error', None)
+
+        response = execute_read(client.table("produtos").select("*").in_("id", ids))
+        produtos = {str(produto.get('id')): produto for produto in response.data}
+        aceitas, saldo, sem_estoque = _alocar_estoque(candidatas, produtos, resultados, forcar_estoque)
+
+        baixas = {}
+        try:
+            # Ordem fixa de IDs: dois lotes disputando os mesmos produtos não se alternam
+            for produto_id in sorted({str(item.get('id')) for _i, venda, _c, _cf, _b in aceitas for item in venda['carrinho']}):
+                lido = produtos[produto_id].get('quantidade')
+                if not _gravar_quantidade(client, produto_id, lido, saldo[produto_id]):
+                    break
+                baixas[produto_id] = float(lido or 0) - saldo[produto_id]
+            else:
+                return aceitas, produtos, baixas, sem_estoque
+        except Exception:
+            _devolver_estoque(client, baixas)
+            raise
+
+        _devolver_estoque(client, baixas)
+        time.sleep(random.uniform(0, 0.005 * (tentativa + 1)))
+
+    raise RuntimeError("estoque alterado por outros caixas ao mesmo tempo; tente novamente")
+
+
+def _gravar_vendas(client, aceitas):
+    """
+    Grava vendas e itens do lote (uma requisição para cada)
+
+    Returns:
+        (linhas de vendas inseridas na ordem de aceitas, linhas de itens inseridas)
+    """
+    # Tabela: vendas - Campos: id (auto), data_venda, valor_venda, metodo_pagamento, idempotency_key
+    vendas_rows = [
+        {
+            'valor_venda': sum(float(item.get('preco_venda', 0)) * float(item.get('quantidade', 0))
+                               for item in venda['carrinho']),
+            'metodo_pagamento': venda['pagamento'],
+            'data_venda': venda.get('data_venda') or now_local().isoformat()  # ISO com fuso
         }
-        
-        # Insere a venda no banco
-        venda_response = (
-            supabase_client()
-            .table("vendas")
-            .insert(venda_data)
-            .execute()
-        )
-        
-        if not venda_response.data or len(venda_response.data) == 0:
-            return {"success": False, "error": "Erro ao criar registro de venda"}
-        
-        venda_id = venda_response.data[0].get('id')
-        
-        # Cria os itens da venda e atualiza o estoque
-        itens_venda = []
-        for item in carrinho:
-            produto_id = item.get('id')
-            quantidade_vendida = float(item.get('quantidade', 0))
-            preco_venda = float(item.get('preco_venda', 0))
-            
-            # Busca o produto atual para verificar estoque
-            produto_atual = (
-                supabase_client()
-                .table("produtos")
-                .select("quantidade")
-                .eq("id", produto_id)
-                .execute()
-            )
-            
-            if not produto_atual.data or len(produto_atual.data) == 0:
-                return {"success": False, "error": f"Produto {produto_id} não encontrado"}
-            
-            estoque_atual = float(produto_atual.data[0].get('quantidade', 0))
-            
-            if estoque_atual < quantidade_vendida:
-                return {"success": False, "error": f"Estoque insuficiente para o produto {item.get('nome', '')}"}
-            
-            # Cria o item da venda conforme schema do banco
-            # Tabela: itens_vendas
-            # Campos: id (auto), quantidade, subtotal, preco_unitario, id_vendas, id_produto
-            item_venda = {
-                'id_vendas': venda_id,  # Nome correto conforme schema
-                'id_produto': produto_id,
-                'quantidade': quantidade_vendida,
-                'preco_unitario': preco_venda,
-                'subtotal': float(preco_venda * quantidade_vendida)
+        for _indice, venda, _chave, _conflitos, _baixado in aceitas
+    ]
+    # Chave no banco (unique): reenvio após redeploy ou para outra réplica não grava de novo
+    if any(chave for _indice, _venda, chave, _conflitos, _baixado in aceitas):
+        for row, (_indice, _venda, chave, _conflitos, _baixado) in zip(vendas_rows, aceitas):
+            row['idempotency_key'] = chave
+    vendas_gravadas = client.table("vendas").insert(vendas_rows).execute().data or []
+    venda_ids = [venda.get('id') for venda in vendas_gravadas]
+    if len(vendas_gravadas) != len(aceitas):
+        _desfazer_vendas(client, venda_ids)
+        raise RuntimeError("Erro ao criar registro de venda")
+
+    try:
+        # Tabela: itens_vendas - Campos: id (auto), quantidade, subtotal, preco_unitario, id_vendas, id_produto
+        itens_rows = [
+            {
+                'id_vendas': venda_id,
+                'id_produto': item.get('id'),
+                'quantidade': float(item.get('quantidade', 0)),
+                'preco_unitario': float(item.get('preco_venda', 0)),
+                'subtotal': float(item.get('preco_venda', 0)) * float(item.get('quantidade', 0))
             }
-            itens_venda.append(item_venda)
-            
-            # Atualiza o estoque do produto
-            nova_quantidade = estoque_atual - quantidade_vendida
-            (
-                supabase_client()
-                .table("produtos")
-                .update({"quantidade": nova_quantidade})
-                .eq("id", produto_id)
-                .execute()
-            )
-        
-        # Insere todos os itens da venda
-        # Tabela: itens_vendas (não itens_venda)
-        if itens_venda:
-            (
-                supabase_client()
-                .table("itens_vendas")
-                .insert(itens_venda)
-                .execute()
+            for (_indice, venda, _chave, _conflitos, _baixado), venda_id in zip(aceitas, venda_ids)
+            for item in venda['carrinho']
+        ]
+        itens_gravados = client.table("itens_vendas").insert(itens_rows).execute().data or []
+    except Exception:
+        _desfazer_vendas(client, venda_ids)
+        raise
+
+    return vendas_gravadas, itens_gravados
+
+
+def _vendas_por_chave(client, chaves) -> dict:
+    """IDs das vendas já gravadas com essas chaves de idempotência ({chave: venda_id})"""
+    chaves = [chave for chave in chaves if chave]
+    if not chaves:
+        return {}
+    response = execute_read(client.table("vendas").select("id, idempotency_key").in_("idempotency_key", chaves))
+    return {linha['idempotency_key']: linha.get('id') for linha in response.data}
+
+
+def _marcar_duplicadas(candidatas, resultados, existentes) -> list:
+    """Marca como duplicadas as candidatas já gravadas; retorna as demais"""
+    restantes = []
+    for indice, venda, chave in candidatas:
+        if chave in existentes:
+            resultados[indice].update(status="duplicada", venda_id=existentes[chave], conflitos=[])
+        else:
+            restantes.append((indice, venda, chave))
+    return restantes
+
+
+def salvar_vendas_lote(vendas: list, user_id, forcar_estoque: bool = False, exigir_chave: bool = False):
+    """
+    Registra várias vendas concluídas de uma vez (vários caixas, fila offline)
+
+    DECISÃO: Operações por conjunto em vez de idas ao banco por item
+    O estoque de todos os produtos do lote vem em uma consulta e vendas e
+    itens são gravados com um insert cada; o estoque, com uma escrita
+    condicional por produto (ver _reservar_estoque).
+    DECISÃO: Estoque conferido na ordem das vendas, com o saldo acumulado
+    Duas vendas do mesmo produto não vendem, juntas, mais do que há. Venda sem
+    estoque é recusada (com forcar_estoque: registrada, saldo a zero, produto
+    em 'conflitos').
+    DECISÃO: Estoque baixado antes de gravar as vendas
+    Falha depois disso apaga itens e vendas já gravados e devolve o estoque
+    (o PostgREST não mantém transação entre requisições)
+    DECISÃO: Chave conferida no banco, além do arquivo de IDEMPOTENCY_DIR
+    O arquivo responde reenvios no mesmo servidor sem consulta. Chaves que
+    ele não conhece são procuradas em vendas.idempotency_key antes de baixar
+    o estoque; se outra réplica gravar a mesma chave no meio tempo, o insert
+    viola a unicidade, o estoque é devolvido e a venda volta como duplicada.
+
+    Args:
+        vendas: [{carrinho, pagamento, data_venda?, idempotency_key?}]
+        user_id: ID do usuário da sessão
+        forcar_estoque: Registra vendas mesmo sem estoque suficiente
+        exigir_chave: Recusa vendas sem idempotency_key
+
+    Returns:
+        {
+            'success': bool,
+            'data': list com um resultado por venda, na mesma ordem:
+                {indice, idempotency_key, status, venda_id?, conflitos?, error?}
+                status: registrada | conflito | duplicada (venda está no banco),
+                        rejeitada (não gravada),
+                        em_andamento | erro (reenviar depois),
+            'error': str (se success=False)
+        }
+    """
+    if not user_id:
+        return {"success": False, "error": "ID do usuário é obrigatório"}
+
+    resultados = []
+    candidatas = []
+    for indice, venda in enumerate(vendas):
+        chave = venda.get('idempotency_key') if isinstance(venda, dict) else None
+        resultado = {"indice": indice, "idempotency_key": chave}
+        resultados.append(resultado)
+
+        if not isinstance(venda, dict):
+            resultado.update(status="rejeitada", error="Venda inválida")
+            continue
+        if (chave is not None or exigir_chave) and not is_valid_idempotency_key(chave):
+            resultado.update(status="rejeitada", error="Chave de idempotência inválida")
+            continue
+        erro = _validar_venda(venda)
+        if erro:
+            resultado.update(status="rejeitada", error=erro)
+            continue
+
+        if chave is not None:
+            status, anterior = claim_idempotency_key('venda', chave)
+            if status == DONE:
+                # Rejeitada continua rejeitada; gravada volta como duplicada
+                resultado.update(anterior)
+                if anterior.get('status') != 'rejeitada':
+                    resultado['status'] = "duplicada"
+                continue
+            if status == IN_PROGRESS:
+                resultado['status'] = "em_andamento"
+                continue
+        candidatas.append((indice, venda, chave))
+
+    reservadas = list(candidatas)
+    sem_estoque = set()
+    gravadas = None
+    try:
+        if candidatas:
+            client = supabase_client()
+            candidatas = _marcar_duplicadas(
+                candidatas, resultados, _vendas_por_chave(client, [chave for _i, _v, chave in candidatas])
             )
-        
-        # Limpa cache do dashboard após nova venda
+        if candidatas:
+            aceitas, produtos, baixas, sem_estoque = _reservar_estoque(client, candidatas, resultados, forcar_estoque)
+            if aceitas:
+                try:
+                    vendas_gravadas, itens_gravados = _gravar_vendas(client, aceitas)
+                except Exception:
+                    _devolver_estoque(client, baixas)
+                    raise
+
+                # Vendas e itens estão no banco: o resultado é definitivo daqui em diante
+                for (indice, _venda, _chave, conflitos, _baixado), gravada in zip(aceitas, vendas_gravadas):
+                    resultados[indice].update(
+                        status="conflito" if conflitos else "registrada",
+                        venda_id=gravada.get('id'),
+                        conflitos=conflitos
+                    )
+                gravadas = (aceitas, produtos, baixas, vendas_gravadas, itens_gravados)
+    except Exception as e:
+        if str(getattr(e, 'code', '')) == _VIOLACAO_UNICIDADE:
+            # Outra réplica gravou uma das chaves: o insert inteiro foi recusado
+            # (nada deste lote ficou no banco, e o estoque já foi devolvido)
+            try:
+                candidatas = _marcar_duplicadas(
+                    candidatas, resultados, _vendas_por_chave(client, [chave for _i, _v, chave in candidatas])
+                )
+            except Exception:
+                logger.exception("Falha ao procurar as vendas já gravadas do lote")
+        for indice, _venda, _chave in candidatas:
+            resultados[indice].update(status="erro", error=f"Erro ao salvar venda: {str(e)}")
+    finally:
+        if reservadas:
+            # Listas de vendas e de produtos (estoque) mudaram (ou podem ter mudado)
+            bump_data_version('vendas', 'produtos')
+
+    if gravadas:
+        _apos_gravar_vendas(*gravadas)
+
+    # Resultado definitivo fica gravado na chave; falta de estoque e erro podem ser reenviados
+    for indice, _venda, chave in reservadas:
+        if chave is None:
+            continue
+        resultado = resultados[indice]
+        if resultado['status'] == 'erro' or indice in sem_estoque:
+            release_idempotency_key('venda', chave)
+        else:
+            complete_idempotency_key('venda', chave, {k: v for k, v in resultado.items() if k != 'indice'})
+
+    if any(resultado['status'] in STATUS_GRAVADA for resultado in resultados):
+        # Limpa cache do dashboard após novas vendas
         try:
             from src.features.dashboard.dashboard_service import clear_dashboard_cache
             clear_dashboard_cache()
         except:
             pass  # Não falha se não conseguir limpar cache
-        
-        return {
-            "success": True,
-            "message": "Venda finalizada com sucesso",
-            "venda_id": venda_id
-        }
-        
-    except Exception as e:
-        return {"success": False, "error": f"Erro ao salvar venda: {str(e)}"}
+
+    return {"success": True, "data": resultados}
+
+
+def _apos_gravar_vendas(aceitas, produtos, baixas, vendas_gravadas, itens_gravados):
+    """
+    Efeitos de vendas já gravadas: livro-razão, valor do estoque, listas do estoque e cache do detalhe
+
+    DECISÃO: Cada efeito falha sozinho, com log, sem mudar o resultado das vendas
+    As vendas já estão no banco; se uma falha aqui virasse 'erro', a chave de
+    idempotência seria liberada e o caixa reenviaria: venda e baixa em dobro.
+    """
+    venda_ids = [gravada.get('id') for gravada in vendas_gravadas]
+
+    # Livro-razão do estoque: uma saída por produto de cada venda
+    movimentos = []
+    try:
+        movimentos = [
+            movimento_estoque(produtos[produto_id].get('id'), 'venda', -quantidade,
+                              produtos[produto_id].get('preco_custo'), gravada.get('id'))
+            for (_indice, _venda, _chave, _conflitos, baixado), gravada in zip(aceitas, vendas_gravadas)
+            for produto_id, quantidade in baixado.items()
+            if quantidade
+        ]
+        registrar_movimentos(movimentos)
+    except Exception:
+        logger.exception("Falha ao registrar os movimentos de estoque das vendas %s", venda_ids)
+
+    try:
+        ajustar_valor_estoque(variacao_valor(movimentos))
+    except Exception:
+        logger.exception("Falha ao ajustar o valor do estoque das vendas %s", venda_ids)
+
+    try:
+        produtos_alterados(produtos=[
+            dict(produtos[produto_id], quantidade=round(float(produtos[produto_id].get('quantidade') or 0) - baixa, 6))
+            for produto_id, baixa in baixas.items()
+        ])
+    except Exception:
+        logger.exception("Falha ao atualizar as listas do estoque das vendas %s", venda_ids)
+
+    # A venda já está completa aqui: guarda o detalhe para a tela/recibo
+    itens_por_venda = {}
+    for item in itens_gravados:
+        itens_por_venda.setdefault(str(item.get('id_vendas')), []).append(item)
+    for (_indice, venda, _chave, _conflitos, _baixado), gravada in zip(aceitas, vendas_gravadas):
+        try:
+            _cache_venda_salva(gravada, itens_por_venda.get(str(gravada.get('id'))), venda['carrinho'])
+        except Exception:
+            logger.exception("Falha ao guardar o detalhe da venda %s", gravada.get('id'))
+
+
+def sincronizar_vendas(vendas: list, user_id):
+    """
+    Registra as vendas da fila do PDV offline (enviadas em lote pelo navegador)
+
+    DECISÃO: Cada venda traz uma chave de idempotência gerada no caixa
+    O navegador reenvia a fila até receber confirmação; uma venda já gravada
+    responde 'duplicada' com o mesmo venda_id em vez de ser gravada de novo.
+    DECISÃO: Conflito de estoque não rejeita a venda
+    A venda já aconteceu no balcão: é registrada, o estoque vai a zero e os
+    produtos voltam em 'conflitos' para conferência.
+
+    Args:
+        vendas: [{idempotency_key, carrinho, pagamento, data_venda}]
+        user_id: ID do usuário da sessão
+
+    Returns:
+        Mesmo formato de salvar_vendas_lote
+    """
+    return salvar_vendas_lote(vendas, user_id, forcar_estoque=True, exigir_chave=True)
+
+
+def _cache_venda_salva(venda, itens, carrinho):
+    """
+    Preenche o cache de detalhe com a venda recém-salva, sem nova consulta
+
+    Os itens inseridos (com ID) vêm da resposta do insert; nome e unidade
+    do produto vêm do carrinho. Sem os itens, não guarda nada
+    (a primeira visualização busca no banco).
+    """
+    if not itens:
+        return
+    produtos = {str(item.get('id')): item for item in carrinho}
+    itens_detalhe = []
+    for item in itens:
+        produto = produtos.get(str(item.get('id_produto')), {})
+        itens_detalhe.append(dict(item, produtos={
+            'nome': produto.get('nome', ''),
+            'uni_medida': produto.get('uni_medida', '')
+        }))
+    _set_venda_cached(venda.get('id'), _montar_venda_data(venda, itens_detalhe))
+
+
+def _query_vendas(client, limit, offset):
+    """Consulta uma página de vendas, mais recentes primeiro"""
+    return (
+        client
+        .table("vendas")
+        .select("*", count="exact")
+        .order("data_venda", desc=True)
+        .range(offset, offset + limit - 1)
+    )
+
+
+class VendaRow(NamedTuple):
+    """Linha da listagem de vendas (valores crus; formatação no template)"""
+    id: Any
+    data_venda: Optional[datetime]
+    valor_venda: Optional[float]
+    metodo_pagamento: str
+
+
+def _montar_lista_vendas(response):
+    """
+    Monta o resultado da listagem com total (se disponível)
+
+    DECISÃO: Linhas com valores crus (ver src/common/view_models.py)
+    Datas convertidas por coluna para o fuso da loja
+    """
+    datas = parse_date_column([v.get('data_venda') for v in response.data])
+    result = {
+        "success": True,
+        "data": [
+            VendaRow(v.get('id', ''), data, v.get('valor_venda'), v.get('metodo_pagamento') or '')
+            for v, data in zip(response.data, datas)
+        ]
+    }
+    if hasattr(response, 'count') and response.count is not None:
+        result['total'] = response.count
+    return result
 
 
 def list_vendas(limit=100, offset=0):
@@ -177,60 +723,92 @@ def list_vendas(limit=100, offset=0):
     Returns:
         {
             'success': bool,
-            'data': list de listas com dados das vendas (se success=True),
+            'data': list de VendaRow (se success=True),
             'error': str (se success=False),
             'total': int (total de vendas, se disponível)
         }
     """
     try:
-        response = (
-            supabase_client()
-            .table("vendas")
-            .select("*", count="exact")
-            .order("data_venda", desc=True)
-            .range(offset, offset + limit - 1)
-            .execute()
+        response = execute_read(
+            _query_vendas(supabase_client(), limit, offset),
+            stale_key=f"list_vendas:{limit}:{offset}"
         )
+        return _montar_lista_vendas(response)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
 
-        vendas_data = []
-        for venda in response.data:
-            # Formata a data
-            data_venda = venda.get('data_venda', '')
-            if data_venda:
-                try:
-                    from datetime import datetime
-                    if isinstance(data_venda, str):
-                        # Tenta parsear ISO format
-                        dt = datetime.fromisoformat(data_venda.replace('Z', '+00:00'))
-                        data_venda = dt.strftime('%d/%m/%Y %H:%M')
-                except:
-                    pass
-            
-            # Formata o valor
-            valor_venda = venda.get('valor_venda', 0)
-            valor_str = f"R$ {float(valor_venda):.2f}".replace('.', ',') if valor_venda else 'R$ 0,00'
-            
-            # Formata método de pagamento
-            metodo_pagamento = venda.get('metodo_pagamento', '')
-            metodo_str = metodo_pagamento.capitalize() if metodo_pagamento else '-'
-            
-            # O primeiro elemento é o ID - será usado nas ações mas não exibido na tabela
-            vendas_data.append([
-                venda.get('id', ''),  # ID - não será exibido
-                data_venda,
-                valor_str,
-                metodo_str
-            ])
-
-        # Retorna dados com total (se disponível)
-        result = {"success": True, "data": vendas_data}
-        if hasattr(response, 'count') and response.count is not None:
-            result['total'] = response.count
-        return result
+
+async def list_vendas_async(limit=100, offset=0):
+    """Versão assíncrona de list_vendas (mesmo retorno)"""
+    try:
+        client = await async_supabase_client()
+        response = await execute_read_async(
+            _query_vendas(client, limit, offset),
+            stale_key=f"list_vendas:{limit}:{offset}"
+        )
+        return _montar_lista_vendas(response)
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
+def _query_venda(client, venda_id):
+    """Consulta uma venda pelo ID"""
+    return client.table("vendas").select("*").eq("id", venda_id)
+
+
+def _query_itens_venda(client, venda_id):
+    """Consulta os itens de uma venda com informações do produto"""
+    return (
+        client
+        .table("itens_vendas")
+        .select("*, produtos(nome, uni_medida)")
+        .eq("id_vendas", venda_id)
+    )
+
+
+def _format_item_venda(item):
+    """Formata um item da venda para a tela de detalhes"""
+    produto = item.get('produtos', {})
+    produto_nome = produto.get('nome', '') if isinstance(produto, dict) else ''
+    uni_medida = produto.get('uni_medida', '') if isinstance(produto, dict) else ''
+    
+    return {
+        'id': item.get('id'),
+        'produto_nome': produto_nome,
+        'quantidade': float(item.get('quantidade', 0)),
+        'uni_medida': uni_medida,
+        'preco_unitario': float(item.get('preco_unitario', 0)),
+        'subtotal': float(item.get('subtotal', 0))
+    }
+
+
+def _montar_venda_data(venda, itens):
+    """Monta o detalhe da venda (dados da tela) a partir do registro e dos itens"""
+    return {
+        'id': venda.get('id'),
+        'data_venda': format_datetime_br(venda.get('data_venda', '')),
+        'valor_venda': float(venda.get('valor_venda', 0)),
+        'metodo_pagamento': venda.get('metodo_pagamento', ''),
+        'itens': [_format_item_venda(item) for item in itens]
+    }
+
+
+def _montar_venda(venda_response, itens_response):
+    """Monta o resultado de get_venda_by_id a partir das duas respostas"""
+    if not venda_response.data or len(venda_response.data) == 0:
+        return {
+            "success": False,
+            "error": "Venda não encontrada"
+        }
+
+    venda = _montar_venda_data(venda_response.data[0], itens_response.data)
+    # Sem itens a venda pode estar no meio da gravação (itens ainda não
+    # inseridos) ou prestes a ser desfeita: não guarda
+    if itens_response.data:
+        _set_venda_cached(venda['id'], venda)
+    return {"success": True, "data": venda}
+
+
 def get_venda_by_id(venda_id: str):
     """
     Busca uma venda pelo ID com seus itens
@@ -245,15 +823,13 @@ def get_venda_by_id(venda_id: str):
             'error': str (se success=False)
         }
     """
+    venda = _get_venda_cached(venda_id)
+    if venda is not None:
+        return {"success": True, "data": venda}
+
     try:
         # Busca a venda
-        venda_response = (
-            supabase_client()
-            .table("vendas")
-            .select("*")
-            .eq("id", venda_id)
-            .execute()
-        )
+        venda_response = execute_read(_query_venda(supabase_client(), venda_id))
         
         if not venda_response.data or len(venda_response.data) == 0:
             return {
@@ -261,52 +837,31 @@ def get_venda_by_id(venda_id: str):
                 "error": "Venda não encontrada"
             }
         
-        venda = venda_response.data[0]
-        
-        # Formata a data
-        data_venda = venda.get('data_venda', '')
-        if data_venda:
-            try:
-                from datetime import datetime
-                if isinstance(data_venda, str):
-                    dt = datetime.fromisoformat(data_venda.replace('Z', '+00:00'))
-                    data_venda = dt.strftime('%d/%m/%Y %H:%M')
-            except:
-                pass
-        
         # Busca os itens da venda com informações do produto
-        itens_response = (
-            supabase_client()
-            .table("itens_vendas")
-            .select("*, produtos(nome, uni_medida)")
-            .eq("id_vendas", venda_id)
-            .execute()
-        )
+        itens_response = execute_read(_query_itens_venda(supabase_client(), venda_id))
         
-        itens = []
-        for item in itens_response.data:
-            produto = item.get('produtos', {})
-            produto_nome = produto.get('nome', '') if isinstance(produto, dict) else ''
-            uni_medida = produto.get('uni_medida', '') if isinstance(produto, dict) else ''
-            
-            itens.append({
-                'id': item.get('id'),
-                'produto_nome': produto_nome,
-                'quantidade': float(item.get('quantidade', 0)),
-                'uni_medida': uni_medida,
-                'preco_unitario': float(item.get('preco_unitario', 0)),
-                'subtotal': float(item.get('subtotal', 0))
-            })
-        
-        return {
-            "success": True,
-            "data": {
-                'id': venda.get('id'),
-                'data_venda': data_venda,
-                'valor_venda': float(venda.get('valor_venda', 0)),
-                'metodo_pagamento': venda.get('metodo_pagamento', ''),
-                'itens': itens
-            }
-        }
+        return _montar_venda(venda_response, itens_response)
     except Exception as e:
-        return {"success": False, "error": str(e)}
\ No newline at end of file
+        return {"success": False, "error": str(e)}
+
+
+async def get_venda_by_id_async(venda_id: str):
+    """
+    Versão assíncrona de get_venda_by_id (mesmo retorno)
+
+    DECISÃO: Buscar venda e itens em paralelo
+    Se a venda não existir, a consulta de itens volta vazia e é descartada
+    """
+    venda = _get_venda_cached(venda_id)
+    if venda is not None:
+        return {"success": True, "data": venda}
+
+    try:
+        client = await async_supabase_client()
+        venda_response, itens_response = await asyncio.gather(
+            execute_read_async(_query_venda(client, venda_id)),
+            execute_read_async(_query_itens_venda(client, venda_id))
+        )
+        return _montar_venda(venda_response, itens_response)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
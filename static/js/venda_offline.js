@@ -0,0 +1,184 @@
+/*
+ * PDV offline: catálogo local, fila de vendas e sincronização em lote
+ *
+ * Sem conexão, o fechamento da venda é local e instantâneo: a venda entra numa
+ * fila no localStorage com uma chave de idempotência e é enviada em lote para
+ * /venda/sync quando a conexão volta (com conexão, a tela usa o formulário
+ * normal, que confere o estoque). O servidor ignora reenvios da mesma chave,
+ * então reenviar depois de uma resposta perdida é seguro.
+ *
+ * Configuração pelo elemento #pdv-status:
+ *   data-sync-url, data-sw-url, data-lote (vendas por requisição)
+ */
+(function () {
+    const FILA = 'mercadim:vendas_pendentes';
+    const REJEITADAS = 'mercadim:vendas_rejeitadas';
+    const CONFLITOS = 'mercadim:vendas_conflito';
+    const CATALOGO = 'mercadim:catalogo';
+    const INTERVALO_SYNC_MS = 30000;
+
+    const statusEl = document.getElementById('pdv-status');
+    if (!statusEl || !window.localStorage) return;
+
+    const syncUrl = statusEl.dataset.syncUrl;
+    const lote = parseInt(statusEl.dataset.lote, 10) || 50;
+    let sincronizando = false;
+
+    function ler(chave) {
+        try {
+            return JSON.parse(localStorage.getItem(chave)) || [];
+        } catch (e) {
+            return [];
+        }
+    }
+
+    function gravar(chave, valor) {
+        localStorage.setItem(chave, JSON.stringify(valor));
+    }
+
+    function novaChave() {
+        if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+        const bytes = new Uint8Array(16);
+        crypto.getRandomValues(bytes);
+        return Array.from(bytes, b => b.toString(16).padStart(2, '0')).join('');
+    }
+
+    // Catálogo: última lista de produtos vista online (id -> produto)
+    function salvarCatalogo(produtos) {
+        if (!produtos.length) return;
+        gravar(CATALOGO, { salvo_em: new Date().toISOString(), produtos: produtos });
+    }
+
+    function catalogo() {
+        const salvo = JSON.parse(localStorage.getItem(CATALOGO) || 'null');
+        return salvo ? salvo.produtos : [];
+    }
+
+    // Estoque conhecido menos o que já foi vendido e ainda não sincronizou
+    function estoqueLocal(produtoId) {
+        const produto = catalogo().find(p => p.id === produtoId);
+        if (!produto) return null;
+        const pendente = ler(FILA).reduce((soma, venda) => soma + venda.carrinho
+            .filter(item => item.id === produtoId)
+            .reduce((s, item) => s + item.quantidade, 0), 0);
+        return produto.quantidade - pendente;
+    }
+
+    function atualizarStatus(mensagem) {
+        const pendentes = ler(FILA).length;
+        const conflitos = ler(CONFLITOS).length;
+        const rejeitadas = ler(REJEITADAS).length;
+        const partes = [navigator.onLine ? 'Online' : 'Offline'];
+        if (pendentes) partes.push(`${pendentes} venda(s) aguardando envio`);
+        if (conflitos) partes.push(`${conflitos} com estoque a conferir`);
+        if (rejeitadas) partes.push(`${rejeitadas} recusada(s) pelo servidor`);
+        if (mensagem) partes.push(mensagem);
+        statusEl.textContent = partes.join(' · ');
+        statusEl.className = 'small mt-2 ' + (rejeitadas || conflitos ? 'text-danger' : pendentes ? 'text-warning' : 'text-muted');
+    }
+
+    function enfileirar(carrinho, pagamento) {
+        const fila = ler(FILA);
+        fila.push({
+            idempotency_key: novaChave(),
+            carrinho: carrinho.map(item => ({
+                id: item.id,
+                nome: item.nome,
+                preco_venda: item.preco_venda,
+                quantidade: item.quantidade,
+                uni_medida: item.uni_medida || ''
+            })),
+            pagamento: pagamento,
+            data_venda: new Date().toISOString()
+        });
+        gravar(FILA, fila);
+        atualizarStatus('Venda registrada');
+        sincronizar();
+    }
+
+    function aplicarResultados(resultados) {
+        const porChave = new Map(resultados.map(r => [r.idempotency_key, r]));
+        const rejeitadas = ler(REJEITADAS);
+        const conflitos = ler(CONFLITOS);
+        // Relê a fila: vendas podem ter entrado durante o envio
+        const fila = ler(FILA).filter(venda => {
+            const r = porChave.get(venda.idempotency_key);
+            if (!r || r.status === 'em_andamento' || r.status === 'erro') return true;
+            if (r.status === 'rejeitada') rejeitadas.push(Object.assign({}, venda, { erro: r.error }));
+            if (r.status === 'conflito') conflitos.push({ venda_id: r.venda_id, produtos: r.conflitos });
+            return false;
+        });
+        gravar(FILA, fila);
+        gravar(REJEITADAS, rejeitadas);
+        gravar(CONFLITOS, conflitos);
+    }
+
+    async function sincronizar() {
+        if (sincronizando || !navigator.onLine) {
+            atualizarStatus();
+            return;
+        }
+        sincronizando = true;
+        try {
+            let pendentes = ler(FILA);
+            while (pendentes.length) {
+                const response = await fetch(syncUrl, {
+                    method: 'POST',
+                    credentials: 'same-origin',
+                    headers: { 'Content-Type': 'application/json', 'Accept': 'application/json' },
+                    body: JSON.stringify({ vendas: pendentes.slice(0, lote) })
+                });
+                // Sessão expirada redireciona para o login (HTML)
+                const tipo = response.headers.get('Content-Type') || '';
+                if (response.redirected || !tipo.includes('application/json')) {
+                    atualizarStatus('Faça login novamente para enviar as vendas');
+                    return;
+                }
+                const corpo = await response.json();
+                if (!corpo.success) {
+                    atualizarStatus(corpo.error || 'Erro ao enviar vendas');
+                    return;
+                }
+                aplicarResultados(corpo.data);
+                const restantes = ler(FILA);
+                // Nada saiu da fila neste lote (em andamento/erro): tenta no próximo ciclo
+                if (restantes.length >= pendentes.length) break;
+                pendentes = restantes;
+            }
+            atualizarStatus();
+        } catch (e) {
+            atualizarStatus();
+        } finally {
+            sincronizando = false;
+        }
+    }
+
+    window.MercadimPDV = {
+        salvarCatalogo: salvarCatalogo,
+        estoqueLocal: estoqueLocal,
+        enfileirar: enfileirar,
+        sincronizar: sincronizar
+    };
+
+    window.addEventListener('online', sincronizar);
+    window.addEventListener('offline', () => atualizarStatus());
+    // Outra aba alterou a fila
+    window.addEventListener('storage', event => {
+        if ([FILA, REJEITADAS, CONFLITOS].includes(event.key)) atualizarStatus();
+    });
+    setInterval(sincronizar, INTERVALO_SYNC_MS);
+
+    if ('serviceWorker' in navigator && statusEl.dataset.swUrl) {
+        navigator.serviceWorker.register(statusEl.dataset.swUrl)
+            .then(() => navigator.serviceWorker.ready)
+            .then(registration => {
+                const urls = Array.from(document.querySelectorAll('link[rel="stylesheet"], script[src], img[src]'))
+                    .map(el => el.href || el.src);
+                registration.active.postMessage({ tipo: 'precache', urls: urls });
+            })
+            .catch(() => {});
+    }
+
+    atualizarStatus();
+    sincronizar();
+})();
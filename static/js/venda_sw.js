@@ -0,0 +1,99 @@
+/*
+ * Service worker do PDV (servido em /venda/sw.js, escopo /venda/)
+ *
+ * - Página de venda: rede primeiro; sem rede (ou rede lenta demais), a última
+ *   cópia salva, que já traz o catálogo de produtos.
+ * - CSS, JS, imagens e fontes (inclusive do CDN): cache primeiro, atualizado
+ *   em segundo plano.
+ * - POST (finalizar, sync) nunca passa pelo cache.
+ */
+const CACHE = 'mercadim-pdv-v1';
+const TIMEOUT_REDE_MS = 4000;
+
+self.addEventListener('install', event => {
+    // A primeira visita não passou pelo service worker: guarda a página já agora
+    event.waitUntil(
+        caches.open(CACHE)
+            .then(cache => cache.add(self.registration.scope))
+            .catch(() => {})
+            .then(() => self.skipWaiting())
+    );
+});
+
+// A página envia os CSS/JS/imagens que carregou antes de o service worker existir
+self.addEventListener('message', event => {
+    const dados = event.data || {};
+    if (dados.tipo === 'precache' && Array.isArray(dados.urls)) {
+        event.waitUntil(caches.open(CACHE).then(cache => Promise.all(
+            dados.urls.map(url => cache.match(url).then(salvo => salvo || fetch(url, { mode: 'no-cors' })
+                .then(response => cache.put(url, response))
+                .catch(() => {})))
+        )));
+    }
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil(
+        caches.keys()
+            .then(nomes => Promise.all(
+                nomes.filter(n => n.startsWith('mercadim-pdv-') && n !== CACHE).map(n => caches.delete(n))
+            ))
+            .then(() => self.clients.claim())
+    );
+});
+
+function comTimeout(promise, ms) {
+    return new Promise((resolve, reject) => {
+        const timer = setTimeout(() => reject(new Error('timeout')), ms);
+        promise.then(
+            valor => { clearTimeout(timer); resolve(valor); },
+            erro => { clearTimeout(timer); reject(erro); }
+        );
+    });
+}
+
+async function paginaDeVenda(request) {
+    const cache = await caches.open(CACHE);
+    try {
+        const response = await comTimeout(fetch(request), TIMEOUT_REDE_MS);
+        // Redirecionamento (sessão expirada -> login) não substitui a cópia boa
+        if (response.ok && !response.redirected) {
+            await cache.put(self.registration.scope, response.clone());
+        }
+        return response;
+    } catch (erro) {
+        const salva = await cache.match(self.registration.scope);
+        if (salva) return salva;
+        throw erro;
+    }
+}
+
+async function recurso(request) {
+    const cache = await caches.open(CACHE);
+    const salvo = await cache.match(request);
+    const rede = fetch(request)
+        .then(response => {
+            if (response.ok || response.type === 'opaque') {
+                cache.put(request, response.clone());
+            }
+            return response;
+        })
+        .catch(() => salvo);
+    return salvo || rede;
+}
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET') return;
+
+    if (request.mode === 'navigate') {
+        if (request.url === self.registration.scope) {
+            event.respondWith(paginaDeVenda(request));
+        }
+        return;
+    }
+
+    if (['style', 'script', 'image', 'font'].includes(request.destination)) {
+        event.respondWith(recurso(request));
+    }
+});